@@ -4,11 +4,16 @@
 ### Instituto de Computação - IComp
 
 import os
+import sys
 import time
 
+from cache import MetricsCache
+from cli import CommandLine
 from merge_csv import MergeCsvs
 from csv_parser import CSVParser
 from extractor import CodebenchExtractor
+from manifest import ExtractionManifest
+from pipeline import ExtractionPipeline
 from util import Util, Logger
 
 __version__ = '2.3.0'
@@ -17,11 +22,14 @@ __version__ = '2.3.0'
 __cwd__ = os.getcwd()
 
 
-def main():
+def menu():
     # cria a pasta para os arquivos de saídade (CSV), caso já exista, recria os arquivos
     CSVParser.create_output_dir()
     # configura o módulo de log
     Logger.configure()
+    # configura o cache das métricas e tokens dos códigos-fonte já analisados
+    cache = MetricsCache()
+    CodebenchExtractor.set_cache(cache)
 
     Util.clear_console()
     print(f'-- CODEBENCH DATASET EXTRACTOR v{__version__} --')
@@ -40,73 +48,50 @@ def main():
         print('5 - Extrair dados das tentativas de solução')
         print('6 - Extrair dados das soluções dos instrutores')
         print('7 - Unir csvs gerados')
+        print('8 - Extrair todos os dados numa única varredura (opções 1 a 5)')
+        print('9 - Atualizar os dados extraídos, processando apenas arquivos novos ou alterados (opção 8)')
         print('0 - Sair')
         op = input('Digite a opção desejada: ')
         op = int(op.strip())
         if op == 0:
+            cache.close()
             loop = False
         elif op == 1:
             start_time = time.time()
-            periodos = CodebenchExtractor.extract_periodos(dataset_dir)
-            CSVParser.salvar_periodos(periodos)
+            ExtractionPipeline.extract_periodos(dataset_dir)
             time_elapsed = time.strftime('%H:%M:%S', time.gmtime(time.time() - start_time))
             print(f'Tempo Total de Execução: {time_elapsed}. Tecla algo para continuar...')
             input()
         elif op == 2:
             start_time = time.time()
-            turmas = []
-            periodos = CodebenchExtractor.extract_periodos(dataset_dir)
-            for periodo in periodos:
-                CodebenchExtractor.extract_turmas(periodo)
-                turmas.extend(periodo.turmas)
-            CSVParser.salvar_turmas(turmas)
+            ExtractionPipeline.extract_turmas(dataset_dir)
             time_elapsed = time.strftime('%H:%M:%S', time.gmtime(time.time() - start_time))
             print(f'Tempo Total de Execução: {time_elapsed}. Tecla algo para continuar...')
             input()
         elif op == 3:
             start_time = time.time()
-            atividades = []
-            periodos = CodebenchExtractor.extract_periodos(dataset_dir)
-            for periodo in periodos:
-                CodebenchExtractor.extract_turmas(periodo)
-                for turma in periodo.turmas:
-                    CodebenchExtractor.extract_atividades(turma)
-                    atividades.extend(turma.atividades)
-            CSVParser.salvar_atividades(atividades)
+            ExtractionPipeline.extract_atividades(dataset_dir)
             time_elapsed = time.strftime('%H:%M:%S', time.gmtime(time.time() - start_time))
             print(f'Tempo Total de Execução: {time_elapsed}. Tecla algo para continuar...')
             input()
         elif op == 4:
             start_time = time.time()
-            estudantes = []
-            periodos = CodebenchExtractor.extract_periodos(dataset_dir)
-            for periodo in periodos:
-                CodebenchExtractor.extract_turmas(periodo)
-                for turma in periodo.turmas:
-                    CodebenchExtractor.extract_estudantes(turma)
-                    estudantes.extend(turma.estudantes)
-            CSVParser.salvar_estudantes(estudantes)
+            ExtractionPipeline.extract_estudantes(dataset_dir)
             time_elapsed = time.strftime('%H:%M:%S', time.gmtime(time.time() - start_time))
             print(f'Tempo Total de Execução: {time_elapsed}. Tecla algo para continuar...')
             input()
         elif op == 5:
+            workers = Util.read_workers()
+            resume = ExtractionPipeline.has_checkpoint() and Util.read_resume()
             start_time = time.time()
-            periodos = CodebenchExtractor.extract_periodos(dataset_dir)
-            for periodo in periodos:
-                CodebenchExtractor.extract_turmas(periodo)
-                for turma in periodo.turmas:
-                    CodebenchExtractor.extract_estudantes(turma)
-                    for estudante in turma.estudantes:
-                        CodebenchExtractor.extract_execucoes(estudante)
-                        CSVParser.salvar_execucoes(estudante.execucoes)
+            ExtractionPipeline.extract_execucoes(dataset_dir, workers, resume=resume)
             time_elapsed = time.strftime('%H:%M:%S', time.gmtime(time.time() - start_time))
             print(f'Tempo Total de Execução: {time_elapsed}. Tecla algo para continuar...')
             input()
         elif op == 6:
             solutions_dir = input('Informe o caminho para as soluções dos instrutores: ')
             start_time = time.time()
-            solucoes = CodebenchExtractor.extract_solucoes(solutions_dir)
-            CSVParser.salvar_solucoes(solucoes)
+            ExtractionPipeline.extract_solucoes(solutions_dir)
             time_elapsed = time.strftime('%H:%M:%S', time.gmtime(time.time() - start_time))
             print(f'Tempo Total de Execução: {time_elapsed}. Tecla algo para continuar...')
             input()
@@ -116,6 +101,34 @@ def main():
             time_elapsed = time.strftime('%H:%M:%S', time.gmtime(time.time() - start_time))
             print(f'Tempo Total de Execução: {time_elapsed}. Tecla algo para continuar...')
             input()
+        elif op == 8:
+            workers = Util.read_workers()
+            resume = ExtractionPipeline.has_checkpoint() and Util.read_resume()
+            start_time = time.time()
+            ExtractionPipeline.run(dataset_dir, workers, resume=resume)
+            time_elapsed = time.strftime('%H:%M:%S', time.gmtime(time.time() - start_time))
+            print(f'Tempo Total de Execução: {time_elapsed}. Tecla algo para continuar...')
+            input()
+        elif op == 9:
+            workers = Util.read_workers()
+            resume = ExtractionPipeline.has_checkpoint() and Util.read_resume()
+            start_time = time.time()
+            manifest = ExtractionManifest()
+            ExtractionPipeline.run(dataset_dir, workers, manifest, resume=resume)
+            manifest.close()
+            time_elapsed = time.strftime('%H:%M:%S', time.gmtime(time.time() - start_time))
+            print(f'Tempo Total de Execução: {time_elapsed}. Tecla algo para continuar...')
+            input()
+
+
+def main(argv=None):
+    # com argumentos, executa a linha de comando (não interativa), senão exibe o menu
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        return CommandLine.run(argv, __version__)
+    menu()
+    return CommandLine.SUCESSO
+
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import ast
+import io
+import tokenize
+
+from radon.metrics import h_visit_ast
+from radon.raw import Module, analyze
+from radon.visitors import ComplexityVisitor
+
+try:
+    # função interna do 'radon', pode mudar (ou deixar de existir) em outras versões
+    from radon.raw import _logical
+except ImportError:
+    _logical = None
+
+
+class CodeAnalysis:
+    """
+    Análise de um Código-Fonte Python que lê (parse) o código uma única vez.
+
+    A árvore sintática (AST) e a lista de tokens do código são criadas sob demanda e compartilhadas por todas as
+    métricas: Complexidade (McCabe) e Halstead usam a mesma AST; as Métricas Brutas e a contagem de Tokens
+    (:class:`CodeTokens`) usam a mesma lista de tokens. Os valores calculados são idênticos aos obtidos com as
+    funções 'ComplexityVisitor.from_code', 'h_visit' e 'analyze' do módulo 'radon'.
+
+    Exemplo de uso:
+        analise = CodeAnalysis(codigo)
+        v = analise.complexity()
+        h = analise.halstead()
+        a = analise.raw()
+    """
+
+    # tokens que não são gerados pelo 'radon' ao analisar cada linha isoladamente (sem indentação)
+    __tokens_indentacao = (tokenize.INDENT, tokenize.DEDENT)
+
+    def __init__(self, codigo: str):
+        """
+        Método Construtor.
+
+        :param codigo: O Código-Fonte Python (texto).
+        """
+        self.codigo = codigo
+        self.__tree = None
+        self.__tokens = None
+
+    @property
+    def tree(self):
+        """Árvore sintática (AST) do código, criada uma única vez."""
+        if self.__tree is None:
+            self.__tree = ast.parse(self.codigo)
+        return self.__tree
+
+    @property
+    def tokens(self):
+        """Lista com todos os tokens do código (tokenize.TokenInfo), criada uma única vez."""
+        if self.__tokens is None:
+            self.__tokens = list(tokenize.generate_tokens(io.StringIO(self.codigo).readline))
+        return self.__tokens
+
+    def complexity(self):
+        """Retorna o 'ComplexityVisitor' (radon) do código, equivalente a 'ComplexityVisitor.from_code'."""
+        return ComplexityVisitor.from_ast(self.tree)
+
+    def halstead(self):
+        """Retorna as métricas de Halstead (radon) do código, equivalente a 'h_visit'."""
+        return h_visit_ast(self.tree)
+
+    def raw(self):
+        """
+        Retorna as Métricas Brutas (radon.raw.Module) do código, equivalente a 'radon.raw.analyze'.
+
+        O 'radon' tokeniza novamente cada linha do código, aqui as linhas são agrupadas em linhas lógicas a partir
+        da lista de tokens já existente. Caso o código possua alguma construção que o agrupamento não reproduz
+        fielmente, ou se a versão do 'radon' não possuir as funções internas usadas no agrupamento, as métricas são
+        calculadas pelo próprio 'radon'.
+        """
+        try:
+            module = self.__raw_from_tokens() if _logical is not None else None
+        except (AttributeError, TypeError):
+            # a API interna do 'radon' mudou (ex.: outros campos no 'Module' ou outra assinatura do '_logical')
+            module = None
+        if module is None:
+            return analyze(self.codigo)
+        return module
+
+    def __raw_from_tokens(self):
+        """
+        Calcula as Métricas Brutas a partir da lista de tokens, reproduzindo o algoritmo do 'radon.raw.analyze'.
+
+        :return: As métricas (radon.raw.Module) ou None, se o código não puder ser analisado desta forma.
+        """
+        lines = [line.strip() for line in self.codigo.splitlines()]
+        # 'splitlines' também quebra as linhas em caracteres que o tokenize não considera quebra de linha
+        if len(lines) != self.codigo.count('\n') + (0 if not self.codigo or self.codigo.endswith('\n') else 1):
+            return None
+
+        lloc = comments = single_comments = multi = blank = sloc = 0
+        next_row = 1
+        group = []
+        # verdadeiro enquanto a linha lógica atual possuir apenas comentários
+        so_comentarios = True
+        for token in self.tokens:
+            if token.type in CodeAnalysis.__tokens_indentacao:
+                continue
+            if token.type == tokenize.ENDMARKER:
+                break
+            if token.type == tokenize.ERRORTOKEN:
+                return None
+            group.append(token)
+            # uma linha lógica termina num NEWLINE, linhas vazias ou só com comentários terminam num NL
+            if token.type == tokenize.NEWLINE or (token.type == tokenize.NL and so_comentarios):
+                start_row, end_row = group[0].start[0], token.end[0]
+                if start_row != next_row:
+                    return None
+                parsed_lines = lines[start_row - 1:end_row]
+                next_row = end_row + 1
+                # o radon sempre termina a lista de tokens de uma linha lógica com um ENDMARKER
+                group.append(tokenize.TokenInfo(tokenize.ENDMARKER, '', token.end, token.end, ''))
+
+                comments += sum(1 for t in group if t.type == tokenize.COMMENT)
+                if CodeAnalysis.__is_single_token(tokenize.COMMENT, group):
+                    single_comments += 1
+                elif CodeAnalysis.__is_single_token(tokenize.STRING, group):
+                    if group[0].start[0] == group[0].end[0]:
+                        single_comments += 1
+                    else:
+                        multi += sum(1 for line in parsed_lines if line)
+                        blank += sum(1 for line in parsed_lines if not line)
+                else:
+                    for parsed_line in parsed_lines:
+                        if parsed_line:
+                            sloc += 1
+                        else:
+                            blank += 1
+                lloc += _logical(group)
+                group = []
+                so_comentarios = True
+            elif token.type != tokenize.COMMENT:
+                so_comentarios = False
+
+        if group or next_row != len(lines) + 1:
+            return None
+
+        loc = sloc + blank + multi + single_comments
+        return Module(loc, lloc, sloc, comments, multi, blank, single_comments)
+
+    @staticmethod
+    def __is_single_token(token_type: int, tokens):
+        """Verifica se a linha lógica possui um único token do tipo informado, seguido apenas de quebras de linha."""
+        return tokens[0].type == token_type and all(
+            t.type in (tokenize.ENDMARKER, tokenize.NL, tokenize.NEWLINE) for t in tokens[1:])
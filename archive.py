@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import io
+import os
+import tarfile
+import threading
+import time
+import zipfile
+
+from catalog import CatalogEntry
+from util import Logger
+
+
+class DatasetArchive:
+    """
+    Leitura do dataset Codebench diretamente do arquivo compactado ('.zip', '.tar' ou '.tar.gz') distribuído, sem
+    descompactá-lo em disco.
+
+    Ao abrir o arquivo, os seus membros são listados uma única vez (no '.zip' pelo diretório central, no '.tar.gz' por
+    uma leitura sequencial do arquivo) e organizados por diretório, na ordem em que aparecem no arquivo. Definido no
+    extrator ('CodebenchExtractor.set_archive'), substitui as listagens dos diretórios, as verificações de existência
+    e as leituras dos arquivos, assim os Períodos, Turmas, Estudantes e Execuções são processados na ordem do arquivo
+    compactado. O dataset é acessado por um caminho virtual: o caminho do arquivo compactado seguido dos diretórios
+    do dataset (ex.: 'cb_dataset_v1.11.zip/2019-1/123/users/456').
+
+    O '.tar.gz' não permite acesso aleatório aos membros, por isso é lido como um fluxo que apenas avança: os arquivos
+    de cada Estudante são lidos juntos ('read_tree'), numa única passagem, e os arquivos pequenos lidos antes deles
+    (as Atividades e os 'user.data') são guardados em memória na listagem. Um membro anterior à posição atual do fluxo
+    exige uma nova leitura do arquivo desde o início, registrada no log.
+
+    Exemplo de uso:
+        arquivo = DatasetArchive('cb_dataset_v1.11.tar.gz')
+        CodebenchExtractor.set_archive(arquivo)
+        ExtractionPipeline.run(arquivo.raiz)
+        arquivo.close()
+    """
+
+    FORMATOS = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+    def __init__(self, path: str):
+        """
+        Método Construtor.
+
+        :param path: Caminho do arquivo compactado do dataset.
+        """
+        self.path = os.path.abspath(path)
+        # o dataset é acessado pelo caminho do próprio arquivo compactado
+        self.raiz = self.path
+        self.zip = self.path.lower().endswith('.zip')
+        # diretório (relativo) -> lista das entradas, na ordem do arquivo compactado
+        self.__diretorios = {}
+        # diretório (relativo) -> {nome: entrada}, criado apenas quando a existência de um arquivo é consultada
+        self.__nomes = {}
+        # arquivo (relativo) -> membro do '.zip' ou posição do membro no '.tar'
+        self.__membros = {}
+        # conteúdo dos arquivos pequenos lidos fora da ordem (apenas no '.tar'), e dos arquivos do Estudante atual
+        self.__metadados = {}
+        self.__conteudos = {}
+        # arquivo aberto neste processo ('zipfile.ZipFile' ou fluxo 'tarfile.TarFile') e a posição do fluxo
+        self.__arquivo = None
+        self.__pid = None
+        self.__posicao = 0
+        self.__lock = threading.Lock()
+        self.releituras = 0
+
+        inicio = time.time()
+        membros = self.__list_zip() if self.zip else self.__list_tar()
+        self.__index(membros)
+        Logger.info('Arquivo compactado do dataset listado: %d arquivos em %.1f s (%s)', len(self.__membros),
+                    time.time() - inicio, self.path)
+
+    def __getstate__(self):
+        # o arquivo aberto não é enviado aos processos de trabalho, cada processo o abre novamente se necessário
+        estado = self.__dict__.copy()
+        estado['_DatasetArchive__arquivo'] = None
+        estado['_DatasetArchive__pid'] = None
+        estado['_DatasetArchive__lock'] = None
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__membros)
+
+    @staticmethod
+    def is_archive(path: str):
+        """Verifica se o caminho é um arquivo compactado suportado ('.zip', '.tar', '.tar.gz' ou '.tgz')."""
+        return os.path.isfile(path) and path.lower().endswith(DatasetArchive.FORMATOS)
+
+    @staticmethod
+    def __partes(nome: str):
+        """Divide o nome de um membro do arquivo compactado nos nomes dos seus diretórios e arquivo."""
+        return [parte for parte in nome.replace('\\', '/').split('/') if parte and parte != '.']
+
+    @staticmethod
+    def __metadado(partes):
+        """Verifica se o membro é um arquivo de Atividade ou 'user.data', lidos antes dos arquivos dos Estudantes."""
+        return (len(partes) >= 4 and partes[-2] == 'assessments' and partes[-1].endswith('.data')) or \
+            (len(partes) >= 5 and partes[-3] == 'users' and partes[-1] == 'user.data')
+
+    def __list_zip(self):
+        """Lista os membros do '.zip' pelo diretório central, retornando (partes, pasta, tamanho, mtime, membro)."""
+        membros = []
+        for info in self.__open().infolist():
+            mtime = int(time.mktime(info.date_time + (0, 0, -1))) * 1000000000
+            membros.append((DatasetArchive.__partes(info.filename), info.is_dir(), info.file_size, mtime, info))
+        return membros
+
+    def __list_tar(self):
+        """
+        Lista os membros do '.tar' numa leitura sequencial, retornando (partes, pasta, tamanho, mtime, posição). O
+        conteúdo das Atividades e dos 'user.data' é guardado em memória, pois eles são lidos antes dos demais arquivos.
+        """
+        membros = []
+        with tarfile.open(self.path, 'r|*') as tar:
+            posicao = 0
+            while True:
+                membro = tar.next()
+                if membro is None:
+                    break
+                # no modo de fluxo o 'tarfile' guarda todos os membros lidos, que não são usados aqui
+                tar.members = []
+                if membro.isfile() or membro.isdir():
+                    partes = DatasetArchive.__partes(membro.name)
+                    membros.append((partes, membro.isdir(), membro.size, int(membro.mtime) * 1000000000, posicao))
+                    if membro.isfile() and DatasetArchive.__metadado(partes):
+                        self.__metadados[os.path.join(*partes)] = tar.extractfile(membro).read()
+                posicao += 1
+        return membros
+
+    @staticmethod
+    def __prefixo(membros):
+        """
+        Localiza o diretório do dataset dentro do arquivo compactado (ex.: 'cb_dataset_v1.11/'), isto é, o diretório
+        dos Períodos: dois níveis acima do primeiro diretório 'users' ou 'assessments' encontrado.
+        """
+        for partes, *_ in membros:
+            for i in range(2, len(partes) - 1):
+                if partes[i] in ('users', 'assessments'):
+                    return partes[:i - 2]
+        return []
+
+    def __index(self, membros):
+        """Organiza os membros do arquivo compactado nas entradas de cada diretório, na ordem do arquivo."""
+        prefixo = DatasetArchive.__prefixo(membros)
+        pastas = {''}
+        self.__diretorios[''] = []
+        metadados = {}
+        for partes, pasta, tamanho, mtime, membro in membros:
+            if partes[:len(prefixo)] != prefixo:
+                continue
+            partes = partes[len(prefixo):]
+            if not partes:
+                continue
+            # os diretórios podem não estar registrados no arquivo compactado, são criados a partir dos caminhos
+            for i in range(1, len(partes) + (1 if pasta else 0)):
+                diretorio = os.path.join(*partes[:i])
+                if diretorio not in pastas:
+                    pastas.add(diretorio)
+                    self.__diretorios.setdefault(diretorio, [])
+                    self.__diretorios.setdefault(os.path.join(*partes[:i - 1]) if i > 1 else '', []).append(
+                        CatalogEntry(partes[i - 1], None, 'pasta', True, None, None))
+            if pasta:
+                continue
+            relativo = os.path.join(*partes)
+            if relativo in self.__membros:
+                continue
+            self.__diretorios.setdefault(os.path.dirname(relativo), []).append(
+                CatalogEntry(partes[-1], None, 'arquivo', False, tamanho, mtime))
+            self.__membros[relativo] = membro
+            conteudo = self.__metadados.get(os.path.join(*prefixo, relativo))
+            if conteudo is not None:
+                metadados[relativo] = conteudo
+        self.__metadados = metadados
+
+    def __open(self):
+        """Retorna o arquivo compactado aberto neste processo ('fork' não compartilha a posição de leitura)."""
+        if self.__arquivo is None or self.__pid != os.getpid():
+            if self.zip:
+                self.__arquivo = zipfile.ZipFile(self.path)
+            else:
+                self.__arquivo = tarfile.open(self.path, 'r|*')
+                self.__posicao = 0
+            self.__pid = os.getpid()
+        return self.__arquivo
+
+    def __relativo(self, path: str):
+        """Retorna o caminho relativo ao dataset, ou None se o caminho está fora do arquivo compactado."""
+        relativo = os.path.relpath(path, self.raiz)
+        if relativo == os.curdir:
+            return ''
+        if relativo == os.pardir or relativo.startswith(os.pardir + os.sep):
+            return None
+        return relativo
+
+    def scandir(self, path: str):
+        """
+        Retorna as entradas de um diretório, na ordem do arquivo compactado, com o caminho 'path' de cada uma.
+
+        :param path: Caminho (virtual) do diretório.
+        :return: Lista de :class:`CatalogEntry`, ou None se o diretório está fora do arquivo compactado.
+        :raises FileNotFoundError: Se o diretório não existe no arquivo compactado.
+        """
+        relativo = self.__relativo(path)
+        if relativo is None:
+            return None
+        entradas = self.__diretorios.get(relativo)
+        if entradas is None:
+            raise FileNotFoundError(f'Diretório não encontrado no arquivo compactado: {path}')
+        for entrada in entradas:
+            entrada.path = os.path.join(path, entrada.name)
+        return entradas
+
+    def entry(self, path: str):
+        """
+        Retorna a entrada de um arquivo ou diretório do arquivo compactado.
+
+        :param path: Caminho (virtual) do arquivo ou diretório.
+        :return: A :class:`CatalogEntry`, False se o arquivo não existe, ou None se está fora do arquivo compactado.
+        """
+        diretorio, nome = os.path.split(path)
+        relativo = self.__relativo(diretorio)
+        if relativo is None:
+            return None
+        nomes = self.__nomes.get(relativo)
+        if nomes is None:
+            nomes = self.__nomes[relativo] = {e.name: e for e in self.__diretorios.get(relativo, ())}
+        return nomes.get(nome, False)
+
+    def exists(self, path: str):
+        """Verifica se um arquivo ou diretório existe, consultando o sistema de arquivos apenas fora do dataset."""
+        entrada = self.entry(path)
+        if entrada is None:
+            return os.path.exists(path)
+        return entrada is not False
+
+    def read(self, path: str):
+        """
+        Lê o conteúdo de um arquivo do dataset.
+
+        :param path: Caminho (virtual) do arquivo.
+        :return: O conteúdo do arquivo (bytes).
+        :raises FileNotFoundError: Se o arquivo não existe no arquivo compactado.
+        """
+        relativo = self.__relativo(path)
+        if relativo is None or relativo not in self.__membros:
+            raise FileNotFoundError(f'Arquivo não encontrado no arquivo compactado: {path}')
+        conteudo = self.__conteudos.get(relativo)
+        if conteudo is None:
+            conteudo = self.__metadados.get(relativo)
+        if conteudo is None:
+            conteudo = self.__read_members([relativo])[relativo]
+        return conteudo
+
+    def open(self, path: str, mode: str = 'rb', encoding: str = None):
+        """
+        Abre um arquivo do dataset para leitura, como a função 'open' ('rb' ou 'r' com a codificação informada).
+
+        :param path: Caminho (virtual) do arquivo, ou um caminho fora do arquivo compactado (aberto com 'open').
+        :param mode: Modo de leitura ('rb' ou 'r').
+        :param encoding: Codificação do texto, no modo 'r'.
+        :return: O arquivo aberto.
+        """
+        if self.__relativo(path) is None:
+            return open(path, mode, encoding=encoding)
+        f = io.BytesIO(self.read(path))
+        return f if 'b' in mode else io.TextIOWrapper(f, encoding=encoding)
+
+    def read_tree(self, path: str):
+        """
+        Lê todos os arquivos de um diretório (e sub-diretórios) numa única passagem, na ordem do arquivo compactado.
+
+        :param path: Caminho (virtual) do diretório, ex.: o diretório de um Estudante.
+        :return: Dicionário com o caminho relativo ao dataset e o conteúdo (bytes) de cada arquivo, que pode ser
+            enviado a um processo de trabalho e definido com 'set_contents'.
+        """
+        relativo = self.__relativo(path)
+        if relativo is None:
+            return {}
+        arquivos, diretorios = [], [relativo]
+        while diretorios:
+            diretorio = diretorios.pop()
+            for entrada in self.__diretorios.get(diretorio, ()):
+                (diretorios if entrada.is_dir() else arquivos).append(os.path.join(diretorio, entrada.name))
+        return self.__read_members(arquivos)
+
+    def set_contents(self, conteudos):
+        """
+        Define o conteúdo dos arquivos já lidos com 'read_tree', consultados antes do arquivo compactado. Apenas os
+        conteúdos do último diretório definido são mantidos.
+
+        :param conteudos: Dicionário retornado por 'read_tree', ou None para descartá-los.
+        """
+        self.__conteudos = conteudos or {}
+
+    def __read_members(self, relativos):
+        """Lê o conteúdo dos membros informados, na ordem do arquivo compactado."""
+        with self.__lock:
+            arquivo = self.__open()
+            if self.zip:
+                # os membros são lidos na ordem em que estão gravados no arquivo, isto é, sequencialmente
+                relativos = sorted(relativos, key=lambda relativo: self.__membros[relativo].header_offset)
+                return {relativo: arquivo.read(self.__membros[relativo]) for relativo in relativos}
+
+            # o '.tar' é lido como um fluxo, até o último membro solicitado
+            posicoes = {self.__membros[relativo]: relativo for relativo in relativos}
+            if not posicoes:
+                return {}
+            if min(posicoes) < self.__posicao:
+                self.releituras += 1
+                Logger.warn('Membro anterior à posição de leitura, o arquivo compactado será lido novamente desde o '
+                            'início (%d): %s', self.releituras, posicoes[min(posicoes)])
+                arquivo.close()
+                self.__arquivo = None
+                arquivo = self.__open()
+            conteudos = {}
+            ultima = max(posicoes)
+            while self.__posicao <= ultima:
+                membro = arquivo.next()
+                if membro is None:
+                    break
+                arquivo.members = []
+                relativo = posicoes.get(self.__posicao)
+                self.__posicao += 1
+                if relativo is not None:
+                    conteudos[relativo] = arquivo.extractfile(membro).read()
+            return conteudos
+
+    def close(self):
+        """Fecha o arquivo compactado."""
+        if self.__arquivo is not None and self.__pid == os.getpid():
+            self.__arquivo.close()
+        self.__arquivo = None
+        self.__conteudos = {}
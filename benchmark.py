@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from csv_parser import CSVParser
+from extractor import CodebenchExtractor
+from model import *
+from pipeline import ExtractionPipeline
+from util import Logger
+
+
+class ExtractionBenchmark:
+    """
+    Mede o desempenho de cada etapa da extração sobre um dataset (real ou gerado pelo :class:`SyntheticDataset`).
+
+    Cada etapa é executada isoladamente sobre todos os arquivos do dataset, na mesma forma usada pelo extrator:
+        - walk: varredura dos diretórios dos Estudantes (users, executions, codemirror e codes).
+        - user.data: leitura dos questionários dos Estudantes.
+        - logs: leitura dos logs de Execuções (inclui as métricas dos códigos das Submissões corretas).
+        - intervalos: cálculo dos tempos de implementação e interação a partir dos logs do CodeMirror.
+        - metricas: métricas de código (radon) dos Códigos-Fonte.
+        - tokens: contagem dos tokens dos Códigos-Fonte.
+        - csv: escrita das linhas dos Estudantes, Execuções e Erros nos arquivos '.csv'.
+        - pipeline: extração completa ('ExtractionPipeline.run'), do início ao fim.
+
+    Para cada etapa são informados a quantidade de itens (arquivos, ou linhas na escrita dos '.csv'), os bytes lidos
+    ou escritos, o tempo e as taxas em itens/s e MB/s. O cache de métricas é desativado durante as medições e os
+    arquivos '.csv' são gerados num diretório temporário, removido ao final.
+
+    Exemplo de uso:
+        resultados = ExtractionBenchmark.run('cb_sintetico/')
+        ExtractionBenchmark.save(resultados, 'benchmark.json')
+    """
+
+    ETAPAS = ('walk', 'user.data', 'logs', 'intervalos', 'metricas', 'tokens', 'csv', 'pipeline')
+
+    @staticmethod
+    def __private(nome: str):
+        """Retorna um método privado do :class:`CodebenchExtractor`, para que a etapa seja medida isoladamente."""
+        return getattr(CodebenchExtractor, f'_CodebenchExtractor__{nome}')
+
+    @staticmethod
+    def __result(etapa: str, itens: int, tamanho: int, segundos: float):
+        """Monta o resultado da medição de uma etapa."""
+        return {
+            'etapa': etapa,
+            'itens': itens,
+            'bytes': tamanho,
+            'segundos': round(segundos, 6),
+            'itens_s': round(itens / segundos, 2) if segundos > 0 else None,
+            'mb_s': round(tamanho / 1024 / 1024 / segundos, 3) if segundos > 0 and tamanho else None,
+        }
+
+    @staticmethod
+    def run(dataset_dir: str, etapas=ETAPAS, workers: int = 1):
+        """
+        Mede as etapas da extração sobre o dataset.
+
+        :param dataset_dir: Caminho para o diretório do dataset.
+        :param etapas: Etapas medidas (ver 'ETAPAS'), a varredura (walk) é sempre executada.
+        :param workers: Quantidade de processos usados na etapa 'pipeline'.
+        :return: Lista com o resultado de cada etapa medida.
+        """
+        invalidas = set(etapas) - set(ExtractionBenchmark.ETAPAS)
+        if invalidas:
+            raise ValueError(f"Etapa(s) inválida(s): {', '.join(sorted(invalidas))}")
+
+        cache = CodebenchExtractor.get_cache()
+        CodebenchExtractor.set_cache(None)
+        output_dir = CSVParser.get_output_dir()
+        temporario = tempfile.mkdtemp(prefix='cb_benchmark_')
+        resultados = []
+        try:
+            # as Turmas e Atividades são necessárias em todas as etapas, e não são medidas
+            turmas = [turma for periodo in CodebenchExtractor.extract_periodos(dataset_dir)
+                      for turma in CodebenchExtractor.iter_turmas(periodo)]
+
+            inicio = time.perf_counter()
+            estudantes, arquivos, entradas = ExtractionBenchmark.__walk(turmas)
+            resultados.append(ExtractionBenchmark.__result('walk', entradas, 0, time.perf_counter() - inicio))
+
+            execucoes = [(estudante, path) for estudante in estudantes for path in arquivos[estudante]['executions']
+                         if path.endswith('.log')]
+            if 'user.data' in etapas:
+                resultados.append(ExtractionBenchmark.__user_data(estudantes))
+            if 'logs' in etapas or 'intervalos' in etapas or 'csv' in etapas:
+                resultado, execucoes = ExtractionBenchmark.__logs(execucoes)
+                if 'logs' in etapas:
+                    resultados.append(resultado)
+            if 'intervalos' in etapas:
+                resultados.append(ExtractionBenchmark.__intervalos(execucoes, arquivos))
+            if 'metricas' in etapas or 'tokens' in etapas:
+                codigos = ExtractionBenchmark.__read_codes(estudantes, arquivos)
+                for etapa, metodo in (('metricas', 'extract_code_metrics'), ('tokens', 'extract_code_tokens')):
+                    if etapa in etapas:
+                        resultados.append(ExtractionBenchmark.__codes(etapa, metodo, codigos))
+            if 'csv' in etapas:
+                resultados.append(ExtractionBenchmark.__csv(estudantes, execucoes, temporario))
+            if 'pipeline' in etapas:
+                resultados.append(ExtractionBenchmark.__pipeline(dataset_dir, workers, len(execucoes),
+                                                                 os.path.join(temporario, 'pipeline')))
+        finally:
+            CSVParser.set_output_dir(output_dir)
+            CodebenchExtractor.set_cache(cache)
+            shutil.rmtree(temporario, ignore_errors=True)
+
+        ExtractionBenchmark.report(resultados)
+        return resultados
+
+    @staticmethod
+    def __walk(turmas):
+        """
+        Percorre os diretórios dos Estudantes de cada Turma, da mesma forma que o extrator.
+
+        :return: Tupla com os Estudantes, os caminhos dos seus arquivos por sub-diretório e a quantidade de entradas
+            (arquivos e diretórios) percorridas.
+        """
+        estudantes, arquivos, entradas = [], {}, 0
+        for turma in turmas:
+            with os.scandir(os.path.join(turma.path, 'users')) as pastas:
+                for pasta in pastas:
+                    entradas += 1
+                    if not pasta.is_dir():
+                        continue
+                    estudante = Estudante(turma.periodo, turma, int(pasta.name), pasta.path)
+                    estudantes.append(estudante)
+                    arquivos[estudante] = {}
+                    for diretorio in ('executions', 'codemirror', 'codes'):
+                        caminhos = []
+                        path = os.path.join(pasta.path, diretorio)
+                        if os.path.isdir(path):
+                            with os.scandir(path) as entries:
+                                for entry in entries:
+                                    entradas += 1
+                                    if entry.is_file():
+                                        caminhos.append(entry.path)
+                        arquivos[estudante][diretorio] = caminhos
+        return estudantes, arquivos, entradas
+
+    @staticmethod
+    def __user_data(estudantes):
+        """Mede a leitura dos questionários (user.data) dos Estudantes."""
+        extrair = ExtractionBenchmark.__private('extract_estudante_info_from_file')
+        paths = [os.path.join(estudante.path, 'user.data') for estudante in estudantes]
+        tamanho = sum(os.path.getsize(path) for path in paths if os.path.isfile(path))
+        inicio = time.perf_counter()
+        for estudante, path in zip(estudantes, paths):
+            if os.path.isfile(path):
+                extrair(path, estudante)
+        return ExtractionBenchmark.__result('user.data', len(paths), tamanho, time.perf_counter() - inicio)
+
+    @staticmethod
+    def __logs(execucoes):
+        """
+        Mede a leitura dos logs de Execuções.
+
+        :return: Tupla com o resultado da etapa e a lista (Execução, caminho do log) das Execuções lidas.
+        """
+        extrair = ExtractionBenchmark.__private('extract_executions_count')
+        atividades = {}
+        lidas = []
+        tamanho = sum(os.path.getsize(path) for _, path in execucoes)
+        inicio = time.perf_counter()
+        for estudante, path in execucoes:
+            turma = estudante.turma
+            if turma not in atividades:
+                atividades[turma] = {a.codigo: a for a in turma.atividades}
+            atividade_code, exercicio_code, *_ = os.path.splitext(os.path.basename(path))[0].split('_')
+            execucao = Execucao(turma.periodo, turma, estudante, atividades[turma].get(atividade_code),
+                                int(exercicio_code))
+            extrair(path, execucao)
+            lidas.append((execucao, path))
+        return ExtractionBenchmark.__result('logs', len(execucoes), tamanho, time.perf_counter() - inicio), lidas
+
+    @staticmethod
+    def __intervalos(execucoes, arquivos):
+        """Mede o cálculo dos tempos de implementação e interação a partir dos logs do CodeMirror."""
+        extrair = ExtractionBenchmark.__private('extract_solution_interval')
+        pares = []
+        for execucao, path in execucoes:
+            codemirror = os.path.join(execucao.estudante.path, 'codemirror', os.path.basename(path))
+            if execucao.atividade is not None and os.path.isfile(codemirror):
+                pares.append((execucao, codemirror))
+        tamanho = sum(os.path.getsize(path) for _, path in pares)
+        inicio = time.perf_counter()
+        for execucao, path in pares:
+            extrair(path, execucao)
+        return ExtractionBenchmark.__result('intervalos', len(pares), tamanho, time.perf_counter() - inicio)
+
+    @staticmethod
+    def __read_codes(estudantes, arquivos):
+        """Lê os Códigos-Fonte dos Estudantes, cuja leitura não faz parte das etapas de métricas e tokens."""
+        ler = ExtractionBenchmark.__private('read_source')
+        return [ler(path) for estudante in estudantes for path in arquivos[estudante]['codes']
+                if path.endswith('.py')]
+
+    @staticmethod
+    def __codes(etapa: str, metodo: str, codigos):
+        """Mede a extração das métricas ou dos tokens de cada Código-Fonte, a partir do texto já lido."""
+        extrair = ExtractionBenchmark.__private(metodo)
+        tamanho = sum(len(codigo.encode('utf-8')) for codigo in codigos)
+        inicio = time.perf_counter()
+        for codigo in codigos:
+            try:
+                extrair(codigo)
+            except Exception:
+                # códigos inválidos também são descartados pelo extrator
+                pass
+        return ExtractionBenchmark.__result(etapa, len(codigos), tamanho, time.perf_counter() - inicio)
+
+    @staticmethod
+    def __csv(estudantes, execucoes, output_dir: str):
+        """Mede a conversão em linhas e a escrita dos Estudantes, Execuções e Erros nos arquivos '.csv'."""
+        CSVParser.set_output_dir(os.path.join(output_dir, 'csv'))
+        CSVParser.create_output_dir()
+        CSVParser.reset_output_files()
+        inicio = time.perf_counter()
+        CSVParser.salvar_estudantes(estudantes, append=True)
+        execucoes, erros = ExtractionPipeline.rows(execucao for execucao, _ in execucoes)
+        CSVParser.salvar_execucoes_rows(execucoes)
+        CSVParser.salvar_erros_rows(erros)
+        tamanho = sum(CSVParser.sync_output_files().values())
+        CSVParser.close_writers()
+        linhas = len(estudantes) + len(execucoes) + len(erros)
+        return ExtractionBenchmark.__result('csv', linhas, tamanho, time.perf_counter() - inicio)
+
+    @staticmethod
+    def __pipeline(dataset_dir: str, workers: int, quantidade: int, output_dir: str):
+        """Mede a extração completa do dataset, informando a quantidade de logs de Execuções processados."""
+        CSVParser.set_output_dir(output_dir)
+        CSVParser.create_output_dir()
+        inicio = time.perf_counter()
+        ExtractionPipeline.run(dataset_dir, workers)
+        segundos = time.perf_counter() - inicio
+        tamanho = sum(CSVParser.sync_output_files().values())
+        return ExtractionBenchmark.__result('pipeline', quantidade, tamanho, segundos)
+
+    @staticmethod
+    def report(resultados):
+        """Exibe (log) uma tabela com o resultado de cada etapa."""
+        Logger.info(f"{'etapa':<12}{'itens':>10}{'MB':>10}{'segundos':>12}{'itens/s':>12}{'MB/s':>10}")
+        for r in resultados:
+            itens_s = '-' if r['itens_s'] is None else f"{r['itens_s']:.1f}"
+            mb_s = '-' if r['mb_s'] is None else f"{r['mb_s']:.2f}"
+            Logger.info(f"{r['etapa']:<12}{r['itens']:>10}{r['bytes'] / 1024 / 1024:>10.2f}"
+                        f"{r['segundos']:>12.3f}{itens_s:>12}{mb_s:>10}")
+
+    @staticmethod
+    def save(resultados, path: str):
+        """
+        Salva o resultado das etapas num arquivo JSON, para comparação entre versões do extrator.
+
+        :param resultados: Resultados retornados por 'run'.
+        :param path: Caminho do arquivo JSON.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'data': time.strftime('%Y-%m-%d %H:%M:%S'), 'etapas': resultados}, f, indent=2)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+
+from util import Logger
+
+
+class MetricsCache:
+    """
+    Cache persistente (em disco) das métricas (:class:`Metricas`) e tokens (:class:`CodeTokens`) dos códigos-fonte.
+
+    Os valores são indexados pelo hash do código-fonte, assim códigos idênticos (de estudantes diferentes ou de
+    extrações anteriores) são analisados uma única vez. O cache é limitado a uma quantidade máxima de entradas,
+    descartando as menos usadas recentemente (LRU) quando o limite é ultrapassado.
+
+    Exemplo de uso:
+        cache = MetricsCache()
+        metricas = cache.get('metricas', codigo)
+        if metricas is None:
+            metricas = ...
+            cache.put('metricas', codigo, metricas)
+    """
+
+    # versão do formato dos valores salvos, deve ser incrementada sempre que a extração de métricas/tokens mudar
+    __versao = 2
+    # a cada quantas inserções o limite de entradas é verificado
+    __intervalo_limpeza = 1000
+
+    def __init__(self, path: str = os.path.join(os.getcwd(), 'cache', 'metricas.db'), max_entries: int = 500000):
+        """
+        Método Construtor.
+
+        :param path: Caminho do arquivo do banco de dados (SQLite) do cache.
+        :param max_entries: Quantidade máxima de entradas mantidas no cache.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.__conn = None
+        self.__pid = None
+        self.__insercoes = 0
+
+    def __getstate__(self):
+        # a conexão com o banco não pode ser enviada para outros processos, cada processo abre a sua
+        state = self.__dict__.copy()
+        state['_MetricsCache__conn'] = None
+        state['_MetricsCache__pid'] = None
+        return state
+
+    def __connection(self):
+        """Retorna a conexão com o banco de dados do cache, abrindo uma nova em cada processo."""
+        if self.__conn is None or self.__pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.__conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self.__conn.execute('PRAGMA journal_mode=WAL')
+            self.__conn.execute('PRAGMA synchronous=NORMAL')
+            self.__conn.execute('CREATE TABLE IF NOT EXISTS cache ('
+                                'chave BLOB PRIMARY KEY, valor BLOB NOT NULL, acesso INTEGER NOT NULL)')
+            self.__conn.execute('CREATE INDEX IF NOT EXISTS cache_acesso ON cache (acesso)')
+            self.__pid = os.getpid()
+        return self.__conn
+
+    @staticmethod
+    def __key(kind: str, codigo):
+        """Calcula a chave de uma entrada a partir do tipo do valor e do hash do código-fonte (texto ou bytes)."""
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f'{MetricsCache.__versao}:{kind}:'.encode('utf-8'))
+        if isinstance(codigo, str):
+            codigo = codigo.encode('utf-8', 'surrogatepass')
+        h.update(codigo)
+        return h.digest()
+
+    def get(self, kind: str, codigo):
+        """
+        Recupera um valor do cache.
+
+        :param kind: Tipo do valor ('metricas' ou 'tokens').
+        :param codigo: Código-fonte (texto ou bytes) do qual o valor foi extraído.
+        :return: O valor salvo ou None, caso o código ainda não esteja no cache.
+        """
+        try:
+            conn = self.__connection()
+            key = MetricsCache.__key(kind, codigo)
+            row = conn.execute('SELECT valor FROM cache WHERE chave = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE cache SET acesso = ? WHERE chave = ?', (time.time_ns(), key))
+        except sqlite3.Error as e:
+            # uma falha no cache não deve interromper a extração, o valor é apenas recalculado
+            Logger.warn(f'Erro ao consultar o cache de métricas, {str(e)}: {self.path}')
+            return None
+        try:
+            return pickle.loads(row[0])
+        except Exception as e:
+            # um valor salvo por outra versão das classes (ex.: do radon) pode lançar AttributeError,
+            # ModuleNotFoundError, TypeError, etc., e é tratado como ausente no cache
+            Logger.warn(f'Valor inválido no cache de métricas, será recalculado ({type(e).__name__}: {e}): {self.path}')
+            return None
+
+    def put(self, kind: str, codigo, valor):
+        """
+        Salva um valor no cache.
+
+        :param kind: Tipo do valor ('metricas' ou 'tokens').
+        :param codigo: Código-fonte (texto ou bytes) do qual o valor foi extraído.
+        :param valor: O valor (Metricas ou CodeTokens) a ser salvo.
+        """
+        try:
+            conn = self.__connection()
+            conn.execute('INSERT OR REPLACE INTO cache (chave, valor, acesso) VALUES (?, ?, ?)',
+                         (MetricsCache.__key(kind, codigo), pickle.dumps(valor, pickle.HIGHEST_PROTOCOL),
+                          time.time_ns()))
+            self.__insercoes += 1
+            if self.__insercoes % MetricsCache.__intervalo_limpeza == 0:
+                self.evict()
+        except sqlite3.Error as e:
+            Logger.warn(f'Erro ao salvar no cache de métricas, {str(e)}: {self.path}')
+
+    def evict(self):
+        """Remove as entradas menos usadas recentemente, até que o cache respeite a quantidade máxima de entradas."""
+        conn = self.__connection()
+        excesso = conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0] - self.max_entries
+        if excesso > 0:
+            conn.execute('DELETE FROM cache WHERE chave IN (SELECT chave FROM cache ORDER BY acesso LIMIT ?)',
+                         (excesso,))
+
+    def close(self):
+        """Aplica o limite de entradas e fecha a conexão com o banco de dados do cache."""
+        if self.__conn is not None and self.__pid == os.getpid():
+            self.evict()
+            self.__conn.close()
+        self.__conn = None
+        self.__pid = None
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import os
+import sqlite3
+import time
+from util import Logger
+from walker import ParallelWalker
+
+
+class CatalogEntry:
+    """
+    Entrada (arquivo ou diretório) do :class:`DatasetCatalog`.
+
+    Expõe os mesmos atributos e métodos de um :class:`os.DirEntry` usados pelo extrator ('name', 'path', 'is_dir',
+    'is_file' e 'stat'), assim pode substituir as entradas do 'os.scandir' sem novas consultas ao sistema de arquivos.
+    """
+
+    __slots__ = ('name', 'path', 'tipo', 'st_size', 'st_mtime_ns', '__pasta')
+
+    def __init__(self, name: str, path: str, tipo: str, pasta: bool, tamanho: int, mtime: int):
+        self.name = name
+        self.path = path
+        self.tipo = tipo
+        self.st_size = tamanho
+        self.st_mtime_ns = mtime
+        self.__pasta = pasta
+
+    def is_dir(self):
+        return self.__pasta
+
+    def is_file(self):
+        return not self.__pasta
+
+    def stat(self):
+        """Retorna a própria entrada, que possui os atributos 'st_size' e 'st_mtime_ns' salvos no catálogo."""
+        return self
+
+
+class DatasetCatalog:
+    """
+    Catálogo (índice) dos diretórios e arquivos do dataset Codebench lidos pelo extrator.
+
+    O dataset é percorrido uma única vez ('build'), listando vários diretórios em paralelo (threads, pois a varredura
+    é limitada pela latência das consultas de metadados, ex.: num dataset montado via NFS), e cada entrada é
+    registrada com o seu tipo, os códigos do Período, Turma, Estudante, Atividade e Exercício, o tamanho e a data de
+    modificação (mtime).
+    O catálogo é salvo num banco de dados SQLite e, definido no extrator ('CodebenchExtractor.set_catalog'), substitui
+    as listagens dos diretórios ('os.scandir') e as verificações de existência dos arquivos, na mesma ordem em que
+    foram encontradas na varredura. Assim a extração a partir do catálogo gera os mesmos arquivos '.csv'.
+
+    As entradas são salvas com o caminho relativo ao dataset, que pode ser montado em outro diretório na extração.
+    O catálogo não acompanha as mudanças do dataset e deve ser gerado novamente quando arquivos forem adicionados.
+
+    Exemplo de uso:
+        DatasetCatalog.build('cb_dataset_v1.11/', workers=8).save('cache/catalogo.db')
+        CodebenchExtractor.set_catalog(DatasetCatalog.load('cache/catalogo.db', 'cb_dataset_v1.11/'))
+        ExtractionPipeline.run('cb_dataset_v1.11/')
+    """
+
+    # versão do formato do catálogo, deve ser incrementada sempre que as entradas registradas mudarem
+    __versao = 1
+    __tipos_pasta = frozenset(('periodo', 'turma', 'estudante', 'pasta'))
+    # tipo dos arquivos de cada sub-diretório do Estudante, pela extensão
+    __arquivos_estudante = {'executions': ('.log', 'execucao'), 'codemirror': ('.log', 'codemirror'),
+                            'codes': ('.py', 'codigo')}
+
+    def __init__(self, raiz: str):
+        """
+        Método Construtor.
+
+        :param raiz: Caminho do diretório do dataset.
+        """
+        self.raiz = os.path.abspath(raiz)
+        # diretório (relativo) -> lista das entradas, na ordem da varredura
+        self.__diretorios = {}
+        # diretório (relativo) -> {nome: entrada}, criado apenas quando a existência de um arquivo é consultada
+        self.__nomes = {}
+        # linhas (diretorio, nome, tipo, periodo, turma, estudante, atividade, exercicio, tamanho, mtime) salvas por
+        # 'save', mantidas apenas no catálogo criado por 'build'
+        self.__linhas = None
+
+    def __len__(self):
+        return sum(len(entradas) for entradas in self.__diretorios.values())
+
+    @staticmethod
+    def __codigo(nome: str):
+        """Converte o código numérico de um nome de diretório ou arquivo, ou retorna None."""
+        return int(nome) if nome.isdigit() else None
+
+    @staticmethod
+    def __ids_arquivo(nome: str):
+        """Retorna os códigos da Atividade e do Exercício do nome de um arquivo '<atividade>_<exercicio>.<ext>'."""
+        partes = os.path.splitext(nome)[0].split('_')
+        if len(partes) < 2:
+            return None, None
+        return partes[0], DatasetCatalog.__codigo(partes[1])
+
+    @staticmethod
+    def __tipo(nivel, nome: str, pasta: bool):
+        """
+        Classifica uma entrada pelo nível do diretório em que foi encontrada.
+
+        :param nivel: Nível do diretório listado ('raiz', 'periodo', 'turma', 'assessments', 'users', 'estudante' ou
+            o nome de um sub-diretório do Estudante).
+        :param nome: Nome da entrada.
+        :param pasta: Se verdadeiro, a entrada é um diretório.
+        :return: Tupla (tipo, atividade, exercicio, nível do sub-diretório ou None se ele não é percorrido).
+        """
+        if nivel == 'raiz':
+            return ('periodo', None, None, 'periodo') if pasta else ('outro', None, None, None)
+        if nivel == 'periodo':
+            return ('turma', None, None, 'turma') if pasta else ('outro', None, None, None)
+        if nivel == 'turma':
+            return ('pasta', None, None, nome if nome in ('assessments', 'users') else None) if pasta else \
+                ('outro', None, None, None)
+        if nivel == 'assessments':
+            if pasta:
+                return 'pasta', None, None, None
+            return ('atividade', os.path.splitext(nome)[0], None, None) if nome.endswith('.data') else \
+                ('outro', None, None, None)
+        if nivel == 'users':
+            return ('estudante', None, None, 'estudante') if pasta else ('outro', None, None, None)
+        if nivel == 'estudante':
+            # o diretório do Estudante é listado para registrar o 'user.data' e os sub-diretórios existentes
+            if pasta:
+                return 'pasta', None, None, ('pasta_estudante', nome)
+            return 'usuario' if nome == 'user.data' else 'outro', None, None, None
+        if pasta:
+            return 'pasta', None, None, None
+        extensao, tipo = DatasetCatalog.__arquivos_estudante.get(nivel[1], (None, 'outro'))
+        if extensao is not None and nome.endswith(extensao):
+            return (tipo, *DatasetCatalog.__ids_arquivo(nome), None)
+        return 'outro', None, None, None
+
+    @staticmethod
+    def __ids(nivel, ids, nome: str):
+        """Retorna os códigos (periodo, turma, estudante) de um sub-diretório a partir dos códigos do seu pai."""
+        periodo, turma, estudante = ids
+        if nivel == 'periodo':
+            return nome, None, None
+        if nivel == 'turma':
+            return periodo, DatasetCatalog.__codigo(nome), None
+        if nivel == 'estudante':
+            return periodo, turma, DatasetCatalog.__codigo(nome)
+        return ids
+
+    @staticmethod
+    def build(dataset_dir: str, workers: int = 1):
+        """
+        Percorre o dataset uma única vez e cria o catálogo das suas entradas.
+
+        Os diretórios são percorridos por nível (Períodos, Turmas, Estudantes, ...) e os diretórios de um mesmo nível
+        são listados ao mesmo tempo pelo :class:`ParallelWalker`, mantendo a ordem das entradas de cada diretório.
+
+        :param dataset_dir: Caminho para o diretório do dataset do Codebench.
+        :param workers: Quantidade de threads da varredura, isto é, de diretórios listados ao mesmo tempo.
+        :return: O :class:`DatasetCatalog` do dataset.
+        """
+        inicio = time.time()
+        catalogo = DatasetCatalog(dataset_dir)
+        if not os.path.isdir(catalogo.raiz):
+            raise FileNotFoundError(f'Diretório do dataset não encontrado: {catalogo.raiz}')
+        linhas = []
+        # diretórios do nível atual: (caminho, caminho relativo, códigos (periodo, turma, estudante), nível)
+        diretorios = [(catalogo.raiz, '', (None, None, None), 'raiz')]
+        walker = ParallelWalker(max(workers, 1))
+        try:
+            while diretorios:
+                proximos = []
+                listagens = walker.scandir_many((d[0] for d in diretorios), stat=True)
+                for (path, relativo, ids, nivel), (_, entradas) in zip(diretorios, listagens):
+                    # o diretório pode ter sido removido depois da listagem do seu pai
+                    for entrada in entradas or ():
+                        pasta = entrada.is_dir()
+                        tipo, atividade, exercicio, filho = DatasetCatalog.__tipo(nivel, entrada.name, pasta)
+                        if pasta:
+                            linhas.append((relativo, entrada.name, tipo, *ids, atividade, exercicio, None, None))
+                            if filho is not None:
+                                proximos.append((entrada.path, os.path.join(relativo, entrada.name),
+                                                 DatasetCatalog.__ids(filho, ids, entrada.name), filho))
+                        else:
+                            stat = entrada.stat()
+                            linhas.append((relativo, entrada.name, tipo, *ids, atividade, exercicio, stat.st_size,
+                                           stat.st_mtime_ns))
+                diretorios = proximos
+        finally:
+            walker.close()
+        catalogo.__add(linhas)
+        catalogo.__linhas = linhas
+        Logger.info('Catálogo do dataset criado: %d entradas em %.1f s', len(linhas), time.time() - inicio)
+        return catalogo
+
+    def __add(self, linhas):
+        """Adiciona as linhas ao catálogo, criando as entradas de cada diretório."""
+        tipos_pasta = DatasetCatalog.__tipos_pasta
+        diretorios = self.__diretorios
+        for linha in linhas:
+            relativo, nome, tipo = linha[0], linha[1], linha[2]
+            entradas = diretorios.get(relativo)
+            if entradas is None:
+                entradas = diretorios[relativo] = []
+            entradas.append(CatalogEntry(nome, None, tipo, tipo in tipos_pasta, linha[8], linha[9]))
+
+    def save(self, path: str):
+        """
+        Salva o catálogo num banco de dados SQLite, substituindo um catálogo anterior.
+
+        :param path: Caminho do arquivo do catálogo.
+        """
+        if self.__linhas is None:
+            raise ValueError('Apenas o catálogo criado por \'build\' pode ser salvo.')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporario = path + '.tmp'
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        conn = sqlite3.connect(temporario)
+        try:
+            conn.execute('CREATE TABLE info (chave TEXT PRIMARY KEY, valor TEXT)')
+            conn.execute('CREATE TABLE entradas (ordem INTEGER PRIMARY KEY, diretorio TEXT NOT NULL, '
+                         'nome TEXT NOT NULL, tipo TEXT NOT NULL, periodo TEXT, turma INTEGER, estudante INTEGER, '
+                         'atividade TEXT, exercicio INTEGER, tamanho INTEGER, mtime INTEGER)')
+            conn.executemany('INSERT INTO info VALUES (?, ?)',
+                             (('versao', str(DatasetCatalog.__versao)), ('raiz', self.raiz),
+                              ('data', time.strftime('%Y-%m-%d %H:%M:%S'))))
+            conn.executemany('INSERT INTO entradas (diretorio, nome, tipo, periodo, turma, estudante, atividade, '
+                             'exercicio, tamanho, mtime) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', self.__linhas)
+            conn.execute('CREATE INDEX idx_entradas_tipo ON entradas (tipo, periodo, turma, estudante)')
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(temporario, path)
+        Logger.info('Catálogo do dataset salvo em: %s', path)
+
+    @staticmethod
+    def load(path: str, dataset_dir: str = None):
+        """
+        Carrega um catálogo salvo com 'save'.
+
+        :param path: Caminho do arquivo do catálogo.
+        :param dataset_dir: Diretório do dataset na extração, se montado num caminho diferente do usado na criação
+            do catálogo (ou None, para usar o caminho original).
+        :return: O :class:`DatasetCatalog` carregado.
+        """
+        conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            info = dict(conn.execute('SELECT chave, valor FROM info'))
+            if info.get('versao') != str(DatasetCatalog.__versao):
+                raise ValueError(f'Versão do catálogo incompatível ({info.get("versao")}), gere-o novamente: {path}')
+            catalogo = DatasetCatalog(dataset_dir if dataset_dir is not None else info['raiz'])
+            catalogo.__add(conn.execute('SELECT diretorio, nome, tipo, periodo, turma, estudante, atividade, '
+                                        'exercicio, tamanho, mtime FROM entradas ORDER BY ordem'))
+        finally:
+            conn.close()
+        Logger.info('Catálogo do dataset carregado: %d entradas de %s', len(catalogo), info['raiz'])
+        return catalogo
+
+    def __relativo(self, path: str):
+        """Retorna o caminho relativo ao dataset, ou None se o caminho está fora do dataset."""
+        relativo = os.path.relpath(path, self.raiz)
+        if relativo == os.curdir:
+            return ''
+        if relativo == os.pardir or relativo.startswith(os.pardir + os.sep):
+            return None
+        return relativo
+
+    def scandir(self, path: str):
+        """
+        Retorna as entradas de um diretório, na ordem da varredura, com o caminho 'path' de cada uma.
+
+        :param path: Caminho do diretório.
+        :return: Lista de :class:`CatalogEntry`, ou None se o diretório está fora do dataset.
+        :raises FileNotFoundError: Se o diretório está no dataset mas não foi encontrado na varredura.
+        """
+        relativo = self.__relativo(path)
+        if relativo is None:
+            return None
+        entradas = self.__diretorios.get(relativo)
+        if entradas is None:
+            raise FileNotFoundError(f'Diretório não encontrado no catálogo do dataset: {path}')
+        for entrada in entradas:
+            entrada.path = os.path.join(path, entrada.name)
+        return entradas
+
+    def entry(self, path: str):
+        """
+        Retorna a entrada de um arquivo ou diretório do dataset.
+
+        :param path: Caminho do arquivo ou diretório.
+        :return: A :class:`CatalogEntry`, False se o arquivo não existe no dataset, ou None se está fora do dataset.
+        """
+        diretorio, nome = os.path.split(path)
+        relativo = self.__relativo(diretorio)
+        if relativo is None:
+            return None
+        nomes = self.__nomes.get(relativo)
+        if nomes is None:
+            nomes = self.__nomes[relativo] = {e.name: e for e in self.__diretorios.get(relativo, ())}
+        return nomes.get(nome, False)
+
+    def exists(self, path: str):
+        """Verifica se um arquivo ou diretório existe, consultando o sistema de arquivos apenas fora do dataset."""
+        entrada = self.entry(path)
+        if entrada is None:
+            return os.path.exists(path)
+        return entrada is not False
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import json
+import os
+
+from util import Logger
+
+
+class ExtractionCheckpoint:
+    """
+    Ponto de controle (checkpoint) de uma extração, salvo junto aos arquivos de saída '.csv'.
+
+    Ao final de cada Turma são registradas as Turmas já concluídas e o tamanho de cada arquivo '.csv' naquele
+    momento. Se a extração for interrompida, uma nova extração pode continuar a partir do último checkpoint:
+    as Turmas concluídas são ignoradas e os arquivos '.csv' são truncados de volta ao tamanho registrado, descartando
+    as linhas parciais escritas depois dele.
+
+    O arquivo é sempre substituído de forma atômica (escrito num arquivo temporário e renomeado), assim um checkpoint
+    nunca fica corrompido, mesmo que o processo seja interrompido durante a escrita.
+
+    Exemplo de uso:
+        checkpoint = ExtractionCheckpoint()
+        if checkpoint.load(dataset_dir, 'run'):
+            CSVParser.truncate_output_files(checkpoint.tamanhos)
+        else:
+            checkpoint.start(dataset_dir, 'run')
+        ...
+        checkpoint.save(CSVParser.sync_output_files(), turma=turma.path)
+        ...
+        checkpoint.clear()
+    """
+
+    # versão do formato do arquivo de checkpoint
+    __versao = 2
+
+    def __init__(self, path: str = os.path.join(os.getcwd(), 'csv', 'checkpoint.json')):
+        """
+        Método Construtor.
+
+        :param path: Caminho do arquivo de checkpoint.
+        """
+        self.path = path
+        self.dataset_dir = None
+        self.modo = None
+        self.turmas = set()
+        self.tamanhos = {}
+
+    def exists(self):
+        """Verifica se existe o checkpoint de uma extração interrompida."""
+        return os.path.isfile(self.path)
+
+    def start(self, dataset_dir: str, modo: str):
+        """
+        Inicia um checkpoint vazio para uma nova extração.
+
+        :param dataset_dir: Caminho do diretório do dataset extraído.
+        :param modo: Tipo da extração ('run' para todas as Entidades, 'execucoes' apenas para as Execuções),
+            seguido da descrição do shard numa extração distribuída.
+        """
+        self.dataset_dir = os.path.abspath(dataset_dir)
+        self.modo = modo
+        self.turmas = set()
+        self.tamanhos = {}
+
+    def load(self, dataset_dir: str, modo: str):
+        """
+        Carrega o checkpoint de uma extração interrompida.
+
+        :param dataset_dir: Caminho do diretório do dataset a ser extraído.
+        :param modo: Tipo da extração a ser continuada ('run' ou 'execucoes').
+        :return: True se o checkpoint pertence a uma extração do mesmo dataset e tipo, False caso contrário.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except (OSError, ValueError) as e:
+            Logger.warn(f'Erro ao carregar o checkpoint da extração, {str(e)}: {self.path}')
+            return False
+
+        if (dados.get('versao') != ExtractionCheckpoint.__versao or dados.get('modo') != modo or
+                dados.get('dataset_dir') != os.path.abspath(dataset_dir)):
+            Logger.warn(f'O checkpoint pertence a outra extração e não será usado: {self.path}')
+            return False
+
+        self.dataset_dir = dados['dataset_dir']
+        self.modo = dados['modo']
+        self.turmas = set(dados['turmas'])
+        self.tamanhos = dados['tamanhos']
+        Logger.info(f'Continuando a extração a partir do checkpoint: {len(self.turmas)} turmas concluídas')
+        return True
+
+    def save(self, tamanhos, turma: str = None):
+        """
+        Registra uma Turma como concluída e salva o checkpoint de forma atômica.
+
+        Os arquivos '.csv' devem ter sido gravados em disco (ver 'CSVParser.sync_output_files') antes do checkpoint,
+        para que os tamanhos registrados correspondam exatamente às Turmas concluídas.
+
+        :param tamanhos: Tamanho (em bytes) de cada arquivo '.csv' no momento do checkpoint.
+        :param turma: Caminho da Turma concluída (ou None).
+        """
+        if turma is not None:
+            self.turmas.add(turma)
+        self.tamanhos = dict(tamanhos)
+
+        dados = {
+            'versao': ExtractionCheckpoint.__versao,
+            'dataset_dir': self.dataset_dir,
+            'modo': self.modo,
+            'turmas': sorted(self.turmas),
+            'tamanhos': self.tamanhos,
+        }
+        temporario = self.path + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(dados, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.path)
+
+    def clear(self):
+        """Remove o checkpoint, ao final de uma extração concluída."""
+        if os.path.isfile(self.path):
+            os.remove(self.path)
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import argparse
+import os
+import time
+
+from archive import DatasetArchive
+from benchmark import ExtractionBenchmark
+from cache import MetricsCache
+from catalog import DatasetCatalog
+from columnar import ColumnarWriter
+from csv_parser import CSVParser
+from database import ExtractionDatabase
+from extractor import CodebenchExtractor
+from manifest import ExtractionManifest
+from merge_csv import MergeCsvs
+from pipeline import ExtractionPipeline
+from profiler import StageProfiler
+from shard import ExtractionShard
+from synthetic import SyntheticDataset
+from util import Logger
+from walker import ParallelWalker
+
+
+class CommandLine:
+    """
+    Interface de linha de comando (não interativa) do extrator, para uso em scripts e agendadores (cron, SLURM).
+
+    Exemplo de uso:
+        python __init__.py extract --dataset cb_dataset_v1.11/ --tables execucoes,erros --workers 8 --out saida/
+        python __init__.py extract --dataset /mnt/nfs/cb_dataset_v1.11/ --shard 0/4 --out shard0/
+        python __init__.py extract --dataset cb_dataset_v1.11/ --workers 8 --async-log
+        python __init__.py merge-shards --out csv/ shard0/ shard1/ shard2/ shard3/
+        python __init__.py catalog --dataset /mnt/nfs/cb_dataset_v1.11/ --workers 8 --out catalogo.db
+        python __init__.py extract --dataset /mnt/nfs/cb_dataset_v1.11/ --catalog catalogo.db --workers 8
+        python __init__.py extract --dataset /mnt/nfs/cb_dataset_v1.11/ --workers 8 --threads 16
+        python __init__.py extract --dataset cb_dataset_v1.11.tar.gz --workers 8
+        python __init__.py merge
+        python __init__.py generate --out cb_sintetico/ --turmas 4 --estudantes 50
+        python __init__.py benchmark --dataset cb_sintetico/ --json benchmark.json
+    """
+
+    # códigos de saída (exit status) do processo
+    SUCESSO = 0
+    ERRO = 1
+    USO_INVALIDO = 2
+    INTERROMPIDO = 130
+
+    # tabelas (arquivos '.csv') geradas pela varredura única do 'ExtractionPipeline.run'
+    __tabelas_pipeline = ('periodos', 'turmas', 'atividades', 'estudantes', 'execucoes', 'erros')
+    __tabelas = __tabelas_pipeline + ('solucoes',)
+
+    @staticmethod
+    def __parse_tabelas(valor: str):
+        """Converte a lista de tabelas separadas por vírgula do argumento '--tables'."""
+        tabelas = [t.strip().lower() for t in valor.split(',') if t.strip()]
+        invalidas = [t for t in tabelas if t not in CommandLine.__tabelas]
+        if invalidas or not tabelas:
+            raise argparse.ArgumentTypeError(f"tabela(s) inválida(s): {', '.join(invalidas) or valor!r} "
+                                             f"(opções: {', '.join(CommandLine.__tabelas)})")
+        return set(tabelas)
+
+    @staticmethod
+    def __parse_workers(valor: str):
+        """Converte a quantidade de processos do argumento '--workers'."""
+        try:
+            workers = int(valor)
+        except ValueError:
+            workers = 0
+        if workers < 1:
+            raise argparse.ArgumentTypeError(f'quantidade de processos inválida: {valor!r}')
+        return workers
+
+    @staticmethod
+    def __parse_quantidade(valor: str):
+        """Converte uma quantidade (inteiro maior que zero) dos argumentos (ex.: do comando 'generate')."""
+        try:
+            quantidade = int(valor)
+        except ValueError:
+            quantidade = 0
+        if quantidade < 1:
+            raise argparse.ArgumentTypeError(f'quantidade inválida: {valor!r}')
+        return quantidade
+
+    @staticmethod
+    def __parse_etapas(valor: str):
+        """Converte a lista de etapas separadas por vírgula do argumento '--stages' do comando 'benchmark'."""
+        etapas = [e.strip().lower() for e in valor.split(',') if e.strip()]
+        invalidas = [e for e in etapas if e not in ExtractionBenchmark.ETAPAS]
+        if invalidas or not etapas:
+            raise argparse.ArgumentTypeError(f"etapa(s) inválida(s): {', '.join(invalidas) or valor!r} "
+                                             f"(opções: {', '.join(ExtractionBenchmark.ETAPAS)})")
+        return tuple(etapas)
+
+    @staticmethod
+    def __parse_shard(valor: str):
+        """Converte o shard das Turmas ('indice/total') do argumento '--shard'."""
+        try:
+            return ExtractionShard.parse(valor)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+
+    @staticmethod
+    def __parse_periodos(valor: str):
+        """Converte a lista de Períodos separados por vírgula do argumento '--periodos'."""
+        periodos = {p.strip() for p in valor.split(',') if p.strip()}
+        if not periodos:
+            raise argparse.ArgumentTypeError(f'lista de períodos inválida: {valor!r}')
+        return periodos
+
+    @staticmethod
+    def parser(version: str):
+        """
+        Cria o parser dos argumentos da linha de comando.
+
+        :param version: Versão do extrator, exibida em '--version'.
+        :return: O :class:`argparse.ArgumentParser` do extrator.
+        """
+        parser = argparse.ArgumentParser(
+            prog='codebench-extractor',
+            description='Extrator de dados do dataset do Juiz Online Codebench. '
+                        'Sem argumentos, o menu interativo é exibido.')
+        parser.add_argument('--version', action='version', version=f'%(prog)s {version}')
+        subparsers = parser.add_subparsers(dest='comando', required=True, metavar='comando')
+
+        # opções do módulo de log, comuns a todos os comandos
+        log = argparse.ArgumentParser(add_help=False)
+        log.add_argument('--async-log', dest='async_log', action='store_true',
+                         help='escreve os logs numa thread separada, fora do caminho da extração')
+        log.add_argument('--verbose', action='store_true',
+                         help='também registra cada arquivo lido no log de info (nível DEBUG)')
+
+        extract = subparsers.add_parser('extract', parents=[log],
+                                        help='extrai as tabelas do dataset para arquivos .csv')
+        extract.add_argument('--dataset', required=True, metavar='DIR',
+                             help='caminho para o diretório do dataset, ou para o arquivo compactado '
+                                  f"({', '.join(DatasetArchive.FORMATOS)}) lido sem descompactá-lo")
+        extract.add_argument('--out', metavar='DIR', default=CSVParser.get_output_dir(),
+                             help='diretório dos arquivos .csv de saída (padrão: %(default)s)')
+        extract.add_argument('--tables', type=CommandLine.__parse_tabelas,
+                             default=set(CommandLine.__tabelas_pipeline), metavar='T1,T2,...',
+                             help=f"tabelas extraídas, separadas por vírgula: {', '.join(CommandLine.__tabelas)} "
+                                  f"(padrão: todas exceto solucoes)")
+        extract.add_argument('--workers', type=CommandLine.__parse_workers, default=1, metavar='N',
+                             help=f'quantidade de processos na extração das execuções (1 a {os.cpu_count()}, '
+                                  f'padrão: %(default)s)')
+        extract.add_argument('--threads', type=CommandLine.__parse_quantidade, default=1, metavar='N',
+                             help='quantidade de threads (por processo) na listagem dos diretórios e leitura dos '
+                                  'estudantes, para datasets em sistemas de arquivos de rede (padrão: %(default)s)')
+        extract.add_argument('--solutions', metavar='DIR',
+                             help='caminho para as soluções dos instrutores (obrigatório com a tabela solucoes)')
+        extract.add_argument('--incremental', action='store_true',
+                             help='processa apenas os estudantes com arquivos novos ou alterados (manifesto)')
+        extract.add_argument('--resume', action='store_true',
+                             help='continua a extração interrompida a partir do último checkpoint, se houver')
+        extract.add_argument('--no-cache', dest='cache', action='store_false',
+                             help='não usa o cache persistente de métricas dos códigos-fonte')
+        extract.add_argument('--columnar', choices=ColumnarWriter.FORMATOS,
+                             help='também salva cada tabela num arquivo colunar tipado (requer pyarrow)')
+        extract.add_argument('--sqlite', metavar='ARQUIVO',
+                             help='também salva as tabelas num banco de dados SQLite, com chaves e índices')
+        extract.add_argument('--shard', type=CommandLine.__parse_shard, metavar='I/N',
+                             help='extrai apenas as turmas do shard I de N (divisão pelo hash do caminho da turma)')
+        extract.add_argument('--periodos', type=CommandLine.__parse_periodos, metavar='P1,P2,...',
+                             help='extrai apenas os períodos informados (nomes dos diretórios)')
+        extract.add_argument('--catalog', metavar='ARQUIVO',
+                             help='usa o catálogo do dataset (comando catalog) no lugar das listagens dos diretórios')
+        extract.add_argument('--timing', action='store_true',
+                             help='mede o tempo, as chamadas e os bytes lidos de cada etapa, salvos em '
+                                  'instrumentacao.json no diretório de saída')
+        extract.add_argument('--profile', choices=StageProfiler.PERFIS,
+                             help='também perfila cada etapa (implica --timing), salvando os perfis na pasta perfis '
+                                  'do diretório de saída')
+
+        catalog = subparsers.add_parser('catalog', parents=[log],
+                                        help='cria o catálogo (índice) dos diretórios e arquivos do dataset')
+        catalog.add_argument('--dataset', required=True, metavar='DIR', help='caminho para o diretório do dataset')
+        catalog.add_argument('--out', metavar='ARQUIVO', default=os.path.join(os.getcwd(), 'cache', 'catalogo.db'),
+                             help='arquivo do catálogo (padrão: %(default)s)')
+        catalog.add_argument('--workers', type=CommandLine.__parse_workers, default=1, metavar='N',
+                             help='quantidade de threads da varredura, isto é, de diretórios listados ao mesmo tempo '
+                                  '(padrão: %(default)s)')
+
+        merge_shards = subparsers.add_parser('merge-shards', parents=[log],
+                                             help='une os arquivos .csv de extrações distribuídas (shards)')
+        merge_shards.add_argument('--out', metavar='DIR', default=CSVParser.get_output_dir(),
+                                  help='diretório dos arquivos .csv unidos (padrão: %(default)s)')
+        merge_shards.add_argument('shards', nargs='+', metavar='SHARD_DIR',
+                                  help='diretórios de saída (--out) das extrações de cada shard')
+
+        merge = subparsers.add_parser('merge', parents=[log],
+                                      help='une as execuções às turmas, atividades e estudantes num único '
+                                           'arquivo .csv')
+        merge.add_argument('--csv', metavar='DIR', default=CSVParser.get_output_dir(),
+                           help='diretório dos arquivos .csv extraídos (padrão: %(default)s)')
+        merge.add_argument('--out', metavar='DIR', default=os.path.join(os.getcwd(), 'mergecvs'),
+                           help='diretório do arquivo unido (padrão: %(default)s)')
+
+        generate = subparsers.add_parser('generate', parents=[log],
+                                         help='gera um dataset sintético com a estrutura do Codebench')
+        generate.add_argument('--out', required=True, metavar='DIR', help='diretório do dataset sintético')
+        for argumento, padrao, descricao in (('--periodos', 2, 'períodos letivos'),
+                                             ('--turmas', 2, 'turmas de cada período'),
+                                             ('--estudantes', 10, 'estudantes de cada turma'),
+                                             ('--atividades', 4, 'atividades de cada turma'),
+                                             ('--exercicios', 5, 'exercícios de cada atividade'),
+                                             ('--eventos', 60, 'eventos (máximo) de cada log do CodeMirror')):
+            generate.add_argument(argumento, type=CommandLine.__parse_quantidade, default=padrao, metavar='N',
+                                  help=f'quantidade de {descricao} (padrão: %(default)s)')
+        generate.add_argument('--seed', type=int, default=0, metavar='N',
+                              help='semente do gerador, o mesmo valor gera o mesmo dataset (padrão: %(default)s)')
+
+        benchmark = subparsers.add_parser('benchmark', parents=[log],
+                                          help='mede o tempo e a vazão de cada etapa da extração')
+        benchmark.add_argument('--dataset', required=True, metavar='DIR',
+                               help='caminho para o diretório do dataset (real ou sintético)')
+        benchmark.add_argument('--stages', type=CommandLine.__parse_etapas, default=ExtractionBenchmark.ETAPAS,
+                               metavar='E1,E2,...',
+                               help=f"etapas medidas, separadas por vírgula: {', '.join(ExtractionBenchmark.ETAPAS)} "
+                                    f"(padrão: todas)")
+        benchmark.add_argument('--workers', type=CommandLine.__parse_workers, default=1, metavar='N',
+                               help='quantidade de processos da etapa pipeline (padrão: %(default)s)')
+        benchmark.add_argument('--json', metavar='ARQUIVO', help='salva o resultado das etapas num arquivo JSON')
+        return parser
+
+    @staticmethod
+    def run(argv, version: str):
+        """
+        Executa o comando informado na linha de comando, sem solicitar nenhuma entrada ao usuário.
+
+        :param argv: Argumentos da linha de comando (sem o nome do programa).
+        :param version: Versão do extrator.
+        :return: O código de saída do processo (ver 'SUCESSO', 'ERRO', 'USO_INVALIDO' e 'INTERROMPIDO').
+        """
+        parser = CommandLine.parser(version)
+        try:
+            args = parser.parse_args(argv)
+            if args.comando == 'extract':
+                if not os.path.isdir(args.dataset) and not DatasetArchive.is_archive(args.dataset):
+                    parser.error(f'diretório do dataset não encontrado: {args.dataset}')
+                if DatasetArchive.is_archive(args.dataset) and (args.catalog is not None or args.threads > 1):
+                    parser.error('--catalog e --threads não se aplicam a um dataset compactado')
+                if 'solucoes' in args.tables and (args.solutions is None or not os.path.isdir(args.solutions)):
+                    parser.error('a tabela solucoes exige --solutions com o diretório das soluções')
+                if args.columnar is not None and not ColumnarWriter.available():
+                    parser.error(f"o formato {args.columnar} exige o módulo 'pyarrow' (pip install pyarrow)")
+                if args.profile is not None and not StageProfiler.available(args.profile):
+                    parser.error(f"o perfil {args.profile} exige o módulo '{args.profile}' "
+                                 f"(pip install {args.profile})")
+                sharded = args.shard is not None or args.periodos is not None
+                if sharded and not (args.tables.issuperset(CommandLine.__tabelas_pipeline) or
+                                    args.tables <= {'execucoes', 'erros'}):
+                    parser.error('--shard e --periodos exigem todas as tabelas ou apenas execucoes,erros')
+                if args.catalog is not None and not os.path.isfile(args.catalog):
+                    parser.error(f'catálogo do dataset não encontrado: {args.catalog}')
+            elif args.comando in ('benchmark', 'catalog'):
+                if not os.path.isdir(args.dataset):
+                    parser.error(f'diretório do dataset não encontrado: {args.dataset}')
+            elif args.comando == 'merge-shards':
+                for shard_dir in args.shards:
+                    if not os.path.isdir(shard_dir):
+                        parser.error(f'diretório do shard não encontrado: {shard_dir}')
+        except SystemExit as e:
+            # '--help' e '--version' terminam com 0, argumentos inválidos com 2
+            return e.code
+
+        Logger.configure(args.async_log, args.verbose)
+        start_time = time.time()
+        try:
+            if args.comando == 'extract':
+                CommandLine.__extract(args)
+            elif args.comando == 'merge-shards':
+                ExtractionShard.merge(args.shards, args.out)
+            elif args.comando == 'catalog':
+                DatasetCatalog.build(args.dataset, args.workers).save(args.out)
+            elif args.comando == 'generate':
+                dataset = SyntheticDataset(args.periodos, args.turmas, args.estudantes, args.atividades,
+                                           args.exercicios, args.eventos, args.seed)
+                gerado = dataset.generate(args.out)
+                Logger.info(f"Dataset sintético gerado em {args.out}: {gerado['arquivos']} arquivos, "
+                            f"{gerado['bytes'] / 1024 / 1024:.1f} MB")
+            elif args.comando == 'benchmark':
+                resultados = ExtractionBenchmark.run(args.dataset, args.stages, args.workers)
+                if args.json is not None:
+                    ExtractionBenchmark.save(resultados, args.json)
+            elif MergeCsvs.merge(args.csv, args.out) is None:
+                return CommandLine.ERRO
+        except KeyboardInterrupt:
+            Logger.warn('Extração interrompida pelo usuário.')
+            return CommandLine.INTERROMPIDO
+        except Exception as e:
+            Logger.error(f'Erro durante a execução do comando {args.comando}: {str(e)}')
+            return CommandLine.ERRO
+
+        time_elapsed = time.strftime('%H:%M:%S', time.gmtime(time.time() - start_time))
+        Logger.info(f'Tempo Total de Execução: {time_elapsed}')
+        return CommandLine.SUCESSO
+
+    @staticmethod
+    def __extract(args):
+        """Executa o comando 'extract', gerando os arquivos '.csv' das tabelas solicitadas."""
+        CSVParser.set_output_dir(args.out)
+        CSVParser.create_output_dir()
+        CSVParser.set_columnar_format(args.columnar)
+        if args.sqlite is not None:
+            CSVParser.set_database(ExtractionDatabase(args.sqlite))
+        if args.timing or args.profile is not None:
+            perfis = os.path.join(args.out, 'perfis') if args.profile is not None else None
+            StageProfiler.enable(args.profile, perfis)
+
+        cache = MetricsCache() if args.cache else None
+        CodebenchExtractor.set_cache(cache)
+        if args.catalog is not None:
+            CodebenchExtractor.set_catalog(DatasetCatalog.load(args.catalog, args.dataset))
+        archive = DatasetArchive(args.dataset) if DatasetArchive.is_archive(args.dataset) else None
+        CodebenchExtractor.set_archive(archive)
+        walker = ParallelWalker(args.threads) if args.threads > 1 else None
+        CodebenchExtractor.set_walker(walker)
+        manifest = ExtractionManifest() if args.incremental else None
+        shard = None
+        if args.shard is not None or args.periodos is not None:
+            indice, total = args.shard or (0, 1)
+            shard = ExtractionShard(indice, total, args.periodos)
+        try:
+            tabelas = args.tables
+            if tabelas.issuperset(CommandLine.__tabelas_pipeline):
+                # todas as tabelas do dataset numa única varredura
+                ExtractionPipeline.run(args.dataset, args.workers, manifest, resume=args.resume, shard=shard)
+            else:
+                if 'periodos' in tabelas:
+                    ExtractionPipeline.extract_periodos(args.dataset)
+                if 'turmas' in tabelas:
+                    ExtractionPipeline.extract_turmas(args.dataset)
+                if 'atividades' in tabelas:
+                    ExtractionPipeline.extract_atividades(args.dataset)
+                if 'estudantes' in tabelas:
+                    ExtractionPipeline.extract_estudantes(args.dataset)
+                if 'execucoes' in tabelas or 'erros' in tabelas:
+                    # as execuções e os erros são extraídos juntos, a partir dos mesmos arquivos
+                    ExtractionPipeline.extract_execucoes(args.dataset, args.workers, manifest, resume=args.resume,
+                                                         shard=shard)
+            if 'solucoes' in tabelas:
+                ExtractionPipeline.extract_solucoes(args.solutions)
+        finally:
+            # fecha o banco de dados, criando os índices das tabelas carregadas
+            CSVParser.set_database(None)
+            if manifest is not None:
+                manifest.close()
+            if cache is not None:
+                cache.close()
+            CodebenchExtractor.set_cache(None)
+            CodebenchExtractor.set_catalog(None)
+            CodebenchExtractor.set_walker(None)
+            if walker is not None:
+                walker.close()
+            CodebenchExtractor.set_archive(None)
+            if archive is not None:
+                archive.close()
+            if StageProfiler.is_enabled():
+                path = os.path.join(args.out, 'instrumentacao.json')
+                StageProfiler.report(StageProfiler.save(path))
+                StageProfiler.disable()
+                Logger.info(f'Instrumentação das etapas salva em: {path}')
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import os
+from datetime import timedelta
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+
+
+class ColumnarWriter:
+    """
+    Escritor de um arquivo colunar tipado (Parquet ou Feather), com a mesma interface do :class:`CSVStreamWriter`.
+
+    As linhas são acumuladas em memória e escritas em grupos (row groups no Parquet, record batches no Feather) de
+    'tamanho_grupo' linhas, assim o arquivo é gerado durante a extração sem manter toda a tabela em memória. Os tipos
+    das colunas vêm das Entidades (ver 'CSVEntity.get_column_types'), ex.: inteiros continuam inteiros mesmo com
+    valores ausentes, e 'tempo_total'/'tempo_foco' são salvos como durações.
+
+    O arquivo só é válido após 'close', que escreve os metadados (footer) do formato.
+
+    Depende do módulo opcional 'pyarrow' (pip install pyarrow).
+    """
+
+    FORMATOS = ('parquet', 'feather')
+
+    def __init__(self, path: str, header, tipos, formato: str = 'parquet', tamanho_grupo: int = 64 * 1024):
+        """
+        Método Construtor.
+
+        :param path: Caminho do arquivo colunar, sobrescrito caso já exista.
+        :param header: Nomes das colunas.
+        :param tipos: Tipo (str, int, float, bool ou timedelta) de cada coluna.
+        :param formato: 'parquet' ou 'feather'.
+        :param tamanho_grupo: Quantidade de linhas de cada grupo escrito no arquivo.
+        """
+        if pa is None:
+            raise ImportError("O formato colunar depende do módulo 'pyarrow' (pip install pyarrow).")
+        if formato not in ColumnarWriter.FORMATOS:
+            raise ValueError(f'Formato colunar inválido: {formato}')
+
+        self.path = path
+        self.tamanho_grupo = tamanho_grupo
+        self.__tipos = tipos
+        self.__schema = pa.schema([(nome, ColumnarWriter.__arrow_type(tipo)) for nome, tipo in zip(header, tipos)])
+        self.__linhas = []
+        if formato == 'parquet':
+            self.__writer = pa.parquet.ParquetWriter(path, self.__schema, compression='zstd')
+        else:
+            self.__writer = pa.ipc.new_file(path, self.__schema,
+                                            options=pa.ipc.IpcWriteOptions(compression='zstd'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def available():
+        """Verifica se o módulo 'pyarrow', usado pelos formatos colunares, está instalado."""
+        return pa is not None
+
+    @staticmethod
+    def __arrow_type(tipo):
+        """Retorna o tipo do 'pyarrow' correspondente ao tipo de uma coluna."""
+        if tipo is int:
+            return pa.int64()
+        if tipo is float:
+            return pa.float64()
+        if tipo is bool:
+            return pa.bool_()
+        if tipo is timedelta:
+            return pa.duration('us')
+        return pa.string()
+
+    @staticmethod
+    def __convert(valores, tipo):
+        """Converte os valores de uma coluna para o seu tipo, mantendo os ausentes (None)."""
+        if tipo is str:
+            return [v if v is None or isinstance(v, str) else str(v) for v in valores]
+        if tipo is int or tipo is float:
+            return [None if v is None or v == '' else tipo(v) for v in valores]
+        return valores
+
+    def write_rows(self, rows):
+        """
+        Adiciona as linhas ao grupo atual, escrevendo os grupos completos no arquivo.
+
+        :param rows: Linhas com os valores na ordem do cabeçalho.
+        """
+        self.__linhas.extend(rows)
+        while len(self.__linhas) >= self.tamanho_grupo:
+            grupo = self.__linhas[:self.tamanho_grupo]
+            del self.__linhas[:self.tamanho_grupo]
+            self.__write_group(grupo)
+
+    def __write_group(self, linhas):
+        """Escreve um grupo de linhas no arquivo, convertendo-as em colunas."""
+        colunas = zip(*linhas) if linhas else [()] * len(self.__tipos)
+        arrays = [pa.array(ColumnarWriter.__convert(valores, tipo), type=campo.type)
+                  for valores, tipo, campo in zip(colunas, self.__tipos, self.__schema)]
+        self.__writer.write_table(pa.Table.from_arrays(arrays, schema=self.__schema))
+
+    def flush(self):
+        """Escreve as linhas pendentes como um grupo (menor que 'tamanho_grupo')."""
+        if self.__linhas:
+            self.__write_group(self.__linhas)
+            self.__linhas = []
+
+    def sync(self):
+        """
+        Compatível com o :class:`CSVStreamWriter`. Não escreve o grupo incompleto, pois o arquivo colunar só é válido
+        após 'close' e grupos pequenos deixariam a leitura mais lenta.
+        """
+        pass
+
+    def close(self):
+        """Escreve as linhas pendentes e os metadados do formato, fechando o arquivo."""
+        if self.__writer is not None:
+            self.flush()
+            self.__writer.close()
+            self.__writer = None
+
+    @staticmethod
+    def extension(formato: str):
+        """Retorna a extensão dos arquivos do formato colunar."""
+        return os.extsep + formato
@@ -3,14 +3,90 @@
 ### Universidade Federal do Amazonas - UFAM
 ### Instituto de Computação - IComp
 
+import csv
 import os
+from datetime import timedelta
 
-import pandas as pd
-
+from columnar import ColumnarWriter
+from database import ExtractionDatabase
 from model import *
+from profiler import StageProfiler
 from util import Logger
 
 
+class CSVStreamWriter:
+    """
+    Escritor de um arquivo de saída '.csv' que permanece aberto durante toda a extração.
+
+    As linhas são escritas por um 'csv.writer' sobre um arquivo com buffer grande, evitando criar um DataFrame e
+    reabrir o arquivo a cada lote de Entidades salvo. O formato segue o gerado pelo 'pandas': valores não
+    numéricos entre aspas (csv.QUOTE_NONNUMERIC), valores vazios como '""' e intervalos de tempo como
+    '0 days 00:01:24.254000'.
+
+    Exemplo de uso:
+        with CSVStreamWriter('csv/erros.csv', Erro.get_csv_header()) as writer:
+            writer.write_rows(rows)
+    """
+
+    # tamanho do buffer do arquivo, as linhas são gravadas em disco em blocos deste tamanho
+    __tamanho_buffer = 1024 * 1024
+
+    def __init__(self, path: str, header, append: bool = False):
+        """
+        Método Construtor.
+
+        :param path: Caminho absoluto do arquivo '.csv'.
+        :param header: Cabeçalho do arquivo '.csv', escrito apenas quando o arquivo é criado.
+        :param append: Se verdadeiro, adiciona as linhas ao final do arquivo, caso ele já exista.
+        """
+        self.path = path
+        existe = append and os.path.isfile(path)
+        self.__file = open(path, 'a' if existe else 'w', encoding='utf-8', newline='',
+                           buffering=CSVStreamWriter.__tamanho_buffer)
+        self.__writer = csv.writer(self.__file, quoting=csv.QUOTE_NONNUMERIC, lineterminator=os.linesep)
+        if not existe:
+            self.__writer.writerow(header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write_rows(self, rows):
+        """
+        Escreve uma lista de linhas no arquivo.
+
+        :param rows: Lista de linhas, cada uma com os valores de uma Entidade na ordem do cabeçalho.
+        """
+        formatar = CSVStreamWriter.__format_timedelta
+        self.__writer.writerows(
+            [valor if type(valor) is not timedelta else formatar(valor) for valor in row] for row in rows)
+
+    def flush(self):
+        """Grava em disco as linhas que ainda estão no buffer."""
+        self.__file.flush()
+
+    def sync(self):
+        """Grava as linhas do buffer e aguarda até que estejam fisicamente no disco (fsync)."""
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+
+    def close(self):
+        """Grava as linhas pendentes e fecha o arquivo."""
+        self.__file.close()
+
+    @staticmethod
+    def __format_timedelta(intervalo: timedelta):
+        """Formata um intervalo de tempo como o 'pandas' (ex.: '0 days 00:01:24.254000', '-1 days +23:59:55')."""
+        horas, segundos = divmod(intervalo.seconds, 3600)
+        minutos, segundos = divmod(segundos, 60)
+        texto = f'{intervalo.days} days {"+" if intervalo.days < 0 else ""}{horas:02}:{minutos:02}:{segundos:02}'
+        if intervalo.microseconds:
+            texto += f'.{intervalo.microseconds:06}'
+        return texto
+
+
 class CSVParser:
     """Class Responsável por manipular os arquivos de saída '.csv'"""
 
@@ -23,6 +99,81 @@ class CSVParser:
     __execucoes_csv = 'execucoes.csv'
     __solucoes_csv = 'solucoes.csv'
     __erros_csv = 'erros.csv'
+    # arquivos '.csv' (e colunares) abertos para adição de Entidades, indexados pelo caminho do arquivo
+    __writers = {}
+    # formato colunar ('parquet' ou 'feather') gerado junto com os arquivos '.csv', ou None
+    __formato_colunar = None
+    # banco de dados SQLite gerado junto com os arquivos '.csv', ou None
+    __database = None
+    # linhas de Erros ainda não salvas e a quantidade máxima delas mantida em memória
+    __erros_pendentes = []
+    __limite_erros = 50000
+
+    @staticmethod
+    def set_output_dir(path: str):
+        """
+        Altera o diretório dos arquivos de saída '.csv' (por padrão a pasta 'csv' no diretório de trabalho atual).
+
+        :param path: Caminho do novo diretório de saída.
+        """
+        CSVParser.close_writers()
+        CSVParser.__output_dir = os.path.abspath(path)
+
+    @staticmethod
+    def get_output_dir():
+        """Retorna o caminho absoluto do diretório dos arquivos de saída '.csv'."""
+        return CSVParser.__output_dir
+
+    @staticmethod
+    def set_columnar_format(formato: str = None):
+        """
+        Define um formato colunar tipado ('parquet' ou 'feather') gerado junto com cada arquivo '.csv'.
+
+        Cada tabela também é salva em '<tabela>.parquet' (ou '.feather') durante a extração, ver
+        :class:`ColumnarWriter`. Depende do módulo opcional 'pyarrow'.
+
+        :param formato: O formato colunar, ou None para gerar apenas os arquivos '.csv'.
+        """
+        if formato is not None and formato not in ColumnarWriter.FORMATOS:
+            raise ValueError(f'Formato colunar inválido: {formato}')
+        CSVParser.close_writers()
+        CSVParser.__formato_colunar = formato
+
+    @staticmethod
+    def get_columnar_format():
+        """Retorna o formato colunar gerado junto com os arquivos '.csv', ou None."""
+        return CSVParser.__formato_colunar
+
+    @staticmethod
+    def set_database(database: ExtractionDatabase = None):
+        """
+        Define um banco de dados SQLite (:class:`ExtractionDatabase`) gerado junto com os arquivos '.csv', cada
+        arquivo corresponde a uma tabela. O banco de dados anterior, se houver, é fechado.
+
+        :param database: O banco de dados, ou None para gerar apenas os arquivos '.csv'.
+        """
+        CSVParser.close_writers()
+        if CSVParser.__database is not None:
+            CSVParser.__database.close()
+        CSVParser.__database = database
+
+    @staticmethod
+    def can_resume():
+        """
+        Verifica se uma extração interrompida pode ser continuada a partir do checkpoint. Apenas os arquivos '.csv'
+        podem ser truncados de volta ao checkpoint, os formatos colunares e o banco de dados são gerados novamente.
+        """
+        return CSVParser.__formato_colunar is None and CSVParser.__database is None
+
+    @staticmethod
+    def __table_name(path: str):
+        """Retorna o nome da tabela do banco de dados correspondente a um arquivo '.csv'."""
+        return os.path.splitext(os.path.basename(path))[0]
+
+    @staticmethod
+    def __columnar_path(path: str):
+        """Retorna o caminho do arquivo colunar correspondente a um arquivo '.csv'."""
+        return os.path.splitext(path)[0] + ColumnarWriter.extension(CSVParser.__formato_colunar)
 
     @staticmethod
     def create_output_dir():
@@ -30,98 +181,223 @@ class CSVParser:
         try:
             # se o diretório de saída existir, apaga seu conteúdo
             if not os.path.exists(CSVParser.__output_dir):
-                os.mkdir(CSVParser.__output_dir)
+                os.makedirs(CSVParser.__output_dir)
         except OSError:
             Logger.error('Erro ao criar diretório de saída!')
 
     @staticmethod
-    def __write_execucoes_to_csv(entidades, path: str, header: str):
+    def __pipeline_files(somente_execucoes: bool):
+        """Retorna os nomes dos arquivos '.csv' gerados pela extração completa, ou apenas das Execuções."""
+        if somente_execucoes:
+            return [CSVParser.__execucoes_csv, CSVParser.__erros_csv]
+        return [CSVParser.__periodos_csv, CSVParser.__turmas_csv, CSVParser.__atividades_csv,
+                CSVParser.__estudantes_csv, CSVParser.__execucoes_csv, CSVParser.__erros_csv]
+
+    @staticmethod
+    def reset_output_files(somente_execucoes: bool = False):
         """
-                Salva uma lista de :class:`CsvEntity` num arquivo no formato CSV.
+        Remove os arquivos de saída '.csv' gerados por uma extração anterior, caso existam.
 
-                :param entidades: Lista de Entidades a serem salvas.
-                :type entidades: List[CSVEntity]
-                :param path: Caminho absoluto do arquivo '.csv' onde as Entidades devam ser salvas.
-                :type path: str
-                :param mode: Modo de abertura do arquivo.
-                :type mode: str
-                """
-        Logger.info(f'Salvando entidades no arquivo: {path}')
+        :param somente_execucoes: Se verdadeiro, remove apenas os arquivos 'execucoes.csv' e 'erros.csv'.
+        """
+        CSVParser.close_writers()
+        for arquivo in CSVParser.__pipeline_files(somente_execucoes):
+            path = os.path.join(CSVParser.__output_dir, arquivo)
+            colunares = [os.path.splitext(path)[0] + ColumnarWriter.extension(f) for f in ColumnarWriter.FORMATOS]
+            for path in [path] + colunares:
+                if os.path.isfile(path):
+                    os.remove(path)
+        if CSVParser.__database is not None:
+            tabelas = map(CSVParser.__table_name, CSVParser.__pipeline_files(somente_execucoes))
+            CSVParser.__database.drop(list(tabelas))
 
-        rows = []
+    @staticmethod
+    def sync_output_files(somente_execucoes: bool = False):
+        """
+        Grava em disco todas as linhas pendentes dos arquivos de saída '.csv' e retorna o tamanho de cada um deles.
 
-        for entidade in entidades:
-            rows.append(entidade.as_row())
+        :param somente_execucoes: Se verdadeiro, considera apenas os arquivos 'execucoes.csv' e 'erros.csv'.
+        :return: Dicionário com o nome e o tamanho (em bytes) de cada arquivo, 0 para arquivos ainda não criados.
+        """
+        CSVParser.flush_erros()
+        for writer in CSVParser.__writers.values():
+            writer.sync()
 
-        df = pd.DataFrame(rows, columns=header)
-        # quoting 2 = NON_NUMERIC (csv.QUOTE_NON_NUMERIC)
-        if os.path.isfile(path):
-            df.to_csv(path, sep=',', mode='a', header=False, index=False, encoding='utf-8', quoting=2)
-        else:
-            df.to_csv(path, sep=',', index=False, encoding='utf-8', quoting=2)
+        tamanhos = {}
+        for arquivo in CSVParser.__pipeline_files(somente_execucoes):
+            path = os.path.join(CSVParser.__output_dir, arquivo)
+            tamanhos[arquivo] = os.path.getsize(path) if os.path.isfile(path) else 0
+        return tamanhos
 
     @staticmethod
-    def __write_to_csv(entidades, path: str, header: str):
+    def truncate_output_files(tamanhos):
         """
-        Salva uma lista de :class:`CsvEntity` num arquivo no formato CSV.
+        Trunca os arquivos de saída '.csv' de volta aos tamanhos registrados num checkpoint.
+
+        :param tamanhos: Dicionário com o nome e o tamanho (em bytes) de cada arquivo (ver 'sync_output_files').
+        :return: True se todos os arquivos puderam ser truncados, False se algum deles é menor que o registrado.
+        """
+        CSVParser.close_writers()
+        for arquivo, tamanho in tamanhos.items():
+            path = os.path.join(CSVParser.__output_dir, arquivo)
+            atual = os.path.getsize(path) if os.path.isfile(path) else 0
+            if atual < tamanho:
+                Logger.error(f'Arquivo menor que o registrado no checkpoint ({atual} < {tamanho} bytes): {path}')
+                return False
+
+        for arquivo, tamanho in tamanhos.items():
+            path = os.path.join(CSVParser.__output_dir, arquivo)
+            if tamanho == 0:
+                if os.path.isfile(path):
+                    os.remove(path)
+            else:
+                os.truncate(path, tamanho)
+        return True
+
+    @staticmethod
+    def close_writers():
+        """Grava as linhas pendentes e fecha todos os arquivos '.csv' abertos para adição de Entidades."""
+        CSVParser.flush_erros()
+        while CSVParser.__writers:
+            _, writer = CSVParser.__writers.popitem()
+            writer.close()
+        if CSVParser.__database is not None:
+            CSVParser.__database.commit()
+
+    @staticmethod
+    def __append_to_csv(entidades, path: str, header: str, tipos=None):
+        """
+        Adiciona uma lista de :class:`CsvEntity` ao final de um arquivo no formato CSV.
+
+        Caso o arquivo ainda não exista, ele é criado e o cabeçalho (header) é escrito.
 
         :param entidades: Lista de Entidades a serem salvas.
         :type entidades: List[CSVEntity]
         :param path: Caminho absoluto do arquivo '.csv' onde as Entidades devam ser salvas.
         :type path: str
-        :param mode: Modo de abertura do arquivo.
-        :type mode: str
+        :param header: Cabeçalho do arquivo '.csv'.
+        :type header: List[str]
+        :param tipos: Tipos das colunas, usados no formato colunar (ver 'CSVEntity.get_column_types').
+        :type tipos: List[type]
+        """
+        CSVParser.__append_rows_to_csv([entidade.as_row() for entidade in entidades], path, header, tipos)
+
+    @staticmethod
+    @StageProfiler.stage('csv_write')
+    def __append_rows_to_csv(rows, path: str, header: str, tipos=None):
         """
-        Logger.info(f'Salvando entidades no arquivo: {path}')
+        Adiciona uma lista de linhas (valores já extraídos das Entidades) ao final de um arquivo no formato CSV.
 
-        rows = []
+        O arquivo permanece aberto (:class:`CSVStreamWriter`) até que 'close_writers' seja chamado.
 
-        for entidade in entidades:
-            rows.append(entidade.as_row())
+        :param rows: Lista de linhas, cada uma com os valores de uma Entidade na ordem do cabeçalho.
+        :type rows: List[Sequence]
+        :param path: Caminho absoluto do arquivo '.csv' onde as linhas devam ser salvas.
+        :type path: str
+        :param header: Cabeçalho do arquivo '.csv'.
+        :type header: List[str]
+        :param tipos: Tipos das colunas, usados no formato colunar (ver 'CSVEntity.get_column_types').
+        :type tipos: List[type]
+        """
+        Logger.debug('Salvando entidades no arquivo: %s', path)
+
+        writer = CSVParser.__writers.get(path)
+        if writer is None:
+            writer = CSVParser.__writers[path] = CSVStreamWriter(path, header, append=True)
+        writer.write_rows(rows)
+
+        if CSVParser.__database is not None:
+            CSVParser.__database.insert(CSVParser.__table_name(path), header, tipos, rows)
+        if CSVParser.__formato_colunar is not None:
+            colunar = CSVParser.__columnar_path(path)
+            writer = CSVParser.__writers.get(colunar)
+            if writer is None:
+                writer = CSVParser.__writers[colunar] = ColumnarWriter(colunar, header, tipos,
+                                                                       CSVParser.__formato_colunar)
+            writer.write_rows(rows)
 
-        df = pd.DataFrame(rows, columns=header)
-        # quoting 2 = NON_NUMERIC (csv.QUOTE_NON_NUMERIC)
-        df.to_csv(path, sep=',', index=False, encoding='utf-8', quoting=2)
+    @staticmethod
+    @StageProfiler.stage('csv_write')
+    def __write_to_csv(entidades, path: str, header: str, tipos=None):
+        """
+        Salva uma lista de :class:`CsvEntity` num arquivo no formato CSV.
+
+        :param entidades: Lista (ou gerador) de Entidades a serem salvas, percorrida uma única vez.
+        :type entidades: Iterable[CSVEntity]
+        :param path: Caminho absoluto do arquivo '.csv' onde as Entidades devam ser salvas.
+        :type path: str
+        :param header: Cabeçalho do arquivo '.csv'.
+        :type header: List[str]
+        :param tipos: Tipos das colunas, usados no formato colunar (ver 'CSVEntity.get_column_types').
+        :type tipos: List[type]
+        """
+        Logger.debug('Salvando entidades no arquivo: %s', path)
+
+        rows = [entidade.as_row() for entidade in entidades]
+        paths = [path]
+        if CSVParser.__formato_colunar is not None:
+            paths.append(CSVParser.__columnar_path(path))
+        for path in paths:
+            # um arquivo que estava aberto para adição é sobrescrito
+            writer = CSVParser.__writers.pop(path, None)
+            if writer is not None:
+                writer.close()
+
+        with CSVStreamWriter(paths[0], header) as writer:
+            writer.write_rows(rows)
+        if len(paths) > 1:
+            with ColumnarWriter(paths[1], header, tipos, CSVParser.__formato_colunar) as writer:
+                writer.write_rows(rows)
+        if CSVParser.__database is not None:
+            CSVParser.__database.replace(CSVParser.__table_name(paths[0]), header, tipos, rows)
 
     @staticmethod
-    def salvar_periodos(periodos):
+    def salvar_periodos(periodos, append: bool = False):
         """
         Salva uma lista de :class:`Periodo` no arquivo '.csv' (dataset).
 
         :param periodos: Lista de Períodos a serem salvos.
+        :param append: Se verdadeiro, adiciona as Entidades ao final do arquivo ao invés de sobrescrevê-lo.
         """
-        CSVParser.__write_to_csv(periodos, os.path.join(CSVParser.__output_dir, CSVParser.__periodos_csv),
-                                 Periodo.get_csv_header())
+        writer = CSVParser.__append_to_csv if append else CSVParser.__write_to_csv
+        writer(periodos, os.path.join(CSVParser.__output_dir, CSVParser.__periodos_csv),
+               Periodo.get_csv_header(), Periodo.get_column_types())
 
     @staticmethod
-    def salvar_turmas(turmas):
+    def salvar_turmas(turmas, append: bool = False):
         """
         Salva uma lista de :class:`Turma` no arquivo '.csv' (dataset).
 
         :param turmas: Lista de Turmas a serem salvos.
+        :param append: Se verdadeiro, adiciona as Entidades ao final do arquivo ao invés de sobrescrevê-lo.
         """
-        CSVParser.__write_to_csv(turmas, os.path.join(CSVParser.__output_dir, CSVParser.__turmas_csv),
-                                 Turma.get_csv_header())
+        writer = CSVParser.__append_to_csv if append else CSVParser.__write_to_csv
+        writer(turmas, os.path.join(CSVParser.__output_dir, CSVParser.__turmas_csv),
+               Turma.get_csv_header(), Turma.get_column_types())
 
     @staticmethod
-    def salvar_atividades(atividades):
+    def salvar_atividades(atividades, append: bool = False):
         """
         Salva uma lista de :class:`Atividade` no arquivo '.csv' (dataset).
 
         :param atividades: Lista de Atividades a serem salvas.
+        :param append: Se verdadeiro, adiciona as Entidades ao final do arquivo ao invés de sobrescrevê-lo.
         """
-        CSVParser.__write_to_csv(atividades, os.path.join(CSVParser.__output_dir, CSVParser.__atividades_csv),
-                                 Atividade.get_csv_header())
+        writer = CSVParser.__append_to_csv if append else CSVParser.__write_to_csv
+        writer(atividades, os.path.join(CSVParser.__output_dir, CSVParser.__atividades_csv),
+               Atividade.get_csv_header(), Atividade.get_column_types())
 
     @staticmethod
-    def salvar_estudantes(estudantes):
+    def salvar_estudantes(estudantes, append: bool = False):
         """
          Salva uma lista de :class:`Estudante` no arquivo '.csv' (dataset).
 
          :param estudantes: Lista de Estudantes a serem salvos.
+         :param append: Se verdadeiro, adiciona as Entidades ao final do arquivo ao invés de sobrescrevê-lo.
          """
-        CSVParser.__write_to_csv(estudantes, os.path.join(CSVParser.__output_dir, CSVParser.__estudantes_csv),
-                                 Estudante.get_csv_header())
+        writer = CSVParser.__append_to_csv if append else CSVParser.__write_to_csv
+        writer(estudantes, os.path.join(CSVParser.__output_dir, CSVParser.__estudantes_csv),
+               Estudante.get_csv_header(), Estudante.get_column_types())
 
     @staticmethod
     def salvar_execucoes(execucoes):
@@ -130,8 +406,18 @@ class CSVParser:
 
          :param execucoes: Lista de Execucões a serem salvas.
         """
-        CSVParser.__write_execucoes_to_csv(execucoes, os.path.join(CSVParser.__output_dir, CSVParser.__execucoes_csv),
-                                           Execucao.get_csv_header())
+        CSVParser.__append_to_csv(execucoes, os.path.join(CSVParser.__output_dir, CSVParser.__execucoes_csv),
+                                           Execucao.get_csv_header(), Execucao.get_column_types())
+
+    @staticmethod
+    def salvar_execucoes_rows(rows):
+        """
+         Salva uma lista de linhas de :class:`Execucao` (valores retornados por 'as_row') no arquivo '.csv' (dataset).
+
+         :param rows: Lista de linhas das Execucões a serem salvas.
+        """
+        CSVParser.__append_rows_to_csv(rows, os.path.join(CSVParser.__output_dir, CSVParser.__execucoes_csv),
+                                       Execucao.get_csv_header(), Execucao.get_column_types())
 
     @staticmethod
     def salvar_solucoes(solucoes):
@@ -141,15 +427,38 @@ class CSVParser:
          :param solucoes: Lista de Solucões a serem salvas.
         """
         CSVParser.__write_to_csv(solucoes, os.path.join(CSVParser.__output_dir, CSVParser.__solucoes_csv),
-                                 Solucao.get_csv_header())
+                                 Solucao.get_csv_header(), Solucao.get_column_types())
 
     @staticmethod
     def salvar_erros(erros):
         """
-         Salva uma lista de :class:`Erro` no arquivo '.csv' (dataset).
+         Adiciona uma lista de :class:`Erro` ao arquivo '.csv' (dataset).
+
+         Os Erros são acumulados em memória e salvos em lotes, ver 'salvar_erros_rows'.
 
          :param erros: Lista de Erros a serem salvos.
         """
-        CSVParser.__write_to_csv(erros, os.path.join(CSVParser.__output_dir, CSVParser.__erros_csv),
-                                 Erro.get_csv_header())
+        CSVParser.salvar_erros_rows([erro.as_row() for erro in erros])
 
+    @staticmethod
+    def salvar_erros_rows(rows):
+        """
+         Adiciona uma lista de linhas de :class:`Erro` (valores retornados por 'as_row') ao arquivo '.csv' (dataset).
+
+         As linhas são acumuladas em memória e só são escritas no arquivo quando o acumulador atinge o limite
+         de linhas ('__limite_erros') ou quando 'flush_erros' (ou 'close_writers') é chamado.
+
+         :param rows: Lista de linhas dos Erros a serem salvos.
+        """
+        CSVParser.__erros_pendentes.extend(rows)
+        if len(CSVParser.__erros_pendentes) >= CSVParser.__limite_erros:
+            CSVParser.flush_erros()
+
+    @staticmethod
+    def flush_erros():
+        """Escreve no arquivo 'erros.csv' as linhas de :class:`Erro` acumuladas em memória."""
+        if CSVParser.__erros_pendentes:
+            CSVParser.__append_rows_to_csv(CSVParser.__erros_pendentes,
+                                           os.path.join(CSVParser.__output_dir, CSVParser.__erros_csv),
+                                           Erro.get_csv_header(), Erro.get_column_types())
+            CSVParser.__erros_pendentes = []
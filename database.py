@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import os
+import sqlite3
+from datetime import timedelta
+
+from util import Logger
+
+
+class ExtractionDatabase:
+    """
+    Banco de dados SQLite com as Entidades extraídas, gerado junto com os arquivos '.csv'.
+
+    Cada arquivo '.csv' corresponde a uma tabela com as mesmas colunas, chaves primárias naturais nas tabelas de
+    dimensão (ex.: periodo, turma e codigo nos Estudantes), chaves estrangeiras para as tabelas de dimensão e índices
+    para consultas por Estudante e por Exercício. As linhas são inseridas em lotes ('executemany') dentro de
+    transações grandes, com o banco no modo WAL; os índices secundários são criados ao final da carga.
+
+    As Execuções e os Erros não têm uma chave natural única: os logs com sufixo no nome (ex.: '1000_3000_1.log') têm
+    a mesma atividade e exercício do log original. Essas tabelas têm uma chave substituta ('id', na ordem do arquivo
+    '.csv') e um índice (não único) pela chave natural, assim mantêm as mesmas linhas dos arquivos '.csv'.
+
+    As chaves estrangeiras são declaradas mas não verificadas durante a carga (ex.: a extração apenas das Execuções
+    não salva os Estudantes). Nas tabelas de dimensão, linhas com a mesma chave primária substituem as anteriores, e
+    a quantidade de linhas substituídas é registrada no log ao final da carga.
+
+    Os intervalos de tempo (tempo_total, tempo_foco) são salvos em segundos.
+
+    Exemplo de uso:
+        CSVParser.set_database(ExtractionDatabase('csv/codebench.db'))
+        ExtractionPipeline.run('cb_dataset_v1.11/')
+        CSVParser.set_database(None)
+    """
+
+    # quantidade de linhas inseridas numa mesma transação
+    __linhas_por_transacao = 200000
+    # chaves primárias e estrangeiras de cada tabela
+    __chaves = {
+        'periodos': ('PRIMARY KEY (descricao)',),
+        'turmas': ('PRIMARY KEY (periodo, codigo)',
+                   'FOREIGN KEY (periodo) REFERENCES periodos (descricao)'),
+        'atividades': ('PRIMARY KEY (periodo, turma, codigo)',
+                       'FOREIGN KEY (periodo, turma) REFERENCES turmas (periodo, codigo)'),
+        'estudantes': ('PRIMARY KEY (periodo, turma, codigo)',
+                       'FOREIGN KEY (periodo, turma) REFERENCES turmas (periodo, codigo)'),
+        'execucoes': ('FOREIGN KEY (periodo, turma, estudante) REFERENCES estudantes (periodo, turma, codigo)',
+                      'FOREIGN KEY (periodo, turma, atividade) REFERENCES atividades (periodo, turma, codigo)'),
+        'erros': ('FOREIGN KEY (periodo, turma, estudante) REFERENCES estudantes (periodo, turma, codigo)',
+                  'FOREIGN KEY (periodo, turma, atividade) REFERENCES atividades (periodo, turma, codigo)'),
+        'solucoes': ('PRIMARY KEY (codigo)',),
+    }
+    # tabelas sem chave natural única, com a chave substituta 'id' (as linhas são sempre adicionadas)
+    __chaves_substitutas = ('execucoes', 'erros')
+    # índices secundários, criados ao final da carga
+    __indices = {
+        'execucoes': (('periodo', 'turma', 'estudante', 'atividade', 'exercicio'),
+                      ('turma', 'estudante', 'atividade', 'exercicio'), ('estudante',), ('exercicio',)),
+        'erros': (('periodo', 'turma', 'estudante', 'atividade', 'exercicio'),
+                  ('turma', 'estudante', 'atividade', 'exercicio'), ('exercicio', 'tipo')),
+        'estudantes': (('codigo',),),
+    }
+
+    def __init__(self, path: str = os.path.join(os.getcwd(), 'csv', 'codebench.db')):
+        """
+        Método Construtor.
+
+        :param path: Caminho do arquivo do banco de dados (SQLite).
+        """
+        self.path = path
+        self.__conn = None
+        self.__tabelas = {}
+        self.__pendentes = 0
+        # quantidade de linhas inseridas em cada tabela, comparada ao final da carga com as linhas mantidas
+        self.__inseridas = {}
+
+    def __connection(self):
+        """Retorna a conexão com o banco de dados, iniciando uma transação."""
+        if self.__conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.__conn = sqlite3.connect(self.path, isolation_level=None)
+            self.__conn.execute('PRAGMA journal_mode=WAL')
+            self.__conn.execute('PRAGMA synchronous=NORMAL')
+            self.__conn.execute('BEGIN')
+        return self.__conn
+
+    @staticmethod
+    def __sql_type(tipo):
+        """Retorna o tipo SQLite correspondente ao tipo de uma coluna (ver 'CSVEntity.get_column_types')."""
+        if tipo is int or tipo is bool:
+            return 'INTEGER'
+        if tipo is float or tipo is timedelta:
+            return 'REAL'
+        return 'TEXT'
+
+    @staticmethod
+    def __convert(tipo):
+        """Retorna a função de conversão dos valores de uma coluna, ou None se eles são salvos como estão."""
+        if tipo is timedelta:
+            return lambda v: None if v is None else v.total_seconds()
+        if tipo is str:
+            return lambda v: v if v is None or isinstance(v, str) else str(v)
+        return None
+
+    def __table(self, tabela: str, header, tipos):
+        """Cria a tabela (caso não exista) e retorna o comando de inserção e as conversões das colunas."""
+        info = self.__tabelas.get(tabela)
+        if info is None:
+            colunas = [f'"{nome}" {ExtractionDatabase.__sql_type(tipo)}' for nome, tipo in zip(header, tipos)]
+            substituta = tabela in ExtractionDatabase.__chaves_substitutas
+            if substituta:
+                colunas.insert(0, 'id INTEGER PRIMARY KEY')
+            restricoes = list(ExtractionDatabase.__chaves.get(tabela, ()))
+            self.__connection().execute(f'CREATE TABLE IF NOT EXISTS {tabela} ({", ".join(colunas + restricoes)})')
+            nomes = ', '.join(f'"{nome}"' for nome in header)
+            comando = 'INSERT' if substituta else 'INSERT OR REPLACE'
+            insert = f'{comando} INTO {tabela} ({nomes}) VALUES ({", ".join("?" * len(header))})'
+            conversoes = [(i, f) for i, f in enumerate(map(ExtractionDatabase.__convert, tipos)) if f is not None]
+            info = self.__tabelas[tabela] = (insert, conversoes)
+        return info
+
+    def insert(self, tabela: str, header, tipos, rows):
+        """
+        Insere as linhas de uma Entidade na tabela.
+
+        :param tabela: Nome da tabela (nome do arquivo '.csv' sem a extensão).
+        :param header: Nomes das colunas.
+        :param tipos: Tipos das colunas (ver 'CSVEntity.get_column_types').
+        :param rows: Linhas com os valores na ordem do cabeçalho.
+        """
+        insert, conversoes = self.__table(tabela, header, tipos)
+        if conversoes:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for i, converter in conversoes:
+                    row[i] = converter(row[i])
+        self.__connection().executemany(insert, rows)
+
+        self.__inseridas[tabela] = self.__inseridas.get(tabela, 0) + len(rows)
+        self.__pendentes += len(rows)
+        if self.__pendentes >= ExtractionDatabase.__linhas_por_transacao:
+            self.commit()
+
+    def replace(self, tabela: str, header, tipos, rows):
+        """Substitui todas as linhas da tabela (arquivos '.csv' sobrescritos), criando a tabela novamente."""
+        self.drop([tabela])
+        self.insert(tabela, header, tipos, rows)
+
+    def drop(self, tabelas):
+        """Remove as tabelas de uma extração anterior, que será gerada novamente."""
+        conn = self.__connection()
+        for tabela in tabelas:
+            conn.execute(f'DROP TABLE IF EXISTS {tabela}')
+            self.__tabelas.pop(tabela, None)
+            self.__inseridas.pop(tabela, None)
+
+    def commit(self):
+        """Conclui a transação atual e inicia uma nova."""
+        if self.__conn is not None:
+            self.__conn.execute('COMMIT')
+            self.__conn.execute('BEGIN')
+            self.__pendentes = 0
+
+    def close(self):
+        """Cria os índices secundários das tabelas carregadas, conclui a transação e fecha o banco de dados."""
+        if self.__conn is None:
+            return
+        try:
+            for tabela, inseridas in self.__inseridas.items():
+                if tabela in ExtractionDatabase.__chaves_substitutas:
+                    continue
+                mantidas = self.__conn.execute(f'SELECT COUNT(*) FROM {tabela}').fetchone()[0]
+                if mantidas < inseridas:
+                    Logger.warn(f'{inseridas - mantidas} linhas com a chave primária repetida foram substituídas na '
+                                f'tabela {tabela}: {self.path}')
+            for tabela in self.__tabelas:
+                for colunas in ExtractionDatabase.__indices.get(tabela, ()):
+                    self.__conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{tabela}_{"_".join(colunas)} '
+                                        f'ON {tabela} ({", ".join(colunas)})')
+            self.__conn.execute('COMMIT')
+            self.__conn.execute('PRAGMA optimize')
+        except sqlite3.Error as e:
+            Logger.warn(f'Erro ao criar os índices do banco de dados, {str(e)}: {self.path}')
+        finally:
+            self.__conn.close()
+            self.__conn = None
+            self.__tabelas = {}
+            self.__pendentes = 0
+            self.__inseridas = {}
+        Logger.info(f'Banco de dados salvo em: {self.path}')
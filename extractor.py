@@ -3,21 +3,40 @@
 ### Universidade Federal do Amazonas - UFAM
 ### Instituto de Computação - IComp
 
+import contextlib
+import io
 import keyword
 import re
 import tokenize
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
+from itertools import compress
 from statistics import mean
 
-from radon.metrics import h_visit
-from radon.raw import analyze
-from radon.visitors import ComplexityVisitor
+import numpy as np
 
+from analysis import CodeAnalysis
 from csv_parser import *
 from model import *
+from profiler import StageProfiler
 from util import Util
 from pathlib import Path
 
+
+def _tamanho_arquivo(path: str, *args):
+    """Retorna o tamanho (em bytes) do arquivo lido por uma etapa da extração, registrado pela instrumentação."""
+    archive = CodebenchExtractor.get_archive()
+    entrada = archive.entry(path) if archive is not None else None
+    return os.path.getsize(path) if entrada is None else entrada.st_size
+
+
+def _tamanho_codigo(codigo):
+    """Retorna o tamanho (em bytes) do Código-Fonte (ou da sua análise) de uma etapa, registrado pela instrumentação."""
+    if isinstance(codigo, CodeAnalysis):
+        codigo = codigo.codigo
+    return len(codigo.encode('utf-8', 'replace'))
+
+
 class CodebenchExtractor:
     """
     Classe Extratora das Entidades do dataset Codebench
@@ -36,6 +55,16 @@ class CodebenchExtractor:
     # limite do intervalo de tempo entre eventos de interação com o CodeMirror duranet a implementação de uma Solução
     # qualquer intervalo maior que o limite abaixo é considerado ociosidade
     __limite_ociosidade = timedelta(minutes=5)
+    # cache das métricas e tokens dos códigos-fonte já analisados (desabilitado quando None)
+    __cache = None
+    # catálogo do dataset, usado no lugar das listagens dos diretórios (desabilitado quando None)
+    __catalog = None
+    # arquivo compactado do dataset, usado no lugar do sistema de arquivos (desabilitado quando None)
+    __archive = None
+    # listagem paralela dos diretórios e leitura dos 'user.data' (desabilitada quando None)
+    __walker = None
+    # diretórios do Estudante atual listados pelo 'walker': path -> {nome: entrada}, ou None se não existe
+    __listagens = {}
 
     __module_token = {
         'import': True,
@@ -129,6 +158,156 @@ class CodebenchExtractor:
         'zip': True,
     }
 
+    @staticmethod
+    def set_cache(cache):
+        """
+        Define o cache (:class:`MetricsCache`) usado para evitar que códigos-fonte idênticos sejam analisados
+        novamente. Se 'cache' for None, as métricas e tokens são sempre extraídos.
+
+        :param cache: O cache das métricas e tokens.
+        :type cache: MetricsCache
+        """
+        CodebenchExtractor.__cache = cache
+
+    @staticmethod
+    def get_cache():
+        """Retorna o cache (:class:`MetricsCache`) das métricas e tokens em uso, ou None se estiver desabilitado."""
+        return CodebenchExtractor.__cache
+
+    @staticmethod
+    def set_catalog(catalog):
+        """
+        Define o catálogo (:class:`DatasetCatalog`) do dataset, usado no lugar das listagens dos diretórios e das
+        verificações de existência dos arquivos. Se 'catalog' for None, o sistema de arquivos é sempre consultado.
+
+        :param catalog: O catálogo do dataset.
+        :type catalog: DatasetCatalog
+        """
+        CodebenchExtractor.__catalog = catalog
+
+    @staticmethod
+    def get_catalog():
+        """Retorna o catálogo (:class:`DatasetCatalog`) do dataset em uso, ou None se estiver desabilitado."""
+        return CodebenchExtractor.__catalog
+
+    @staticmethod
+    def set_archive(archive):
+        """
+        Define o arquivo compactado (:class:`DatasetArchive`) do qual o dataset é lido, usado no lugar das listagens
+        dos diretórios, das verificações de existência e das leituras dos arquivos. Se 'archive' for None, o dataset é
+        lido do sistema de arquivos.
+
+        :param archive: O arquivo compactado do dataset.
+        :type archive: DatasetArchive
+        """
+        CodebenchExtractor.__archive = archive
+
+    @staticmethod
+    def get_archive():
+        """Retorna o arquivo compactado (:class:`DatasetArchive`) em uso, ou None se estiver desabilitado."""
+        return CodebenchExtractor.__archive
+
+    @staticmethod
+    def get_index():
+        """
+        Retorna o índice dos diretórios do dataset em uso, consultado no lugar do sistema de arquivos: o arquivo
+        compactado, o catálogo ou None.
+        """
+        if CodebenchExtractor.__archive is not None:
+            return CodebenchExtractor.__archive
+        return CodebenchExtractor.__catalog
+
+    @staticmethod
+    def set_walker(walker):
+        """
+        Define a listagem paralela (:class:`ParallelWalker`) dos diretórios. Com ela os 'user.data' dos Estudantes de
+        uma Turma são lidos ao mesmo tempo, e os diretórios de execuções, do CodeMirror e de códigos de cada Estudante
+        são listados ao mesmo tempo, no lugar das verificações de existência de cada arquivo. Se 'walker' for None, os
+        diretórios e arquivos são consultados um por vez.
+
+        :param walker: A listagem paralela dos diretórios.
+        :type walker: ParallelWalker
+        """
+        CodebenchExtractor.__walker = walker
+        CodebenchExtractor.__listagens = {}
+
+    @staticmethod
+    def get_walker():
+        """Retorna a listagem paralela (:class:`ParallelWalker`) em uso, ou None se estiver desabilitada."""
+        return CodebenchExtractor.__walker
+
+    @staticmethod
+    def __scandir(path: str):
+        """
+        Lista as entradas de um diretório a partir do arquivo compactado ou do catálogo (se definidos), das listagens
+        do 'walker' ou do sistema de arquivos.
+        """
+        indice = CodebenchExtractor.get_index()
+        if indice is not None:
+            entradas = indice.scandir(path)
+            if entradas is not None:
+                return contextlib.nullcontext(entradas)
+        if path in CodebenchExtractor.__listagens:
+            entradas = CodebenchExtractor.__listagens[path]
+            if entradas is None:
+                raise FileNotFoundError(f'Diretório não encontrado: {path}')
+            return contextlib.nullcontext(entradas.values())
+        return os.scandir(path)
+
+    @staticmethod
+    def __exists(path: str):
+        """
+        Verifica se um arquivo existe, a partir do arquivo compactado ou do catálogo (se definidos), das listagens do
+        'walker' ou do sistema de arquivos.
+        """
+        indice = CodebenchExtractor.get_index()
+        if indice is not None:
+            return indice.exists(path)
+        diretorio, nome = os.path.split(path)
+        if diretorio in CodebenchExtractor.__listagens:
+            entradas = CodebenchExtractor.__listagens[diretorio]
+            return entradas is not None and nome in entradas
+        return os.path.exists(path)
+
+    @staticmethod
+    def __sorted(entradas):
+        """
+        Ordena as entradas dos Períodos ou das Turmas pelo nome (numérico, se for o caso). A ordem do 'os.scandir'
+        depende do sistema de arquivos, assim a mesma ordem é obtida em qualquer máquina, como exige a união dos
+        shards de uma extração distribuída. No arquivo compactado é mantida a ordem do próprio arquivo, que é a mesma
+        em qualquer máquina e evita uma nova leitura do '.tar.gz' desde o início.
+        """
+        if CodebenchExtractor.__archive is not None:
+            return list(entradas)
+        return sorted(entradas, key=lambda e: (0, int(e.name), '') if e.name.isdigit() else (1, 0, e.name))
+
+    @staticmethod
+    def __open(path: str, mode: str = 'rb', encoding: str = None):
+        """Abre um arquivo para leitura, a partir do arquivo compactado (se definido) ou do sistema de arquivos."""
+        if CodebenchExtractor.__archive is not None:
+            return CodebenchExtractor.__archive.open(path, mode, encoding)
+        return open(path, mode, encoding=encoding)
+
+    @staticmethod
+    def __cached(kind: str, codigo: str, extract, *args):
+        """
+        Consulta o cache antes de executar a função de extração 'extract', salvando o seu resultado no cache.
+
+        :param kind: Tipo do valor extraído ('metricas' ou 'tokens').
+        :param codigo: Código-fonte analisado (texto ou bytes), usado como chave do cache.
+        :param extract: Função de extração das métricas ou tokens.
+        :param args: Argumentos da função de extração.
+        :return: O valor salvo no cache ou o resultado da função de extração.
+        """
+        cache = CodebenchExtractor.__cache
+        if cache is None:
+            return extract(*args)
+        valor = cache.get(kind, codigo)
+        if valor is None:
+            valor = extract(*args)
+            cache.put(kind, codigo, valor)
+        return valor
+
     @staticmethod
     def __is_import_token(t: tokenize.TokenInfo):
         if t.start[1] == 0:
@@ -154,8 +333,8 @@ class CodebenchExtractor:
         """
         periodos = []
         # recupera todas as 'entradas' (arquivos ou pastas) no caminho informado (path).
-        with os.scandir(path) as entries:
-            for folder in entries:
+        with CodebenchExtractor.__scandir(path) as entries:
+            for folder in CodebenchExtractor.__sorted(entries):
                 #with os.scandir(entry.path) as folders:
                 #for folder in folders:
                 Logger.info(f'Extraindo informações de Perído: {folder.name}')
@@ -179,12 +358,12 @@ class CodebenchExtractor:
         :type turma: Turma
         """
         # coleta todas os arquivos/pastas no diretório informado (diretório de atividades da turma)
-        with os.scandir(path) as entries:
+        with CodebenchExtractor.__scandir(path) as entries:
             for entry in entries:
                 # se a 'entrada' for um arquivo de extensão '.data' então corresponde atividade
                 if entry.is_file() and entry.path.endswith(CodebenchExtractor.__atividade_file_extension):
-                    with open(entry.path, 'rb') as f:
-                        Logger.info(f'Extraindo descrição da Turma no arquivo: {entry.path}')
+                    with CodebenchExtractor.__open(entry.path, 'rb') as f:
+                        Logger.debug('Extraindo descrição da Turma no arquivo: %s', entry.path)
                         line = f.readline().decode('utf-8')
                         while line:
                             # ---- class name: Introdução à Programação de Computadores
@@ -212,12 +391,31 @@ class CodebenchExtractor:
                 print(turma)
             ...
 
+        :param periodo: O Período letivo do qual devem ser recuperadas as Turmas.
+        :type periodo: Periodo
+        """
+        periodo.turmas.extend(CodebenchExtractor.iter_turmas(periodo))
+
+    @staticmethod
+    def iter_turmas(periodo: Periodo):
+        """
+        Retorna (yield) cada :class:`Turma` de um :class:`Período` letivo, junto com as suas Atividades, assim que
+        ela é extraída.
+
+        Ao contrário de 'extract_turmas', as turmas não são salvas no período, assim podem ser descartadas logo após
+        serem processadas.
+
+        Exemplo de uso:
+            for turma in CodebenchExtractor.iter_turmas(periodo):
+                print(turma)
+            ...
+
         :param periodo: O Período letivo do qual devem ser recuperadas as Turmas.
         :type periodo: Periodo
         """
         # coleta todas os arquivos/pastas dentro do diretório do período.
-        with os.scandir(periodo.path) as folders:
-            for folder in folders:
+        with CodebenchExtractor.__scandir(periodo.path) as folders:
+            for folder in CodebenchExtractor.__sorted(folders):
                 # se a 'entrada' for uma diretório (pasta) então corresponde a uma 'turma'
                 if folder.is_dir():
                     Logger.info(f'Extraindo informações de Turma: {folder.name} {periodo.descricao}')
@@ -226,14 +424,15 @@ class CodebenchExtractor:
                     CodebenchExtractor.__extract_turma_descricao_from_file(os.path.join(folder.path, 'assessments'), turma)
 
 
-                    with os.scandir(os.path.join(turma.path, 'assessments')) as folders:
+                    with CodebenchExtractor.__scandir(os.path.join(turma.path, 'assessments')) as folders:
                         for folder in folders:
                             atividade = Atividade(turma, Path(folder.name).stem, folder.path)
                             CodebenchExtractor.__extract_atividade_info_from_file(folder.path, atividade)
                             turma.atividades.append(atividade)
-                    periodo.turmas.append(turma)
+                    yield turma
 
     @staticmethod
+    @StageProfiler.stage('extract_atividade_info_from_file', _tamanho_arquivo)
     def __extract_atividade_info_from_file(path: str, atividade: Atividade):
         """
         Recupera as informações da :class:`Atividade` de um arquivo ('.data').
@@ -245,8 +444,8 @@ class CodebenchExtractor:
         :param atividade: Objeto que irá armazenar as informações retiradas do arquivo.
         :type atividade: Atividade
         """
-        with open(path, 'rb') as f:
-            Logger.info(f'Extraindo informações da Atividade no arquivo: {path}')
+        with CodebenchExtractor.__open(path, 'rb') as f:
+            Logger.debug('Extraindo informações da Atividade no arquivo: %s', path)
             for line in f.readlines():
                 line = line.decode('utf-8')
                 if line.startswith('---- as'):
@@ -300,17 +499,18 @@ class CodebenchExtractor:
         :type turma: Turma
         """
         # coleta todas os arquivos/pastas dentro do diretório de atividades da turma
-        with os.scandir(os.path.join(turma.path, 'assessments')) as arquivos:
+        with CodebenchExtractor.__scandir(os.path.join(turma.path, 'assessments')) as arquivos:
             for arquivo in arquivos:
                 # se a 'entrada' for um arquivo de extensão '.data', então corresponde a uma atividade.
                 if arquivo.is_file() and arquivo.path.endswith(CodebenchExtractor.__atividade_file_extension):
-                    Logger.info(f'Extraindo informações de Atividade: {arquivo.name}')
+                    Logger.debug('Extraindo informações de Atividade: %s', arquivo.name)
                     code = int(arquivo.path.split(os.path.sep)[-1].replace(CodebenchExtractor.__atividade_file_extension, ''))
                     atividade = Atividade(turma, code, arquivo.path)
                     CodebenchExtractor.__extract_atividade_info_from_file(arquivo.path, atividade)
                     turma.atividades.append(atividade)
 
     @staticmethod
+    @StageProfiler.stage('extract_estudante_info_from_file', _tamanho_arquivo)
     def __extract_estudante_info_from_file(path: str, estudante: Estudante):
         """
         Extrai as informações referentes ao :class:`Estudante` do arquivo 'user.data'.
@@ -322,8 +522,8 @@ class CodebenchExtractor:
         :param estudante: Objeto que irá armazenar as informações retiradas do arquivo.
         :type estudante: Estudante
         """
-        with open(path, 'rb') as f:
-            Logger.info(f'Extraindo informações do Estudante no arquivo: {path}')
+        with CodebenchExtractor.__open(path, 'rb') as f:
+            Logger.debug('Extraindo informações do Estudante no arquivo: %s', path)
             dict_obj = {}
 
             data = []
@@ -386,25 +586,57 @@ class CodebenchExtractor:
                 print(estudante)
             ...
 
+        :param turma: A Turma (disciplina) na qual os Estudantes estão matriculados.
+        :type turma: Turma
+        """
+        turma.estudantes.extend(CodebenchExtractor.iter_estudantes(turma))
+
+    @staticmethod
+    def iter_estudantes(turma: Turma):
+        """
+        Retorna (yield) cada :class:`Estudante` de uma :class:`Turma` assim que ele é extraído.
+
+        Ao contrário de 'extract_estudantes', os estudantes não são salvos na turma, assim podem ser descartados
+        logo após serem processados.
+
+        Exemplo de uso:
+            for estudante in CodebenchExtractor.iter_estudantes(turma):
+                print(estudante)
+            ...
+
         :param turma: A Turma (disciplina) na qual os Estudantes estão matriculados.
         :type turma: Turma
         """
         # coleta todas os arquivos/pastas no diretório de 'estudantes' informado
-        with os.scandir(os.path.join(turma.path, 'users')) as folders:
+        with CodebenchExtractor.__scandir(os.path.join(turma.path, 'users')) as folders:
+            # se a 'entrada' for um diretório, então corresponde a pasta de um 'estudante'.
+            folders = [folder for folder in folders if folder.is_dir()]
+
+        walker = CodebenchExtractor.__walker
+        if walker is not None:
+            # os 'user.data' são lidos em paralelo, mas os estudantes são retornados na ordem da listagem
+            yield from walker.map(lambda folder: CodebenchExtractor.__new_estudante(turma, folder), folders)
+        else:
             for folder in folders:
-                # se a 'entrada' for um diretório, então corresponde a pasta de um 'estudante'.
-                if folder.is_dir():
-                    Logger.info(f'Extraindo informações do Estudante: {folder.name}')
-                    estudante = Estudante(turma.periodo, turma, int(folder.name), folder.path)
-                    CodebenchExtractor.__extract_estudante_info_from_file(
-                        os.path.join(folder.path, CodebenchExtractor.__estudante_file_name), estudante)
-                    turma.estudantes.append(estudante)
+                yield CodebenchExtractor.__new_estudante(turma, folder)
+
+    @staticmethod
+    def __new_estudante(turma: Turma, folder):
+        """Cria o :class:`Estudante` de um diretório da Turma, com as informações do seu arquivo 'user.data'."""
+        Logger.debug('Extraindo informações do Estudante: %s', folder.name)
+        estudante = Estudante(turma.periodo, turma, int(folder.name), folder.path)
+        CodebenchExtractor.__extract_estudante_info_from_file(
+            os.path.join(folder.path, CodebenchExtractor.__estudante_file_name), estudante)
+        return estudante
 
     @staticmethod
-    def __extract_code_metrics(codigo: str):
+    @StageProfiler.stage('extract_code_metrics', _tamanho_codigo)
+    def __extract_code_metrics(codigo):
         """
         Recupera as métricas de um código Python.
 
+        A AST e os tokens do código são obtidos uma única vez (:class:`CodeAnalysis`) e compartilhados pelas métricas.
+
         McCabe's (Complexidade)
             - complexity: Complexidade Total
             - n_classes: Quantidade de Classes
@@ -431,17 +663,18 @@ class CodebenchExtractor:
             - time: Tempo (T = E / 18 segundos)
             - bugs: Bugs (B = V / 3000), estivativa de erros na implementação
 
-        :param codigo: String com o Código-Fonte.
-        :type codigo: str
+        :param codigo: String com o Código-Fonte ou a sua análise (CodeAnalysis).
+        :type codigo: str | CodeAnalysis
         :return: As métricas que puderam ser extraídas do código.
         """
+        analise = codigo if isinstance(codigo, CodeAnalysis) else CodeAnalysis(codigo)
         metricas = Metricas(None)
-        v = ComplexityVisitor.from_code(codigo)
+        v = analise.complexity()
         metricas.complexity = v.complexity
         metricas.n_functions = len(v.functions)
         metricas.n_classes = len(v.functions)
 
-        a = analyze(codigo)
+        a = analise.raw()
         metricas.loc = a.loc
         metricas.lloc = a.lloc
         metricas.sloc = a.sloc
@@ -450,7 +683,7 @@ class CodebenchExtractor:
         metricas.comments = a.comments
         metricas.single_comments = a.single_comments
 
-        h = h_visit(codigo)
+        h = analise.halstead()
         metricas.h1 = h.total.h1
         metricas.h2 = h.total.h2
         metricas.N1 = h.total.N1
@@ -467,6 +700,7 @@ class CodebenchExtractor:
         return metricas
 
     @staticmethod
+    @StageProfiler.stage('extract_solution_interval', _tamanho_arquivo)
     def __extract_solution_interval(path: str, execucao: Execucao):
         """
         Calcula os tempos de implementação e interação utilizando como limites os intervalos definidos na Atividade.
@@ -475,13 +709,17 @@ class CodebenchExtractor:
 
         O tempo de interação é o tempo total gasto pelo usuário interagindo com o editor do CodeMirror.
 
+        Os eventos do log são lidos de uma só vez em arrays do NumPy. Os trechos em foco (de um evento 'focus' até o
+        próximo 'blur') são localizados e os intervalos entre eventos, o limite de ociosidade e as somas dos tempos
+        são calculados de forma vetorizada.
+
         :param path: Caminho absoluto do arquivo de 'log' com as informações do CodeMirror.
         :type path: str
         :param execucao: Objeto que irá armazenar as informações obtidas do arquivo de 'log' do CodeMirror.
         :type execucao: Execucao
         """
-        with open(path, 'rU', encoding='utf-8') as f:
-            Logger.info(f'Calculando tempos des implementação e interação: {path}')
+        with CodebenchExtractor.__open(path, 'r', encoding='utf-8') as f:
+            Logger.debug('Calculando tempos des implementação e interação: %s', path)
             # datas de inicio e termino da atividade, servem como limites para o calculo do tempo e solução
             atividade_data_inicio = datetime.strptime(execucao.atividade.data_inicio, '%Y-%m-%d %H:%M')
             atividade_data_fim = datetime.strptime(execucao.atividade.data_termino, '%Y-%m-%d %H:%M')
@@ -491,57 +729,127 @@ class CodebenchExtractor:
                 atividade_data_inicio -= timedelta(hours=2)
                 atividade_data_fim += timedelta(hours=2)
 
-            execucao.tempo_total = timedelta(0)
-            execucao.tempo_foco = timedelta(0)
-
-            # percorremos o arquivo de log até os eventos terem um datetime maior que o do inicio da atividade
-            line = f.readline()
-            at_open = True
-            while line and at_open:
-                event_datetime, event_name, event_msg = CodebenchExtractor.__get_event_info(line)
-                if event_name == 'focus' and event_datetime and (event_datetime >= atividade_data_inicio):
-                    last_interaction = event_datetime
-                    line = f.readline()
-                    while line and event_name != 'blur':
-                        next_interaction, event_name, event_msg = CodebenchExtractor.__get_event_info(line)
-                        if next_interaction:
-                            if next_interaction > atividade_data_fim:
-                                at_open = False
-                                break
-                            intervalo = next_interaction - last_interaction
-                            execucao.tempo_total += intervalo
-                            if intervalo <= CodebenchExtractor.__limite_ociosidade:
-                                execucao.tempo_foco += intervalo
-                            last_interaction = next_interaction
-                        line = f.readline()
-                line = f.readline()
+            atividade_data_inicio = CodebenchExtractor.__to_microseconds(atividade_data_inicio)
+            atividade_data_fim = CodebenchExtractor.__to_microseconds(atividade_data_fim)
+            limite_ociosidade = CodebenchExtractor.__limite_ociosidade // timedelta(microseconds=1)
+
+            linhas, instantes, nomes = CodebenchExtractor.__read_events(f)
+
+        # apenas os eventos com data válida são considerados, 'linhas' guarda a posição de cada um deles no arquivo
+        focus = np.flatnonzero((nomes == 'focus') & (instantes >= atividade_data_inicio)).tolist()
+        blur = np.flatnonzero(nomes == 'blur').tolist()
+        apos_termino = np.flatnonzero(instantes > atividade_data_fim).tolist()
+        linhas = linhas.tolist()
+
+        # percorremos o log a partir do primeiro 'focus' após o inicio da atividade até o próximo 'blur', o cálculo é
+        # encerrado no primeiro evento após o término da atividade. Como no log original, a linha seguinte a cada
+        # 'blur' não é analisada.
+        inicios, fins = [], []
+        proximo = 0
+        while True:
+            k = bisect_left(focus, proximo)
+            if k == len(focus):
+                break
+            inicio = focus[k]
+            k = bisect_right(blur, inicio)
+            fim = blur[k] if k < len(blur) else len(linhas) - 1
+            t = bisect_right(apos_termino, inicio)
+            if t < len(apos_termino) and apos_termino[t] <= fim:
+                inicios.append(inicio)
+                fins.append(apos_termino[t] - 1)
+                break
+            inicios.append(inicio)
+            fins.append(fim)
+            if k == len(blur):
+                break
+            proximo = bisect_left(linhas, linhas[fim] + 2)
+
+        # somas acumuladas dos intervalos entre eventos consecutivos, o tempo de cada trecho é a diferença entre elas
+        intervalos = np.diff(instantes)
+        tempo_total = np.concatenate(([0], np.cumsum(intervalos)))
+        tempo_foco = np.concatenate(([0], np.cumsum(np.where(intervalos <= limite_ociosidade, intervalos, 0))))
+        inicios, fins = np.array(inicios, dtype=np.intp), np.array(fins, dtype=np.intp)
+
+        execucao.tempo_total = timedelta(microseconds=int((tempo_total[fins] - tempo_total[inicios]).sum()))
+        execucao.tempo_foco = timedelta(microseconds=int((tempo_foco[fins] - tempo_foco[inicios]).sum()))
 
     @staticmethod
-    def __get_event_info(log_line: str):
+    def __read_events(f):
         """
-        Recebe uma linha de entrada do arquivo de logs do CodeMirro e retorna uma Tupla com:
+        Lê todos os eventos de um arquivo de log do CodeMirror.
 
-        - A Data e Hora do evento
-        - Nome do evento (tipo)
-        - Mensagem do evento (texto)
+        Cada linha do log possui a Data e Hora, o Nome (tipo) e a Mensagem do evento, separados por '#'. As linhas
+        cuja data é inválida são descartadas.
 
-        :param log_line: 
-        :return: Tupla com data, nome, mensagem.
+        :param f: O arquivo de log aberto para leitura.
+        :return: Tupla com os arrays da posição (linha) no arquivo, do instante (em microssegundos) e do nome de cada
+            evento válido.
         """
-        date, name, msg = None, '', ''
+        datas, nomes = [], []
+        for line in f:
+            date, _, line = line.partition('#')
+            datas.append(date)
+            nomes.append(line.partition('#')[0])
+
+        instantes = np.zeros(len(datas), dtype=np.int64)
+        validos = np.zeros(len(datas), dtype=bool)
+        # as datas no formato do Codebench são convertidas de uma só vez pelo NumPy, as demais uma a uma
+        rapidas = np.array([CodebenchExtractor.__is_codebench_timestamp(date) for date in datas], dtype=bool)
         try:
-            date, _, log_line = log_line.partition('#')
-            name, _, msg = log_line.partition('#')
-            # data e hora do evento desconsiderando os milisegundos
-            date = datetime.strptime(date, '%Y-%m-%d %H:%M:%S.%f')
-        except Exception:
-            date = None
-            name = ''
-            msg = ''
+            instantes[rapidas] = (np.array(list(compress(datas, rapidas)), dtype='datetime64[us]').astype(np.int64) +
+                                  CodebenchExtractor.__to_microseconds(datetime(1970, 1, 1)))
+            validos[rapidas] = True
+            restantes = np.flatnonzero(~rapidas).tolist()
+        except ValueError:
+            restantes = range(len(datas))
+        for i in restantes:
+            instante = CodebenchExtractor.__parse_event_timestamp(datas[i])
+            if instante is not None:
+                instantes[i] = instante
+                validos[i] = True
+
+        linhas = np.flatnonzero(validos)
+        return linhas, instantes[linhas], np.array(nomes, dtype=object)[linhas]
 
-        return date, name, msg
+    @staticmethod
+    def __is_codebench_timestamp(date: str):
+        """Verifica se a data e hora de um evento está no formato gravado pelo Codebench: 'AAAA-MM-DD hh:mm:ss.fff'."""
+        return (len(date) == 23 and date[10] == ' ' and date[13] == ':' and date[16] == ':' and date[19] == '.' and
+                date[20:].isdigit() and date.isascii() and date[:4] != '0000')
 
     @staticmethod
+    def __parse_event_timestamp(date: str):
+        """
+        Converte a data e hora de um evento do CodeMirror ('%Y-%m-%d %H:%M:%S.%f') no instante em microssegundos.
+
+        As datas gravadas pelo Codebench possuem formato fixo e são convertidas pelo 'datetime.fromisoformat', muito
+        mais rápido que o 'datetime.strptime'. Datas fora deste formato ainda são convertidas pelo 'datetime.strptime'.
+
+        Exemplo de uso:
+            CodebenchExtractor.__parse_event_timestamp('2017-03-01 08:00:01.500')
+
+        :param date: Texto com a data e hora do evento.
+        :return: O instante do evento em microssegundos, ou None se a data for inválida.
+        """
+        if CodebenchExtractor.__is_codebench_timestamp(date):
+            try:
+                return CodebenchExtractor.__to_microseconds(datetime.fromisoformat(date))
+            except ValueError:
+                pass
+
+        try:
+            return CodebenchExtractor.__to_microseconds(datetime.strptime(date, '%Y-%m-%d %H:%M:%S.%f'))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def __to_microseconds(date: datetime):
+        """Converte uma data e hora no instante em microssegundos, contados a partir de 01/01/0001."""
+        return ((date.toordinal() * 86400 + (date.hour * 60 + date.minute) * 60 + date.second) * 1000000 +
+                date.microsecond)
+
+    @staticmethod
+    @StageProfiler.stage('extract_executions_count', _tamanho_arquivo)
     def __extract_executions_count(path: str, execucao: Execucao):
         """
         Recupera as informações de submissões, testes e erros do arquivo de 'log' das tentativas de solução de um exercício.
@@ -554,7 +862,7 @@ class CodebenchExtractor:
         :type execucao: model.Execucao
         """
         error_names = []
-        with open(path, 'r', encoding='latin-1') as f:
+        with CodebenchExtractor.__open(path, 'r', encoding='latin-1') as f:
             execucao.n_submissoes = 0
             execucao.n_testes = 0
             execucao.n_erros = 0
@@ -605,17 +913,18 @@ class CodebenchExtractor:
                     if execucao.nota_final > 99.99:
                         code = ''.join(lines[code_start_line:code_end_line])
                         execucao.acertou = True
+                        analise = CodeAnalysis(code)
                         try:
-                            execucao.metricas = CodebenchExtractor.__extract_code_metrics(code)
+                            execucao.metricas = CodebenchExtractor.__cached('metricas', code,
+                                                                      CodebenchExtractor.__extract_code_metrics, analise)
                         except Exception as e:
                             execucao.nota_final = 0.0
                             execucao.acertou = False
                             execucao.metricas = None
                             Logger.error(f'Erro ao extrair métricas do log de execucoes, {str(e)}: {path}')
                         try:
-                            with open('temp.py', 'w', encoding='latin-1') as temp:
-                                temp.write(code)
-                            execucao.tokens = CodebenchExtractor.__extract_code_tokens('temp.py')
+                            execucao.tokens = CodebenchExtractor.__cached('tokens', code,
+                                                                    CodebenchExtractor.__extract_code_tokens, analise)
                         except Exception as e:
                             execucao.nota_final = 0.0
                             execucao.acertou = False
@@ -640,9 +949,7 @@ class CodebenchExtractor:
                             i += 1
                 i += 1
 
-        erros_count = Util.count_errors(error_names, execucao)
-        if len(erros_count):
-            CSVParser.salvar_erros(erros_count)
+        execucao.erros = Util.count_errors(error_names, execucao)
 
     @staticmethod
     def extract_execucoes(estudante: Estudante):
@@ -667,15 +974,44 @@ class CodebenchExtractor:
         :param estudante: O estudante cujas execuções devem ser recuperadas.
         :type estudante: Estudante
         """
+        estudante.execucoes.extend(CodebenchExtractor.iter_execucoes(estudante))
+
+    @staticmethod
+    def iter_execucoes(estudante: Estudante, com_arquivo: bool = False):
+        """
+        Retorna (yield) cada :class:`Execucao` de um :class:`Estudante` assim que ela é extraída (um arquivo de 'log'
+        por vez).
+
+        Ao contrário de 'extract_execucoes', as execuções não são salvas no estudante, assim podem ser salvas no
+        dataset e descartadas em seguida, e a memória usada fica limitada aos 'logs' de um único exercício.
+
+        Exemplo de uso:
+            for execucao in CodebenchExtractor.iter_execucoes(estudante):
+                print(execucao)
+            ...
+
+        :param estudante: O estudante cujas execuções devem ser recuperadas.
+        :type estudante: Estudante
+        :param com_arquivo: Se verdadeiro, retorna tuplas (caminho do arquivo de 'log' lido, execução).
+        :type com_arquivo: bool
+        """
         # transforma a lista de atividades da turma num dicionário, utilizando o código da turma como 'chave' (key)
         # isto facilita a obtenção do intervalo da atividade no cálculo dos tempos de implementação e interação
         atividades = {a.codigo: a for a in estudante.turma.atividades}
+        walker = CodebenchExtractor.__walker
+        if walker is not None and CodebenchExtractor.get_index() is None:
+            # os diretórios de execuções, do CodeMirror e de códigos são listados ao mesmo tempo, e as verificações
+            # de existência dos arquivos do Estudante consultam as listagens (apenas as do Estudante atual são mantidas)
+            diretorios = [os.path.join(estudante.path, d) for d in ('executions', 'codemirror', 'codes')]
+            CodebenchExtractor.__listagens = {
+                path: None if entradas is None else {e.name: e for e in entradas}
+                for path, entradas in walker.scandir_many(diretorios)}
         # coleta todas os arquivos/pastas dentro do diretório de execuções do aluno
-        with os.scandir(os.path.join(estudante.path, 'executions')) as arquivos:
+        with CodebenchExtractor.__scandir(os.path.join(estudante.path, 'executions')) as arquivos:
             for arquivo in arquivos:
                 # se a 'entrada' for um arquivo de extensão '.log', então corresponde as execuções de uma questão.
                 if arquivo.is_file() and arquivo.path.endswith(CodebenchExtractor.__codemirror_file_extension):
-                    Logger.info(f'Extraindo informações de Execução: {arquivo.name}')
+                    Logger.debug('Extraindo informações de Execução: %s', arquivo.name)
                     # divide o nome do arquivo obtendo os códigos da atividade e exercício.
                     atividade_code, exercicio_code, *_ = arquivo.name.replace(
                         CodebenchExtractor.__codemirror_file_extension, '').split('_')
@@ -685,32 +1021,40 @@ class CodebenchExtractor:
                     CodebenchExtractor.__extract_executions_count(arquivo.path, execucao)
 
                     codemirror_file = os.path.join(estudante.path, 'codemirror', arquivo.name)
-                    if os.path.exists(codemirror_file):
+                    if CodebenchExtractor.__exists(codemirror_file):
                         CodebenchExtractor.__extract_solution_interval(codemirror_file, execucao)
                     else:
-                        Logger.warn(f'Arquivo de execução não encontrado: {codemirror_file}')
+                        Logger.warn('Arquivo de execução não encontrado: %s', codemirror_file)
 
                     if not execucao.metricas or not execucao.tokens:
                         code_file = arquivo.name.replace(CodebenchExtractor.__codemirror_file_extension,
                                                          CodebenchExtractor.__exercices_file_extension)
                         code_file = os.path.join(estudante.path, 'codes', code_file)
-                        if os.path.exists(code_file):
-                            try:
-                                with open(code_file) as f:
-                                    codigo = ''.join(f.readlines())
-                                execucao.metricas = CodebenchExtractor.__extract_code_metrics(codigo)
-                            except Exception as e:
-                                execucao.metricas = None
-                                Logger.error(f'Erro ao extrair métricas do arquivo, {str(e)}: {code_file}')
+                        if CodebenchExtractor.__exists(code_file):
                             try:
-                                execucao.tokens = CodebenchExtractor.__extract_code_tokens(code_file)
+                                codigo = CodebenchExtractor.__read_source(code_file)
+                                analise = CodeAnalysis(codigo)
                             except Exception as e:
-                                execucao.tokens = None
-                                Logger.error(f'Erro ao extrair tokens do arquivo, {str(e)}: {code_file}')
+                                # um Código-Fonte que não pode ser lido ou decodificado é ignorado, como os demais erros
+                                codigo = execucao.metricas = execucao.tokens = None
+                                Logger.error(f'Erro ao ler o arquivo, {str(e)}: {code_file}')
+                            if codigo is not None:
+                                try:
+                                    execucao.metricas = CodebenchExtractor.__cached(
+                                        'metricas', codigo, CodebenchExtractor.__extract_code_metrics, analise)
+                                except Exception as e:
+                                    execucao.metricas = None
+                                    Logger.error(f'Erro ao extrair métricas do arquivo, {str(e)}: {code_file}')
+                                try:
+                                    execucao.tokens = CodebenchExtractor.__cached(
+                                        'tokens', codigo, CodebenchExtractor.__extract_code_tokens, analise)
+                                except Exception as e:
+                                    execucao.tokens = None
+                                    Logger.error(f'Erro ao extrair tokens do arquivo, {str(e)}: {code_file}')
                         else:
-                            Logger.warn(f'Arquivo de código fonte não encontrado: {code_file}')
+                            Logger.warn('Arquivo de código fonte não encontrado: %s', code_file)
 
-                    estudante.execucoes.append(execucao)
+                    yield (arquivo.path, execucao) if com_arquivo else execucao
 
     @staticmethod
     def extract_solucoes(path: str):
@@ -732,17 +1076,19 @@ class CodebenchExtractor:
         """
         solucoes = []
         # coleta todas os arquivos/pastas dentro do diretório de execuções do aluno
-        with os.scandir(path) as arquivos:
+        with CodebenchExtractor.__scandir(path) as arquivos:
             for arquivo in arquivos:
                 # se a 'entrada' for um arquivo de extensão '.code', então corresponde as execuções de uma questão.
                 if arquivo.is_file() and arquivo.path.endswith(CodebenchExtractor.__solution_extension):
-                    Logger.info(f'Extraindo métricas da Solução: {arquivo.path}')
+                    Logger.debug('Extraindo métricas da Solução: %s', arquivo.path)
                     solucao = Solucao(int(arquivo.name.replace(CodebenchExtractor.__solution_extension, '')))
-                    with open(arquivo.path, 'rU') as f:
-                        codigo = ''.join(f.readlines())
                     try:
-                        solucao.metricas = CodebenchExtractor.__extract_code_metrics(codigo)
-                        solucao.tokens = CodebenchExtractor.__extract_code_tokens(arquivo.path)
+                        codigo = CodebenchExtractor.__read_source(arquivo.path)
+                        analise = CodeAnalysis(codigo)
+                        solucao.metricas = CodebenchExtractor.__cached('metricas', codigo,
+                                                                    CodebenchExtractor.__extract_code_metrics, analise)
+                        solucao.tokens = CodebenchExtractor.__cached('tokens', codigo,
+                                                                  CodebenchExtractor.__extract_code_tokens, analise)
                         solucoes.append(solucao)
                     except Exception as e:
                         Logger.error(f'Não foi possível extrair métricas e tokens do códigodo instrutor: {arquivo.path}')
@@ -750,11 +1096,40 @@ class CodebenchExtractor:
         return solucoes
 
     @staticmethod
-    def __extract_code_tokens(path: str):
+    @StageProfiler.stage('read_source', _tamanho_arquivo)
+    def __read_source(path: str):
         """
-        Extrai e contabiliza Tokens de um arquivo de Código-Fonte Python.
+        Lê um arquivo de Código-Fonte Python uma única vez, decodificando-o da mesma forma que o 'tokenize.open'
+        (codificação declarada no arquivo ou 'utf-8') e normalizando as quebras de linha.
 
         :param path: Caminho absoluto para o arquivo de Código-Fonte Python.
+        :return: O Código-Fonte (texto).
+        """
+        with CodebenchExtractor.__open(path, 'rb') as f:
+            source = f.read()
+        return CodebenchExtractor.__decode_source(source)
+
+    @staticmethod
+    def __decode_source(source: bytes):
+        """
+        Decodifica os bytes de um Código-Fonte Python segundo a codificação declarada (PEP 263) ou 'utf-8'.
+
+        :param source: Bytes do Código-Fonte.
+        :return: O Código-Fonte (texto) com as quebras de linha normalizadas para '\\n'.
+        """
+        encoding, _ = tokenize.detect_encoding(io.BytesIO(source).readline)
+        return source.decode(encoding).replace('\r\n', '\n').replace('\r', '\n')
+
+    @staticmethod
+    @StageProfiler.stage('extract_code_tokens', _tamanho_codigo)
+    def __extract_code_tokens(codigo):
+        """
+        Extrai e contabiliza Tokens de um Código-Fonte Python em memória.
+
+        Os tokens são lidos diretamente do texto (ou bytes) do código, sem a necessidade de um arquivo em disco. Se
+        for informada uma análise (:class:`CodeAnalysis`), a sua lista de tokens é reaproveitada.
+
+        :param codigo: O Código-Fonte Python (texto ou bytes) ou a sua análise (CodeAnalysis).
         :return: Objeto CodeTokens com a contagem de tokens encontrados.
         """
         # TODO relatório das builtin functions mais recorrentes
@@ -773,204 +1148,206 @@ class CodebenchExtractor:
         id_unique = set()  # unique user identifiers
         line = 0
 
-        with tokenize.open(path) as f:
-            tokens = tokenize.generate_tokens(f.readline)
-            for token in tokens:
-                exact_type = token.exact_type
-                if keyword.iskeyword(token.string):
-                    ct.kwds += 1
-                    kwd_unique.add(token.string)
-                    if token.string == 'if':
-                        ct.conditionals += 1
-                        ct.ifs += 1
-                    elif token.string == 'else':
-                        ct.conditionals += 1
-                        ct.elses += 1
-                    elif token.string == 'elif':
-                        ct.conditionals += 1
-                        ct.elifs += 1
-                    elif token.string == 'while':
-                        ct.loops += 1
-                        ct.whiles += 1
-                    elif token.string == 'for':
-                        ct.loops += 1
-                        ct.fors += 1
-                    elif token.string == 'and':
-                        ct.lgc_op += 1
-                        ct.and_op += 1
-                        lgc_unique.add(token.string)
-                    elif token.string == 'or':
-                        ct.lgc_op += 1
-                        ct.or_op += 1
-                        lgc_unique.add(token.string)
-                    elif token.string == 'not':
-                        ct.lgc_op += 1
-                        ct.not_op += 1
-                        lgc_unique.add(token.string)
-                    elif token.string == 'True' or token.string == 'False':
-                        ct.lt_booleans += 1
-                    elif CodebenchExtractor.__is_import_token(token):
-                        ct.imports += 1
-                    elif token.string == 'break':
-                        ct.breaks += 1
-                    elif token.string == 'continue':
-                        ct.continues += 1
-                    elif token.string == 'is':
-                        ct.identity_op += 1
-                    elif token.string == 'in':
-                        ct.membership_op += 1
-                    elif token.string == 'lambda':
-                        ct.lambdas += 1
-                elif CodebenchExtractor.__builtin_token.get(token.string, False):  # if is a builtin function
-                    ct.builtin_f += 1
-                    btf_unique.add(token.string)
-                    if CodebenchExtractor.__type_token.get(token.string, False):
-                        ct.type_f += 1
-                        tpf_unique.add(token.string)
-                    elif token.string == 'print':
-                        ct.prints += 1
-                    elif token.string == 'input':
-                        ct.inputs += 1
-                    elif token.string == 'len':
-                        ct.len += 1
-                elif token.type == tokenize.OP:
-                    # operador de atribuição ou atribuição composta
-                    if exact_type == tokenize.EQUAL or (tokenize.PLUSEQUAL <= exact_type <= tokenize.DOUBLESTAREQUAL) or exact_type == tokenize.DOUBLESLASHEQUAL:
-                        ct.assignments += 1
-                        asg_unique.add(token.string)
-                        if exact_type == tokenize.PLUSEQUAL:  # operador '+='
-                            ct.arithmetic_op += 1
-                            art_unique.add('+')
-                            ct.add_op += 1
-                        elif exact_type == tokenize.MINEQUAL:  # operador '-='
-                            ct.arithmetic_op += 1
-                            art_unique.add('-')
-                            ct.minus_op += 1
-                        elif exact_type == tokenize.STAREQUAL:  # operador '*='
-                            ct.arithmetic_op += 1
-                            art_unique.add('*')
-                            ct.mult_op += 1
-                        elif exact_type == tokenize.SLASHEQUAL:  # operador '/='
-                            ct.arithmetic_op += 1
-                            art_unique.add('/')
-                            ct.div_op += 1
-                        elif exact_type == tokenize.PERCENTEQUAL:  # operador '%='
-                            ct.arithmetic_op += 1
-                            art_unique.add('%')
-                            ct.mod_op += 1
-                        elif exact_type == tokenize.DOUBLESLASHEQUAL:  # operador '//='
-                            ct.arithmetic_op += 1
-                            art_unique.add('//')
-                            ct.div_floor_op += 1
-                        elif exact_type == tokenize.DOUBLESTAREQUAL:  # operador '**='
-                            ct.arithmetic_op += 1
-                            art_unique.add('**')
-                            ct.power_op += 1
-                        elif exact_type == tokenize.AMPEREQUAL:  # operador '&='
-                            ct.bitwise_op += 1
-                            btw_unique.add('&')
-                            ct.bitwise_and += 1
-                        elif exact_type == tokenize.VBAREQUAL:  # operador '|='
-                            ct.bitwise_op += 1
-                            btw_unique.add('|')
-                            ct.bitwise_or += 1
-                        elif exact_type == tokenize.CIRCUMFLEXEQUAL:  # operador '^='
-                            ct.bitwise_op += 1
-                            btw_unique.add('^')
-                            ct.bitwise_xor += 1
-                        elif exact_type == tokenize.LEFTSHIFTEQUAL:  # operador '<<='
-                            ct.bitwise_op += 1
-                            btw_unique.add('<<')
-                            ct.lshift_op += 1
-                        elif exact_type == tokenize.RIGHTSHIFTEQUAL:  # operador '>>='
-                            ct.bitwise_op += 1
-                            btw_unique.add('>>')
-                            ct.rshift_op += 1
-                    # operador aritmético
-                    elif tokenize.PLUS <= exact_type <= tokenize.SLASH or exact_type == tokenize.PERCENT or exact_type == tokenize.DOUBLESTAR or exact_type == tokenize.DOUBLESLASH:
+        if isinstance(codigo, bytes):
+            codigo = CodebenchExtractor.__decode_source(codigo)
+        if not isinstance(codigo, CodeAnalysis):
+            codigo = CodeAnalysis(codigo)
+        for token in codigo.tokens:
+            exact_type = token.exact_type
+            if keyword.iskeyword(token.string):
+                ct.kwds += 1
+                kwd_unique.add(token.string)
+                if token.string == 'if':
+                    ct.conditionals += 1
+                    ct.ifs += 1
+                elif token.string == 'else':
+                    ct.conditionals += 1
+                    ct.elses += 1
+                elif token.string == 'elif':
+                    ct.conditionals += 1
+                    ct.elifs += 1
+                elif token.string == 'while':
+                    ct.loops += 1
+                    ct.whiles += 1
+                elif token.string == 'for':
+                    ct.loops += 1
+                    ct.fors += 1
+                elif token.string == 'and':
+                    ct.lgc_op += 1
+                    ct.and_op += 1
+                    lgc_unique.add(token.string)
+                elif token.string == 'or':
+                    ct.lgc_op += 1
+                    ct.or_op += 1
+                    lgc_unique.add(token.string)
+                elif token.string == 'not':
+                    ct.lgc_op += 1
+                    ct.not_op += 1
+                    lgc_unique.add(token.string)
+                elif token.string == 'True' or token.string == 'False':
+                    ct.lt_booleans += 1
+                elif CodebenchExtractor.__is_import_token(token):
+                    ct.imports += 1
+                elif token.string == 'break':
+                    ct.breaks += 1
+                elif token.string == 'continue':
+                    ct.continues += 1
+                elif token.string == 'is':
+                    ct.identity_op += 1
+                elif token.string == 'in':
+                    ct.membership_op += 1
+                elif token.string == 'lambda':
+                    ct.lambdas += 1
+            elif CodebenchExtractor.__builtin_token.get(token.string, False):  # if is a builtin function
+                ct.builtin_f += 1
+                btf_unique.add(token.string)
+                if CodebenchExtractor.__type_token.get(token.string, False):
+                    ct.type_f += 1
+                    tpf_unique.add(token.string)
+                elif token.string == 'print':
+                    ct.prints += 1
+                elif token.string == 'input':
+                    ct.inputs += 1
+                elif token.string == 'len':
+                    ct.len += 1
+            elif token.type == tokenize.OP:
+                # operador de atribuição ou atribuição composta
+                if exact_type == tokenize.EQUAL or (tokenize.PLUSEQUAL <= exact_type <= tokenize.DOUBLESTAREQUAL) or exact_type == tokenize.DOUBLESLASHEQUAL:
+                    ct.assignments += 1
+                    asg_unique.add(token.string)
+                    if exact_type == tokenize.PLUSEQUAL:  # operador '+='
+                        ct.arithmetic_op += 1
+                        art_unique.add('+')
+                        ct.add_op += 1
+                    elif exact_type == tokenize.MINEQUAL:  # operador '-='
+                        ct.arithmetic_op += 1
+                        art_unique.add('-')
+                        ct.minus_op += 1
+                    elif exact_type == tokenize.STAREQUAL:  # operador '*='
+                        ct.arithmetic_op += 1
+                        art_unique.add('*')
+                        ct.mult_op += 1
+                    elif exact_type == tokenize.SLASHEQUAL:  # operador '/='
                         ct.arithmetic_op += 1
-                        art_unique.add(token.string)
-                        if exact_type == tokenize.PLUS:  # operador '+'
-                            ct.add_op += 1
-                        elif exact_type == tokenize.MINUS:  # operador '-'
-                            ct.minus_op += 1
-                        elif exact_type == tokenize.STAR:  # operador '*'
-                            ct.mult_op += 1
-                        elif exact_type == tokenize.SLASH:  # operador '/'
-                            ct.div_op += 1
-                        elif exact_type == tokenize.PERCENT:  # operador '%'
-                            ct.mod_op += 1
-                        elif exact_type == tokenize.DOUBLESTAR:  # operador '**'
-                            ct.power_op += 1
-                        elif exact_type == tokenize.DOUBLESLASH:  # operador '//'
-                            ct.div_floor_op += 1
-                    # operador de comparação I
-                    elif tokenize.EQEQUAL <= exact_type <= tokenize.GREATEREQUAL:
-                        ct.cmp_op += 1
-                        cmp_unique.add(token.string)
-                        if tokenize.EQEQUAL:  # operador '=='
-                            ct.equal_op += 1
-                        elif tokenize.NOTEQUAL:  # operador '!='
-                            ct.not_eq_op += 1
-                        elif exact_type == tokenize.LESSEQUAL:  # operador '<='
-                            ct.lt_op += 1
-                        elif exact_type == tokenize.GREATEREQUAL:  # operador '>='
-                            ct.gt_op += 1
-                    # operador de comparação II
-                    elif exact_type == tokenize.LESS:  # operador '<'
-                        ct.cmp_op += 1
-                        cmp_unique.add(token.string)
-                        ct.less_op += 1
-                    # operador de comparação III
-                    elif exact_type == tokenize.GREATER:  # operador '>'
-                        ct.cmp_op += 1
-                        cmp_unique.add(token.string)
-                        ct.greater_op += 1
-                    # operadores bitwise
-                    elif exact_type == tokenize.VBAR or exact_type == tokenize.AMPER or (tokenize.TILDE <= exact_type <= tokenize.RIGHTSHIFT):
+                        art_unique.add('/')
+                        ct.div_op += 1
+                    elif exact_type == tokenize.PERCENTEQUAL:  # operador '%='
+                        ct.arithmetic_op += 1
+                        art_unique.add('%')
+                        ct.mod_op += 1
+                    elif exact_type == tokenize.DOUBLESLASHEQUAL:  # operador '//='
+                        ct.arithmetic_op += 1
+                        art_unique.add('//')
+                        ct.div_floor_op += 1
+                    elif exact_type == tokenize.DOUBLESTAREQUAL:  # operador '**='
+                        ct.arithmetic_op += 1
+                        art_unique.add('**')
+                        ct.power_op += 1
+                    elif exact_type == tokenize.AMPEREQUAL:  # operador '&='
                         ct.bitwise_op += 1
-                        btw_unique.add(token.string)
-                        if exact_type == tokenize.AMPER:  # operador '&'
-                            ct.bitwise_and += 1
-                        elif exact_type == tokenize.VBAR:  # operador '|'
-                            ct.bitwise_or += 1
-                        elif exact_type == tokenize.TILDE:  # operador '~'
-                            ct.bitwise_not += 1
-                        elif exact_type == tokenize.CIRCUMFLEX:  # operador '^'
-                            ct.bitwise_xor += 1
-                        elif exact_type == tokenize.RIGHTSHIFT:  # operador '>>'
-                            ct.rshift_op += 1
-                        elif exact_type == tokenize.LEFTSHIFT:  # operador '<<'
-                            ct.lshift_op += 1
-                    elif exact_type == tokenize.LPAR:  # operador '('
-                        ct.lpar += 1
-                    elif exact_type == tokenize.RPAR:  # operador ')'
-                        ct.rpar += 1
-                    elif exact_type == tokenize.LSQB:  # operador '['
-                        ct.lsqb += 1
-                    elif exact_type == tokenize.RSQB:  # operador ']'
-                        ct.rsqb += 1
-                    elif exact_type == tokenize.LBRACE:  # operador '{'
-                        ct.lbrace += 1
-                    elif exact_type == tokenize.RBRACE:  # operador '}'
-                        ct.rbrace += 1
-                    elif exact_type == tokenize.COMMA:  # operador ','
-                        ct.commas += 1
-                    elif exact_type == tokenize.COLON:  # operador ':'
-                        ct.colons += 1
-                    elif exact_type == tokenize.DOT:  # operador '.'
-                        ct.dots += 1
-                elif token.type == tokenize.NUMBER:
-                    ct.lt_numbers += 1
-                elif token.type == tokenize.STRING:
-                    ct.lt_strings += 1
-                elif token.type == tokenize.NAME:
-                    id_unique.add(token.string)
-                    if token.start[0] == line:
-                        id_per_line[-1] += 1
-                    else:
-                        id_per_line.append(1)
-                        line = token.start[0]
+                        btw_unique.add('&')
+                        ct.bitwise_and += 1
+                    elif exact_type == tokenize.VBAREQUAL:  # operador '|='
+                        ct.bitwise_op += 1
+                        btw_unique.add('|')
+                        ct.bitwise_or += 1
+                    elif exact_type == tokenize.CIRCUMFLEXEQUAL:  # operador '^='
+                        ct.bitwise_op += 1
+                        btw_unique.add('^')
+                        ct.bitwise_xor += 1
+                    elif exact_type == tokenize.LEFTSHIFTEQUAL:  # operador '<<='
+                        ct.bitwise_op += 1
+                        btw_unique.add('<<')
+                        ct.lshift_op += 1
+                    elif exact_type == tokenize.RIGHTSHIFTEQUAL:  # operador '>>='
+                        ct.bitwise_op += 1
+                        btw_unique.add('>>')
+                        ct.rshift_op += 1
+                # operador aritmético
+                elif tokenize.PLUS <= exact_type <= tokenize.SLASH or exact_type == tokenize.PERCENT or exact_type == tokenize.DOUBLESTAR or exact_type == tokenize.DOUBLESLASH:
+                    ct.arithmetic_op += 1
+                    art_unique.add(token.string)
+                    if exact_type == tokenize.PLUS:  # operador '+'
+                        ct.add_op += 1
+                    elif exact_type == tokenize.MINUS:  # operador '-'
+                        ct.minus_op += 1
+                    elif exact_type == tokenize.STAR:  # operador '*'
+                        ct.mult_op += 1
+                    elif exact_type == tokenize.SLASH:  # operador '/'
+                        ct.div_op += 1
+                    elif exact_type == tokenize.PERCENT:  # operador '%'
+                        ct.mod_op += 1
+                    elif exact_type == tokenize.DOUBLESTAR:  # operador '**'
+                        ct.power_op += 1
+                    elif exact_type == tokenize.DOUBLESLASH:  # operador '//'
+                        ct.div_floor_op += 1
+                # operador de comparação I
+                elif tokenize.EQEQUAL <= exact_type <= tokenize.GREATEREQUAL:
+                    ct.cmp_op += 1
+                    cmp_unique.add(token.string)
+                    if tokenize.EQEQUAL:  # operador '=='
+                        ct.equal_op += 1
+                    elif tokenize.NOTEQUAL:  # operador '!='
+                        ct.not_eq_op += 1
+                    elif exact_type == tokenize.LESSEQUAL:  # operador '<='
+                        ct.lt_op += 1
+                    elif exact_type == tokenize.GREATEREQUAL:  # operador '>='
+                        ct.gt_op += 1
+                # operador de comparação II
+                elif exact_type == tokenize.LESS:  # operador '<'
+                    ct.cmp_op += 1
+                    cmp_unique.add(token.string)
+                    ct.less_op += 1
+                # operador de comparação III
+                elif exact_type == tokenize.GREATER:  # operador '>'
+                    ct.cmp_op += 1
+                    cmp_unique.add(token.string)
+                    ct.greater_op += 1
+                # operadores bitwise
+                elif exact_type == tokenize.VBAR or exact_type == tokenize.AMPER or (tokenize.TILDE <= exact_type <= tokenize.RIGHTSHIFT):
+                    ct.bitwise_op += 1
+                    btw_unique.add(token.string)
+                    if exact_type == tokenize.AMPER:  # operador '&'
+                        ct.bitwise_and += 1
+                    elif exact_type == tokenize.VBAR:  # operador '|'
+                        ct.bitwise_or += 1
+                    elif exact_type == tokenize.TILDE:  # operador '~'
+                        ct.bitwise_not += 1
+                    elif exact_type == tokenize.CIRCUMFLEX:  # operador '^'
+                        ct.bitwise_xor += 1
+                    elif exact_type == tokenize.RIGHTSHIFT:  # operador '>>'
+                        ct.rshift_op += 1
+                    elif exact_type == tokenize.LEFTSHIFT:  # operador '<<'
+                        ct.lshift_op += 1
+                elif exact_type == tokenize.LPAR:  # operador '('
+                    ct.lpar += 1
+                elif exact_type == tokenize.RPAR:  # operador ')'
+                    ct.rpar += 1
+                elif exact_type == tokenize.LSQB:  # operador '['
+                    ct.lsqb += 1
+                elif exact_type == tokenize.RSQB:  # operador ']'
+                    ct.rsqb += 1
+                elif exact_type == tokenize.LBRACE:  # operador '{'
+                    ct.lbrace += 1
+                elif exact_type == tokenize.RBRACE:  # operador '}'
+                    ct.rbrace += 1
+                elif exact_type == tokenize.COMMA:  # operador ','
+                    ct.commas += 1
+                elif exact_type == tokenize.COLON:  # operador ':'
+                    ct.colons += 1
+                elif exact_type == tokenize.DOT:  # operador '.'
+                    ct.dots += 1
+            elif token.type == tokenize.NUMBER:
+                ct.lt_numbers += 1
+            elif token.type == tokenize.STRING:
+                ct.lt_strings += 1
+            elif token.type == tokenize.NAME:
+                id_unique.add(token.string)
+                if token.start[0] == line:
+                    id_per_line[-1] += 1
+                else:
+                    id_per_line.append(1)
+                    line = token.start[0]
 
         ct.kwds_unique = len(kwd_unique)
         ct.lgc_op_unique = len(lgc_unique)
@@ -989,7 +1366,7 @@ class CodebenchExtractor:
         if token.end[0] > 0:
             ct.uident_per_line = ct.uident / token.end[0]
         else:
-            ct.uidentifiers_per_lin = 0.0
+            ct.uident_per_line = 0.0
 
         if ct.uident_unique > 0:
             char_total = 0
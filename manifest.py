@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import contextlib
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+
+from catalog import DatasetCatalog
+from util import Logger
+
+
+class ExtractionManifest:
+    """
+    Manifesto (em disco) dos arquivos de cada Estudante já processados e das linhas extraídas deles.
+
+    Para cada diretório de Estudante são registrados o caminho, tamanho, data de modificação (mtime) e hash do conteúdo
+    dos arquivos de execuções, do CodeMirror, de códigos-fonte e 'user.data', junto com as linhas de
+    :class:`Execucao` e :class:`Erro` geradas a partir deles. Numa nova extração apenas os Estudantes com arquivos
+    novos ou alterados precisam ser processados novamente, os demais têm suas linhas recuperadas do manifesto.
+
+    As linhas também dependem das Atividades da Turma (datas de início e término), por isso cada registro guarda um
+    'contexto' (hash das Atividades) que invalida o registro quando as Atividades mudam.
+
+    Exemplo de uso:
+        manifesto = ExtractionManifest()
+        manifesto.begin()
+        arquivos = ExtractionManifest.scan(estudante.path)
+        linhas = manifesto.get(estudante.path, contexto, arquivos)
+        if linhas is None:
+            linhas = ...
+            manifesto.put(estudante.path, contexto, ExtractionManifest.hash_files(estudante.path, arquivos), *linhas)
+        manifesto.end()
+    """
+
+    # versão do formato dos registros, deve ser incrementada sempre que a extração das Execuções/Erros mudar
+    __versao = 2
+    # sub-diretórios e arquivos do Estudante que são lidos na extração das Execuções
+    __diretorios = ('executions', 'codemirror', 'codes')
+    __arquivos = ('user.data',)
+    # tamanho dos blocos lidos no cálculo do hash dos arquivos
+    __tamanho_bloco = 1024 * 1024
+
+    def __init__(self, path: str = os.path.join(os.getcwd(), 'cache', 'manifesto.db')):
+        """
+        Método Construtor.
+
+        :param path: Caminho do arquivo do banco de dados (SQLite) do manifesto.
+        """
+        self.path = path
+        self.__conn = None
+        self.__rodada = None
+        self.reutilizados = 0
+        self.processados = 0
+
+    def __connection(self):
+        """Retorna a conexão com o banco de dados do manifesto."""
+        if self.__conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.__conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self.__conn.execute('PRAGMA journal_mode=WAL')
+            self.__conn.execute('PRAGMA synchronous=NORMAL')
+            self.__conn.execute('CREATE TABLE IF NOT EXISTS manifesto ('
+                                'estudante TEXT PRIMARY KEY, contexto BLOB NOT NULL, arquivos BLOB NOT NULL, '
+                                'execucoes BLOB NOT NULL, erros BLOB NOT NULL, rodada INTEGER NOT NULL)')
+        return self.__conn
+
+    @staticmethod
+    def context(atividades_rows):
+        """
+        Calcula o contexto de uma Turma, que invalida os registros de seus Estudantes quando as Atividades mudam.
+
+        :param atividades_rows: Linhas (valores retornados por 'as_row') das Atividades da Turma.
+        :return: O hash das Atividades (bytes).
+        """
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f'{ExtractionManifest.__versao}:'.encode('utf-8'))
+        h.update(repr(sorted(map(repr, atividades_rows))).encode('utf-8', 'surrogatepass'))
+        return h.digest()
+
+    @staticmethod
+    def scan(estudante_path: str, catalog=None):
+        """
+        Lista os arquivos de um Estudante lidos na extração das Execuções, com seus tamanhos e datas de modificação.
+
+        :param estudante_path: Caminho absoluto do diretório do Estudante.
+        :param catalog: Catálogo (:class:`DatasetCatalog`) ou arquivo compactado (:class:`DatasetArchive`) do dataset,
+            consultado no lugar do sistema de arquivos (ou None). O catálogo fornece apenas os arquivos: os tamanhos
+            e datas salvos nele são os da sua varredura, assim os de cada arquivo são consultados novamente.
+        :return: Dicionário com o caminho relativo de cada arquivo e a tupla (tamanho, mtime em nanossegundos).
+        """
+        atuais = isinstance(catalog, DatasetCatalog)
+        arquivos = {}
+        for diretorio in ExtractionManifest.__diretorios:
+            path = os.path.join(estudante_path, diretorio)
+            try:
+                entradas = catalog.scandir(path) if catalog is not None else None
+                with os.scandir(path) if entradas is None else contextlib.nullcontext(entradas) as entradas:
+                    for entrada in entradas:
+                        if entrada.is_file():
+                            try:
+                                stat = os.stat(entrada.path) if atuais else entrada.stat()
+                            except FileNotFoundError:
+                                continue
+                            arquivos[f'{diretorio}/{entrada.name}'] = (stat.st_size, stat.st_mtime_ns)
+            except FileNotFoundError:
+                pass
+        for nome in ExtractionManifest.__arquivos:
+            path = os.path.join(estudante_path, nome)
+            entrada = catalog.entry(path) if catalog is not None else None
+            if entrada is False:
+                continue
+            try:
+                stat = os.stat(path) if entrada is None or atuais else entrada.stat()
+                arquivos[nome] = (stat.st_size, stat.st_mtime_ns)
+            except FileNotFoundError:
+                pass
+        return arquivos
+
+    @staticmethod
+    def hash_files(estudante_path: str, arquivos, archive=None):
+        """
+        Calcula o hash do conteúdo dos arquivos de um Estudante.
+
+        :param estudante_path: Caminho absoluto do diretório do Estudante.
+        :param arquivos: Arquivos retornados por 'scan'.
+        :param archive: Arquivo compactado do dataset (:class:`DatasetArchive`), lido no lugar do sistema de arquivos
+            (ou None).
+        :return: Dicionário com o caminho relativo de cada arquivo e a tupla (tamanho, mtime, hash).
+        """
+        return {nome: (tamanho, mtime, ExtractionManifest.__hash_file(os.path.join(estudante_path, nome), archive))
+                for nome, (tamanho, mtime) in arquivos.items()}
+
+    @staticmethod
+    def __hash_file(path: str, archive=None):
+        """Calcula o hash do conteúdo de um arquivo, ou None caso ele não possa ser lido."""
+        try:
+            h = hashlib.blake2b(digest_size=20)
+            with open(path, 'rb') if archive is None else archive.open(path) as f:
+                for bloco in iter(lambda: f.read(ExtractionManifest.__tamanho_bloco), b''):
+                    h.update(bloco)
+            return h.digest()
+        except OSError:
+            return None
+
+    def begin(self):
+        """Inicia uma nova extração, os registros não usados nela são removidos em 'end'."""
+        self.__rodada = time.time_ns()
+        self.reutilizados = 0
+        self.processados = 0
+
+    def get(self, estudante_path: str, contexto: bytes, arquivos, archive=None):
+        """
+        Recupera as linhas extraídas de um Estudante, caso nenhum de seus arquivos tenha mudado.
+
+        Arquivos com o mesmo tamanho mas outra data de modificação têm o conteúdo comparado pelo hash, assim arquivos
+        apenas copiados ou tocados (touch) não forçam uma nova extração.
+
+        :param estudante_path: Caminho absoluto do diretório do Estudante.
+        :param contexto: Contexto da Turma do Estudante (ver 'context').
+        :param arquivos: Arquivos atuais do Estudante (ver 'scan').
+        :param archive: Arquivo compactado do dataset (:class:`DatasetArchive`), lido no lugar do sistema de arquivos
+            (ou None).
+        :return: Tupla com as linhas das Execuções e dos Erros, ou None se o Estudante precisa ser processado.
+        """
+        try:
+            conn = self.__connection()
+            row = conn.execute('SELECT contexto, arquivos, execucoes, erros FROM manifesto WHERE estudante = ?',
+                               (estudante_path,)).fetchone()
+            if row is None or row[0] != contexto:
+                return None
+            registrados = pickle.loads(row[1])
+            if registrados.keys() != arquivos.keys():
+                return None
+
+            alterados = {}
+            for nome, (tamanho, mtime) in arquivos.items():
+                tamanho_registrado, mtime_registrado, hash_registrado = registrados[nome]
+                if tamanho != tamanho_registrado:
+                    return None
+                if mtime != mtime_registrado:
+                    hash_atual = ExtractionManifest.__hash_file(os.path.join(estudante_path, nome), archive)
+                    if hash_atual is None or hash_atual != hash_registrado:
+                        return None
+                    alterados[nome] = (tamanho, mtime, hash_atual)
+
+            if alterados:
+                registrados.update(alterados)
+                conn.execute('UPDATE manifesto SET arquivos = ?, rodada = ? WHERE estudante = ?',
+                             (pickle.dumps(registrados, pickle.HIGHEST_PROTOCOL), self.__rodada, estudante_path))
+            else:
+                conn.execute('UPDATE manifesto SET rodada = ? WHERE estudante = ?', (self.__rodada, estudante_path))
+            self.reutilizados += 1
+            return pickle.loads(row[2]), pickle.loads(row[3])
+        except (sqlite3.Error, pickle.UnpicklingError) as e:
+            # uma falha no manifesto não deve interromper a extração, o Estudante é apenas processado novamente
+            Logger.warn(f'Erro ao consultar o manifesto da extração, {str(e)}: {self.path}')
+            return None
+
+    def put(self, estudante_path: str, contexto: bytes, arquivos, execucoes, erros):
+        """
+        Registra os arquivos de um Estudante e as linhas extraídas deles.
+
+        :param estudante_path: Caminho absoluto do diretório do Estudante.
+        :param contexto: Contexto da Turma do Estudante (ver 'context').
+        :param arquivos: Arquivos do Estudante com o hash do conteúdo (ver 'hash_files').
+        :param execucoes: Linhas das Execuções do Estudante.
+        :param erros: Linhas dos Erros do Estudante.
+        """
+        self.processados += 1
+        try:
+            self.__connection().execute(
+                'INSERT OR REPLACE INTO manifesto (estudante, contexto, arquivos, execucoes, erros, rodada) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (estudante_path, contexto, pickle.dumps(arquivos, pickle.HIGHEST_PROTOCOL),
+                 pickle.dumps(execucoes, pickle.HIGHEST_PROTOCOL), pickle.dumps(erros, pickle.HIGHEST_PROTOCOL),
+                 self.__rodada))
+        except sqlite3.Error as e:
+            Logger.warn(f'Erro ao salvar no manifesto da extração, {str(e)}: {self.path}')
+
+    def end(self, prune: bool = True):
+        """
+        Conclui a extração, removendo os registros dos Estudantes que não existem mais no dataset.
+
+        :param prune: Se falso, mantém os registros não usados (ex.: numa extração continuada a partir de um
+            checkpoint, em que os Estudantes das Turmas já concluídas não são consultados).
+        """
+        if prune:
+            try:
+                self.__connection().execute('DELETE FROM manifesto WHERE rodada != ?', (self.__rodada,))
+            except sqlite3.Error as e:
+                Logger.warn(f'Erro ao atualizar o manifesto da extração, {str(e)}: {self.path}')
+        Logger.info(f'Manifesto da extração: {self.reutilizados} estudantes reaproveitados, '
+                    f'{self.processados} processados')
+
+    def close(self):
+        """Fecha a conexão com o banco de dados do manifesto."""
+        if self.__conn is not None:
+            self.__conn.close()
+            self.__conn = None
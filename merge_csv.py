@@ -1,19 +1,157 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import csv
 import os
-import glob
-import pandas as pd
+from itertools import islice
+
+from csv_parser import CSVParser
+from util import Logger
+
+
+class _Numero(str):
+    """
+    Valor numérico lido de um '.csv', mantido com o texto original. O 'csv.writer' com 'csv.QUOTE_NONNUMERIC' o
+    considera um número (possui '__float__') e o escreve sem aspas, exatamente como foi lido.
+    """
+
+    def __float__(self):
+        return float(str(self))
 
 
 class MergeCsvs:
-    """Class Responsável por mergear os arquivos de csv gerados"""
+    """
+    Classe responsável por unir os arquivos '.csv' gerados numa única tabela desnormalizada (uma linha por Execução).
+
+    Cada linha de 'execucoes.csv' recebe as colunas da sua Turma, Atividade e Estudante. As tabelas de dimensão
+    (pequenas) são carregadas em dicionários indexados pelas chaves (periodo, turma, atividade/estudante), enquanto
+    'execucoes.csv' é lido e escrito em lotes, assim a memória usada não depende da quantidade de Execuções.
+
+    Exemplo de uso:
+        MergeCsvs.merge('csv/', 'mergecvs/')
+    """
+
+    __arquivo_saida = 'combined_csv_data.csv'
+    __execucoes_csv = 'execucoes.csv'
+    # quantidade de linhas de 'execucoes.csv' lidas e escritas por vez
+    __tamanho_lote = 10000
+    # tabelas de dimensão: arquivo, prefixo das colunas, colunas da chave na dimensão e nas Execuções
+    __dimensoes = (
+        ('turmas.csv', 'turma_', ('periodo', 'codigo'), ('periodo', 'turma')),
+        ('atividades.csv', 'atividade_', ('periodo', 'turma', 'codigo'), ('periodo', 'turma', 'atividade')),
+        ('estudantes.csv', 'estudante_', ('periodo', 'turma', 'codigo'), ('periodo', 'turma', 'estudante')),
+    )
+
+    @staticmethod
+    def __reader(path: str):
+        """
+        Retorna (yield) as linhas de um arquivo '.csv' gerado pelo :class:`CSVStreamWriter`, com os valores sem aspas
+        no arquivo (números e booleanos) como :class:`_Numero`, assim a linha é escrita novamente no mesmo formato.
+
+        O texto original de cada registro é guardado enquanto o 'csv.reader' consome as linhas; como o arquivo foi
+        escrito pelo 'csv.writer', um valor com aspas ocupa o seu tamanho mais as aspas (duplicadas no conteúdo).
+        """
+        linhas = []
+
+        def consumir(f):
+            for linha in f:
+                linhas.append(linha)
+                yield linha
+
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.reader(consumir(f)):
+                texto, pos, valores = ''.join(linhas), 0, []
+                linhas.clear()
+                for valor in row:
+                    if texto.startswith('"', pos):
+                        valores.append(valor)
+                        pos += len(valor) + 2 + valor.count('"') + 1
+                    else:
+                        valores.append(_Numero(valor))
+                        pos += len(valor) + 1
+                yield valores
+
+    @staticmethod
+    def __load_dimension(path: str, chave):
+        """
+        Carrega uma tabela de dimensão num dicionário indexado pela chave.
+
+        :param path: Caminho do arquivo '.csv' da dimensão.
+        :param chave: Nomes das colunas que formam a chave.
+        :return: Tupla com os nomes das demais colunas e o dicionário {chave: valores das demais colunas}.
+        """
+        reader = MergeCsvs.__reader(path)
+        header = next(reader, [])
+        posicoes = [header.index(coluna) for coluna in chave]
+        demais = [i for i in range(len(header)) if i not in posicoes]
+        indice = {}
+        for row in reader:
+            indice[tuple(row[i] for i in posicoes)] = [row[i] for i in demais]
+        return [header[i] for i in demais], indice
+
     @staticmethod
-    def merge():
-        os.chdir("./csv")
+    def merge(input_dir: str = None, output_dir: str = os.path.join(os.getcwd(), 'mergecvs')):
+        """
+        Une 'execucoes.csv' às Turmas, Atividades e Estudantes, gerando o arquivo 'combined_csv_data.csv'.
+
+        Execuções sem a Turma, Atividade ou Estudante correspondente têm as colunas da dimensão vazias. Dimensões
+        cujo arquivo não existe são ignoradas.
+
+        :param input_dir: Diretório dos arquivos '.csv' extraídos (por padrão o diretório de saída do 'CSVParser').
+        :param output_dir: Diretório onde o arquivo unido é salvo, criado caso não exista.
+        :return: O caminho do arquivo gerado, ou None se 'execucoes.csv' não existe.
+        """
+        input_dir = CSVParser.get_output_dir() if input_dir is None else input_dir
+        execucoes_path = os.path.join(input_dir, MergeCsvs.__execucoes_csv)
+        if not os.path.isfile(execucoes_path):
+            Logger.warn(f'Arquivo de Execuções não encontrado, nada a unir: {execucoes_path}')
+            return None
+
+        dimensoes = []
+        for arquivo, prefixo, chave, chave_execucao in MergeCsvs.__dimensoes:
+            path = os.path.join(input_dir, arquivo)
+            if not os.path.isfile(path):
+                Logger.warn(f'Tabela não encontrada, suas colunas não serão unidas: {path}')
+                continue
+            colunas, indice = MergeCsvs.__load_dimension(path, chave)
+            dimensoes.append((arquivo, [prefixo + coluna for coluna in colunas], indice, chave_execucao))
 
-        file_extension = '.csv'
-        all_filenames = [i for i in glob.glob(f"*{file_extension}")]
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, MergeCsvs.__arquivo_saida)
+        temporario = path + '.tmp'
+        ausentes = dict.fromkeys((arquivo for arquivo, _, _, _ in dimensoes), 0)
+        with open(temporario, 'w', encoding='utf-8', newline='', buffering=1024 * 1024) as saida:
+            reader = MergeCsvs.__reader(execucoes_path)
+            # o mesmo formato dos arquivos '.csv' extraídos (ver 'CSVStreamWriter')
+            writer = csv.writer(saida, quoting=csv.QUOTE_NONNUMERIC, lineterminator=os.linesep)
+            header = next(reader, [])
 
-        combined_csv_data = pd.concat([pd.read_csv(path, sep=',', encoding='utf-8', quoting=2) for path in all_filenames])
+            # posições das colunas de chave nas Execuções e linha vazia para as chaves não encontradas
+            juncoes = []
+            colunas = list(header)
+            for arquivo, colunas_dimensao, indice, chave_execucao in dimensoes:
+                juncoes.append((arquivo, [header.index(c) for c in chave_execucao], indice,
+                                [''] * len(colunas_dimensao)))
+                colunas.extend(colunas_dimensao)
+            writer.writerow(colunas)
 
-        os.chdir('../mergecvs')
+            lote = list(islice(reader, MergeCsvs.__tamanho_lote))
+            while lote:
+                for row in lote:
+                    for arquivo, posicoes, indice, vazia in juncoes:
+                        valores = indice.get(tuple(row[i] for i in posicoes))
+                        if valores is None:
+                            ausentes[arquivo] += 1
+                            valores = vazia
+                        row.extend(valores)
+                writer.writerows(lote)
+                lote = list(islice(reader, MergeCsvs.__tamanho_lote))
+        os.replace(temporario, path)
 
-        combined_csv_data.to_csv('combined_csv_data.csv')
+        for arquivo, quantidade in ausentes.items():
+            if quantidade:
+                Logger.warn(f'{quantidade} Execuções sem correspondência em {arquivo}')
+        Logger.info(f'Arquivos unidos em: {path}')
+        return path
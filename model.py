@@ -3,9 +3,20 @@
 ### Universidade Federal do Amazonas - UFAM
 ### Instituto de Computação - IComp
 
+from datetime import timedelta
+from operator import attrgetter
+
 
 class CSVEntity:
-    """Interface que especifica os métodos de uma Entidade que possa ser salva num arquivo '.csv' (dataset)."""
+    """
+    Interface que especifica os métodos de uma Entidade que possa ser salva num arquivo '.csv' (dataset).
+
+    As Entidades declaram os seus atributos em '__slots__' (sem um '__dict__' por objeto), pois uma extração mantém
+    em memória centenas de milhares de Execuções, e as colunas do cabeçalho numa tupla '__colunas', na mesma ordem
+    dos valores de 'as_row'.
+    """
+
+    __slots__ = ()
 
     def as_row(self):
         """Retorna valores dos atributos da Entidade numa lista (row), para então serem salvos no dataset."""
@@ -16,10 +27,18 @@ class CSVEntity:
         """Retorna uma lista com o nome de todos os atributos da Entidade, que devam ser salvas no dataset (csv file header)."""
         pass
 
+    @staticmethod
+    def get_column_types():
+        """Retorna uma lista com o tipo (str, int, float, bool ou timedelta) de cada coluna do cabeçalho, usada nos formatos colunares."""
+        pass
+
 
 class Periodo(CSVEntity):
     """Entidade que representa um Período letivo."""
 
+    __slots__ = ('descricao', 'path', 'turmas')
+    __colunas = ('descricao',)
+
     def __init__(self, descricao: str, path: str):
         """
         Método Construtor.
@@ -36,12 +55,19 @@ class Periodo(CSVEntity):
 
     @staticmethod
     def get_csv_header():
-        return list(Periodo(None, None).__dict__)[:-2]
+        return list(Periodo.__colunas)
+
+    @staticmethod
+    def get_column_types():
+        return [str]
 
 
 class Turma(CSVEntity):
     """Entidade que representa uma Turma de Estudantes num :class:`Periodo` letivo."""
 
+    __slots__ = ('periodo', 'codigo', 'descricao', 'path', 'atividades', 'estudantes')
+    __colunas = ('periodo', 'codigo', 'descricao')
+
     def __init__(self, periodo: Periodo, codigo: int, path: str):
         """
         Método Construtor.
@@ -66,12 +92,20 @@ class Turma(CSVEntity):
 
     @staticmethod
     def get_csv_header():
-        return list(Turma(Periodo(None, None), 0, None).__dict__)[:-3]
+        return list(Turma.__colunas)
+
+    @staticmethod
+    def get_column_types():
+        return [str, int, str]
 
 
 class Atividade(CSVEntity):
     """Entidade que representa uma Atividade realizada numa :class:`Turma`."""
 
+    __slots__ = ('periodo', 'turma', 'codigo', 'titulo', 'data_inicio', 'data_termino', 'linguagem', 'tipo', 'peso',
+                 'n_blocos', 'blocos', 'path')
+    __colunas = __slots__[:-1]
+
     def __init__(self, turma: Turma, codigo: int, path: str):
         """
         Método Construtor.
@@ -110,12 +144,23 @@ class Atividade(CSVEntity):
 
     @staticmethod
     def get_csv_header():
-        return list(Atividade(Turma(Periodo('', ''), 0, ''), 0, '').__dict__)[:-1]
+        return list(Atividade.__colunas)
+
+    @staticmethod
+    def get_column_types():
+        return [str, int, str, str, str, str, str, str, float, int, str]
 
 
 class Estudante(CSVEntity):
     """Entidade que representa um Estudante matriculado numa :class:`Turma`."""
 
+    __slots__ = ('periodo', 'turma', 'codigo', 'curso_id', 'curso_nome', 'instituicao_id', 'instituicao_nome',
+                 'escola_nome', 'escola_tipo', 'escola_turno', 'escola_ano_grad', 'computador',
+                 'computador_compartilhado', 'internet', 'programa', 'trabalha', 'empresa_nome', 'trabalha_ano_inicio',
+                 'trabalha_ano_termino', 'outra_graduacao', 'outra_graduacao_curso', 'outra_graduacao_ano_inicio',
+                 'outra_graduacao_ano_fim', 'sexo', 'ano_nascimento', 'estado_civil', 'filhos', 'execucoes', 'path')
+    __colunas = __slots__[:-2]
+
     def __init__(self, periodo: Periodo, turma: Turma, codigo: int, path: str):
         """
         Método Construtor
@@ -188,7 +233,12 @@ class Estudante(CSVEntity):
 
     @staticmethod
     def get_csv_header():
-        return list(Estudante(None, None, 0, '').__dict__)[:-2]
+        return list(Estudante.__colunas)
+
+    @staticmethod
+    def get_column_types():
+        # os dados do questionário (user.data) são mantidos como texto
+        return [str, int, int] + [str] * (len(Estudante.__colunas) - 3)
 
 
 class Execucao(CSVEntity):
@@ -206,6 +256,11 @@ class Execucao(CSVEntity):
         - Métricas Brutas de Código.
     """
 
+    __slots__ = ('periodo', 'turma', 'estudante', 'atividade', 'exercicio', 'tempo_total', 'tempo_foco',
+                 'n_submissoes', 'n_testes', 'n_erros', 't_execucao', 'nota_final', 'acertou', 'erros', 'metricas',
+                 'tokens')
+    __colunas = __slots__[:-3]
+
     def __init__(self, periodo: Periodo, turma: Turma, estudante: Estudante, atividade: Atividade, exercicio_codigo: int):
         """
         Método Construtor.
@@ -229,6 +284,7 @@ class Execucao(CSVEntity):
         self.t_execucao = None
         self.nota_final = None
         self.acertou = None
+        self.erros = []
         self.metricas = Metricas(None)
         self.tokens = CodeTokens(None)
 
@@ -250,105 +306,17 @@ class Execucao(CSVEntity):
             self.n_erros,
             self.t_execucao,
             self.nota_final,
-            self.acertou,
-            self.metricas.complexity,
-            self.metricas.n_classes,
-            self.metricas.n_functions,
-            self.metricas.loc,
-            self.metricas.lloc,
-            self.metricas.sloc,
-            self.metricas.single_comments,
-            self.metricas.comments,
-            self.metricas.multilines,
-            self.metricas.blank_lines,
-            self.metricas.h1,
-            self.metricas.h2,
-            self.metricas.N1,
-            self.metricas.N2,
-            self.metricas.h,
-            self.metricas.N,
-            self.metricas.calculated_N,
-            self.metricas.volume,
-            self.metricas.difficulty,
-            self.metricas.effort,
-            self.metricas.bugs,
-            self.metricas.time,
-            self.tokens.imports,
-            self.tokens.assignments,
-            self.tokens.assignments_unique,
-            self.tokens.kwds,
-            self.tokens.kwds_unique,
-            self.tokens.lt_numbers,
-            self.tokens.lt_strings,
-            self.tokens.lt_booleans,
-            self.tokens.lgc_op,
-            self.tokens.lgc_op_unique,
-            self.tokens.and_op,
-            self.tokens.or_op,
-            self.tokens.not_op,
-            self.tokens.arithmetic_op,
-            self.tokens.arithmetic_op_unique,
-            self.tokens.add_op,
-            self.tokens.minus_op,
-            self.tokens.mult_op,
-            self.tokens.div_op,
-            self.tokens.mod_op,
-            self.tokens.power_op,
-            self.tokens.div_floor_op,
-            self.tokens.cmp_op,
-            self.tokens.cmp_op_unique,
-            self.tokens.equal_op,
-            self.tokens.not_eq_op,
-            self.tokens.lt_op,
-            self.tokens.gt_op,
-            self.tokens.less_op,
-            self.tokens.greater_op,
-            self.tokens.bitwise_op,
-            self.tokens.bitwise_op_unique,
-            self.tokens.bitwise_and,
-            self.tokens.bitwise_or,
-            self.tokens.bitwise_xor,
-            self.tokens.bitwise_not,
-            self.tokens.lshift_op,
-            self.tokens.rshift_op,
-            self.tokens.identity_op,
-            self.tokens.membership_op,
-            self.tokens.conditionals,
-            self.tokens.ifs,
-            self.tokens.elifs,
-            self.tokens.elses,
-            self.tokens.loops,
-            self.tokens.whiles,
-            self.tokens.fors,
-            self.tokens.breaks,
-            self.tokens.continues,
-            self.tokens.builtin_f,
-            self.tokens.builtin_f_unique,
-            self.tokens.type_f,
-            self.tokens.type_f_unique,
-            self.tokens.lambdas,
-            self.tokens.lpar,
-            self.tokens.rpar,
-            self.tokens.lsqb,
-            self.tokens.rsqb,
-            self.tokens.lbrace,
-            self.tokens.rbrace,
-            self.tokens.commas,
-            self.tokens.colons,
-            self.tokens.dots,
-            self.tokens.prints,
-            self.tokens.inputs,
-            self.tokens.len,
-            self.tokens.uident,
-            self.tokens.uident_unique,
-            self.tokens.uident_mean,
-            self.tokens.uident_per_line,
-            self.tokens.uident_chars
-        ]
+            self.acertou
+        ] + self.metricas.as_row() + self.tokens.as_row()
 
     @staticmethod
     def get_csv_header():
-        return list(Execucao(None, None, None, None, 0).__dict__)[:-2]+list(Metricas(None).__dict__)+list(CodeTokens(None).__dict__)
+        return list(Execucao.__colunas) + Metricas.get_csv_header() + CodeTokens.get_csv_header()
+
+    @staticmethod
+    def get_column_types():
+        return ([str, int, int, str, int, timedelta, timedelta, int, int, int, float, float, bool] +
+                Metricas.get_column_types() + CodeTokens.get_column_types())
 
 
 class Solucao(CSVEntity):
@@ -361,6 +329,9 @@ class Solucao(CSVEntity):
         - Métricas Brutas de Código.
     """
 
+    __slots__ = ('codigo', 'metricas', 'tokens')
+    __colunas = ('codigo',)
+
     def __init__(self, codigo: int):
         """
         Método Construtor
@@ -373,110 +344,24 @@ class Solucao(CSVEntity):
 
     @staticmethod
     def get_csv_header():
-        return list(Solucao(0).__dict__)[:-2]+list(Metricas(None).__dict__)+list(CodeTokens(None).__dict__)
+        return list(Solucao.__colunas) + Metricas.get_csv_header() + CodeTokens.get_csv_header()
+
+    @staticmethod
+    def get_column_types():
+        return [int] + Metricas.get_column_types() + CodeTokens.get_column_types()
 
     def as_row(self):
         return [
-            self.codigo,
-            self.metricas.complexity,
-            self.metricas.n_classes,
-            self.metricas.n_functions,
-            self.metricas.loc,
-            self.metricas.lloc,
-            self.metricas.sloc,
-            self.metricas.single_comments,
-            self.metricas.comments,
-            self.metricas.multilines,
-            self.metricas.blank_lines,
-            self.metricas.h1,
-            self.metricas.h2,
-            self.metricas.N1,
-            self.metricas.N2,
-            self.metricas.h,
-            self.metricas.N,
-            self.metricas.calculated_N,
-            self.metricas.volume,
-            self.metricas.difficulty,
-            self.metricas.effort,
-            self.metricas.bugs,
-            self.metricas.time,
-            self.tokens.imports,
-            self.tokens.assignments,
-            self.tokens.assignments_unique,
-            self.tokens.kwds,
-            self.tokens.kwds_unique,
-            self.tokens.lt_numbers,
-            self.tokens.lt_strings,
-            self.tokens.lt_booleans,
-            self.tokens.lgc_op,
-            self.tokens.lgc_op_unique,
-            self.tokens.and_op,
-            self.tokens.or_op,
-            self.tokens.not_op,
-            self.tokens.arithmetic_op,
-            self.tokens.arithmetic_op_unique,
-            self.tokens.add_op,
-            self.tokens.minus_op,
-            self.tokens.mult_op,
-            self.tokens.div_op,
-            self.tokens.mod_op,
-            self.tokens.power_op,
-            self.tokens.div_floor_op,
-            self.tokens.cmp_op,
-            self.tokens.cmp_op_unique,
-            self.tokens.equal_op,
-            self.tokens.not_eq_op,
-            self.tokens.lt_op,
-            self.tokens.gt_op,
-            self.tokens.less_op,
-            self.tokens.greater_op,
-            self.tokens.bitwise_op,
-            self.tokens.bitwise_op_unique,
-            self.tokens.bitwise_and,
-            self.tokens.bitwise_or,
-            self.tokens.bitwise_xor,
-            self.tokens.bitwise_not,
-            self.tokens.lshift_op,
-            self.tokens.rshift_op,
-            self.tokens.identity_op,
-            self.tokens.membership_op,
-            self.tokens.conditionals,
-            self.tokens.ifs,
-            self.tokens.elifs,
-            self.tokens.elses,
-            self.tokens.loops,
-            self.tokens.whiles,
-            self.tokens.fors,
-            self.tokens.breaks,
-            self.tokens.continues,
-            self.tokens.builtin_f,
-            self.tokens.builtin_f_unique,
-            self.tokens.type_f,
-            self.tokens.type_f_unique,
-            self.tokens.lambdas,
-            self.tokens.lpar,
-            self.tokens.rpar,
-            self.tokens.lsqb,
-            self.tokens.rsqb,
-            self.tokens.lbrace,
-            self.tokens.rbrace,
-            self.tokens.commas,
-            self.tokens.colons,
-            self.tokens.dots,
-            self.tokens.prints,
-            self.tokens.inputs,
-            self.tokens.len,
-            self.tokens.uident,
-            self.tokens.uident_unique,
-            self.tokens.uident_mean,
-            self.tokens.uident_per_line,
-            self.tokens.uident_chars
-        ]
+            self.codigo
+        ] + self.metricas.as_row() + self.tokens.as_row()
 
 
 class Erro(CSVEntity):
     """Entidade que representa a contagem de Erros de um mesmo Tipo, acusados pelo Interpretador Python, enquanto um :class:`Estudante` tentava resolver um Exercício."""
 
+    __slots__ = ('periodo', 'turma', 'atividade', 'estudante', 'exercicio', 'tipo', 'ocorrencias')
+    __colunas = __slots__
+
     def __init__(self, tipo: str, count: int):
         """
         Método Construtor
@@ -505,109 +390,71 @@ class Erro(CSVEntity):
 
     @staticmethod
     def get_csv_header():
-        return list(Erro('', 0).__dict__)
+        return list(Erro.__colunas)
+
+    @staticmethod
+    def get_column_types():
+        return [str, int, str, int, int, str, int]
 
 
 class Metricas:
     """Classe que representa as métricas de código extraídas usando o módulo 'radon'"""
 
+    __slots__ = ('complexity', 'n_classes', 'n_functions', 'loc', 'lloc', 'sloc', 'single_comments', 'comments',
+                 'multilines', 'blank_lines', 'h1', 'h2', 'N1', 'N2', 'h', 'N', 'calculated_N', 'volume', 'difficulty',
+                 'effort', 'bugs', 'time')
+    __valores = attrgetter(*__slots__)
+
     def __init__(self, default_value):
-        self.complexity = default_value
-        self.n_classes = default_value
-        self.n_functions = default_value
-        self.loc = default_value
-        self.lloc = default_value
-        self.sloc = default_value
-        self.single_comments = default_value
-        self.comments = default_value
-        self.multilines = default_value
-        self.blank_lines = default_value
-        self.h1 = default_value
-        self.h2 = default_value
-        self.N1 = default_value
-        self.N2 = default_value
-        self.h = default_value
-        self.N = default_value
-        self.calculated_N = default_value
-        self.volume = default_value
-        self.difficulty = default_value
-        self.effort = default_value
-        self.bugs = default_value
-        self.time = default_value
+        for nome in Metricas.__slots__:
+            setattr(self, nome, default_value)
+
+    def as_row(self):
+        """Retorna os valores das métricas numa lista, na ordem de 'get_csv_header'."""
+        return list(Metricas.__valores(self))
+
+    @staticmethod
+    def get_csv_header():
+        """Retorna o nome das colunas, iguais aos nomes dos atributos."""
+        return list(Metricas.__slots__)
+
+    @staticmethod
+    def get_column_types():
+        """Retorna o tipo de cada métrica: as métricas de Halstead calculadas são reais, as demais contagens inteiras."""
+        reais = ('calculated_N', 'volume', 'difficulty', 'effort', 'bugs', 'time')
+        return [float if nome in reais else int for nome in Metricas.__slots__]
 
 
 class CodeTokens:
     """Classe que representa os Tokens obtidos de um código Python"""
 
+    __slots__ = ('imports', 'assignments', 'assignments_unique', 'kwds', 'kwds_unique', 'lt_numbers', 'lt_strings',
+                 'lt_booleans', 'lgc_op', 'lgc_op_unique', 'and_op', 'or_op', 'not_op', 'arithmetic_op',
+                 'arithmetic_op_unique', 'add_op', 'minus_op', 'mult_op', 'div_op', 'mod_op', 'power_op',
+                 'div_floor_op', 'cmp_op', 'cmp_op_unique', 'equal_op', 'not_eq_op', 'lt_op', 'gt_op', 'less_op',
+                 'greater_op', 'bitwise_op', 'bitwise_op_unique', 'bitwise_and', 'bitwise_or', 'bitwise_xor',
+                 'bitwise_not', 'lshift_op', 'rshift_op', 'identity_op', 'membership_op', 'conditionals', 'ifs',
+                 'elifs', 'elses', 'loops', 'whiles', 'fors', 'breaks', 'continues', 'builtin_f', 'builtin_f_unique',
+                 'type_f', 'type_f_unique', 'lambdas', 'lpar', 'rpar', 'lsqb', 'rsqb', 'lbrace', 'rbrace', 'commas',
+                 'colons', 'dots', 'prints', 'inputs', 'len', 'uident', 'uident_unique', 'uident_mean',
+                 'uident_per_line', 'uident_chars')
+    __valores = attrgetter(*__slots__)
+
     def __init__(self, default_value):
-        self.imports = default_value
-        self.assignments = default_value
-        self.assignments_unique = default_value
-        self.kwds = default_value
-        self.kwds_unique = default_value
-        self.lt_numbers = default_value
-        self.lt_strings = default_value
-        self.lt_booleans = default_value
-        self.lgc_op = default_value
-        self.lgc_op_unique = default_value
-        self.and_op = default_value
-        self.or_op = default_value
-        self.not_op = default_value
-        self.arithmetic_op = default_value
-        self.arithmetic_op_unique = default_value
-        self.add_op = default_value
-        self.minus_op = default_value
-        self.mult_op = default_value
-        self.div_op = default_value
-        self.mod_op = default_value
-        self.power_op = default_value
-        self.div_floor_op = default_value
-        self.cmp_op = default_value
-        self.cmp_op_unique = default_value
-        self.equal_op = default_value
-        self.not_eq_op = default_value
-        self.lt_op = default_value
-        self.gt_op = default_value
-        self.less_op = default_value
-        self.greater_op = default_value
-        self.bitwise_op = default_value
-        self.bitwise_op_unique = default_value
-        self.bitwise_and = default_value
-        self.bitwise_or = default_value
-        self.bitwise_xor = default_value
-        self.bitwise_not = default_value
-        self.lshift_op = default_value
-        self.rshift_op = default_value
-        self.identity_op = default_value
-        self.membership_op = default_value
-        self.conditionals = default_value
-        self.ifs = default_value
-        self.elifs = default_value
-        self.elses = default_value
-        self.loops = default_value
-        self.whiles = default_value
-        self.fors = default_value
-        self.breaks = default_value
-        self.continues = default_value
-        self.builtin_f = default_value
-        self.builtin_f_unique = default_value
-        self.type_f = default_value
-        self.type_f_unique = default_value
-        self.lambdas = default_value
-        self.lpar = default_value
-        self.rpar = default_value
-        self.lsqb = default_value
-        self.rsqb = default_value
-        self.lbrace = default_value
-        self.rbrace = default_value
-        self.commas = default_value
-        self.colons = default_value
-        self.dots = default_value
-        self.prints = default_value
-        self.inputs = default_value
-        self.len = default_value
-        self.uident = default_value
-        self.uident_unique = default_value
-        self.uident_mean = default_value
-        self.uident_per_line = default_value
-        self.uident_chars = default_value
+        for nome in CodeTokens.__slots__:
+            setattr(self, nome, default_value)
+
+    def as_row(self):
+        """Retorna os valores dos tokens numa lista, na ordem de 'get_csv_header'."""
+        return list(CodeTokens.__valores(self))
+
+    @staticmethod
+    def get_csv_header():
+        """Retorna o nome das colunas, iguais aos nomes dos atributos."""
+        return list(CodeTokens.__slots__)
+
+    @staticmethod
+    def get_column_types():
+        """Retorna o tipo de cada token: as médias por identificador/linha são reais, as demais contagens inteiras."""
+        reais = ('uident_mean', 'uident_per_line', 'uident_chars')
+        return [float if nome in reais else int for nome in CodeTokens.__slots__]
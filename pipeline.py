@@ -0,0 +1,509 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import copy
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from checkpoint import ExtractionCheckpoint
+from csv_parser import CSVParser
+from extractor import CodebenchExtractor
+from manifest import ExtractionManifest
+from model import *
+from profiler import StageProfiler
+from progress import ExtractionProgress
+from shard import ExtractionShard
+from util import Logger
+from walker import ParallelWalker
+
+
+def _inicializar_worker(cache, instrumentacao, catalogo, threads, arquivo):
+    """
+    Inicializa um processo de trabalho (worker), configurando o módulo de log, o cache de métricas, a instrumentação,
+    o catálogo do dataset, a listagem paralela dos diretórios e o arquivo compactado do dataset.
+
+    :param cache: O cache de métricas e tokens usado pelo processo principal (ou None).
+    :param instrumentacao: Configuração da instrumentação do processo principal (ver 'StageProfiler.config'), ou None.
+    :param catalogo: O catálogo do dataset usado pelo processo principal (ou None).
+    :param threads: Quantidade de threads da listagem paralela dos diretórios, ou None se desabilitada.
+    :param arquivo: O arquivo compactado do dataset usado pelo processo principal (ou None).
+    """
+    Logger.configure()
+    CodebenchExtractor.set_cache(cache)
+    CodebenchExtractor.set_catalog(catalogo)
+    CodebenchExtractor.set_archive(arquivo)
+    # as threads não são herdadas pelo processo, cada processo cria a sua listagem paralela
+    CodebenchExtractor.set_walker(ParallelWalker(threads) if threads is not None else None)
+    if instrumentacao is not None:
+        StageProfiler.enable(*instrumentacao)
+
+
+def _extrair_execucoes_estudante(turma: Turma, codigo: int, path: str, arquivos=None, conteudos=None):
+    """
+    Extrai as :class:`Execucao` de um :class:`Estudante` num processo de trabalho (worker).
+
+    Está declarada no nível do módulo para que possa ser enviada (pickle) ao :class:`ProcessPoolExecutor`.
+
+    :param turma: Cópia da Turma do Estudante, contendo apenas o Período e as Atividades.
+    :param codigo: Código numérico único do Estudante.
+    :param path: Caminho absoluto para o diretório do Estudante.
+    :param arquivos: Arquivos do Estudante (ver 'ExtractionManifest.scan') cujo hash deve ser calculado, ou None.
+    :param conteudos: Conteúdo dos arquivos do Estudante lidos do arquivo compactado do dataset (ver
+        'DatasetArchive.read_tree'), ou None.
+    :return: Tupla com as linhas (tuplas de valores) das Execuções e dos Erros encontrados, os arquivos com hash, as
+        estatísticas da instrumentação deste processo de trabalho (ou None) e a medição do andamento (ver
+        'ExtractionProgress.update').
+    """
+    inicio = time.perf_counter()
+    estudante = Estudante(turma.periodo, turma, codigo, path)
+    mais_lento = [None, 0.0]
+    archive = CodebenchExtractor.get_archive()
+    if archive is not None:
+        archive.set_contents(conteudos)
+    try:
+        # as Execuções são convertidas em linhas assim que extraídas, sem serem mantidas no Estudante
+        execucoes, erros = ExtractionPipeline.rows(
+            _medir_execucoes(CodebenchExtractor.iter_execucoes(estudante, com_arquivo=True), mais_lento))
+        if arquivos is not None:
+            arquivos = ExtractionManifest.hash_files(path, arquivos, archive)
+    finally:
+        if archive is not None:
+            archive.set_contents(None)
+    # as estatísticas de um processo de trabalho são enviadas ao processo principal junto com o resultado
+    estatisticas = StageProfiler.collect() if multiprocessing.parent_process() is not None else None
+    medicao = (os.getpid(), time.perf_counter() - inicio, *mais_lento)
+    return execucoes, erros, arquivos, estatisticas, medicao
+
+
+def _medir_execucoes(execucoes, mais_lento):
+    """
+    Retorna (yield) as Execuções de um Estudante, medindo o tempo de extração de cada arquivo de log.
+
+    :param execucoes: Gerador das tuplas (arquivo de log, Execução) do Estudante (ver
+        'CodebenchExtractor.iter_execucoes' com 'com_arquivo=True').
+    :param mais_lento: Lista [arquivo, segundos] com o arquivo mais lento, atualizada a cada Execução.
+    """
+    execucoes = iter(execucoes)
+    while True:
+        inicio = time.perf_counter()
+        item = next(execucoes, None)
+        if item is None:
+            return
+        segundos = time.perf_counter() - inicio
+        arquivo, execucao = item
+        if segundos > mais_lento[1]:
+            mais_lento[0] = arquivo
+            mais_lento[1] = segundos
+        yield execucao
+
+
+class ExtractionPipeline:
+    """Classe responsável por extrair todas as Entidades do dataset Codebench numa única varredura."""
+
+    # quantidade de tarefas pendentes por processo na extração paralela, limita a memória usada pelos resultados
+    __tarefas_por_worker = 4
+
+    @staticmethod
+    def has_checkpoint():
+        """Verifica se existe o checkpoint de uma extração interrompida, que pode ser continuada (resume)."""
+        return ExtractionPipeline.__checkpoint().exists()
+
+    @staticmethod
+    def run(dataset_dir: str, workers: int = 1, manifest: ExtractionManifest = None, resume: bool = False,
+            shard: ExtractionShard = None):
+        """
+        Percorre o dataset uma única vez (períodos -> turmas -> atividades -> estudantes -> execuções) e salva
+        cada Entidade no respectivo arquivo '.csv' assim que ela é extraída.
+
+        Os arquivos 'periodos.csv', 'turmas.csv', 'atividades.csv', 'estudantes.csv', 'execucoes.csv' e 'erros.csv'
+        são gerados ao mesmo tempo, evitando que os diretórios e arquivos '.data' sejam lidos novamente para cada
+        um deles.
+
+        Ao final de cada Turma é salvo um checkpoint (ver :class:`ExtractionCheckpoint`), uma extração interrompida
+        pode ser continuada a partir dele com 'resume=True'.
+
+        Exemplo de uso:
+            ExtractionPipeline.run('cb_dataset_v1.11/', workers=8)
+
+        :param dataset_dir: Caminho absoluto para o diretório do dataset do Codebench.
+        :type dataset_dir: str
+        :param workers: Quantidade de processos usados na extração das Execuções (1 = sem paralelismo).
+        :type workers: int
+        :param manifest: Manifesto de uma extração anterior, se informado apenas os Estudantes com arquivos novos ou
+            alterados são processados novamente (extração incremental).
+        :type manifest: ExtractionManifest
+        :param resume: Se verdadeiro, continua a extração interrompida a partir do último checkpoint.
+        :type resume: bool
+        :param shard: Se informado, extrai apenas os Períodos e Turmas do shard (extração distribuída).
+        :type shard: ExtractionShard
+        """
+        checkpoint = ExtractionPipeline.__start_checkpoint(dataset_dir, 'run', resume, shard)
+
+        periodos = CodebenchExtractor.extract_periodos(dataset_dir)
+        if shard is None:
+            CSVParser.salvar_periodos(periodos)
+        elif not checkpoint.turmas:
+            # cada Período é registrado no índice do shard, para que a união mantenha a ordem do dataset
+            for posicao, periodo in enumerate(periodos):
+                if shard.select_periodo(periodo):
+                    CSVParser.salvar_periodos([periodo], append=True)
+                    shard.add_periodo(posicao, CSVParser.sync_output_files())
+
+        ExtractionPipeline.__extract(periodos, workers, manifest, checkpoint, shard, salvar=True)
+
+    @staticmethod
+    def extract_execucoes(dataset_dir: str, workers: int = 1, manifest: ExtractionManifest = None,
+                          resume: bool = False, shard: ExtractionShard = None):
+        """
+        Extrai as :class:`Execucao` (e os :class:`Erro`) de todos os Estudantes do dataset, salvando-as nos arquivos
+        'execucoes.csv' e 'erros.csv'.
+
+        :param dataset_dir: Caminho absoluto para o diretório do dataset do Codebench.
+        :type dataset_dir: str
+        :param workers: Quantidade de processos usados na extração das Execuções (1 = sem paralelismo).
+        :type workers: int
+        :param manifest: Manifesto de uma extração anterior, usado na extração incremental (ou None).
+        :type manifest: ExtractionManifest
+        :param resume: Se verdadeiro, continua a extração interrompida a partir do último checkpoint.
+        :type resume: bool
+        :param shard: Se informado, extrai apenas os Períodos e Turmas do shard (extração distribuída).
+        :type shard: ExtractionShard
+        """
+        checkpoint = ExtractionPipeline.__start_checkpoint(dataset_dir, 'execucoes', resume, shard)
+        periodos = CodebenchExtractor.extract_periodos(dataset_dir)
+        ExtractionPipeline.__extract(periodos, workers, manifest, checkpoint, shard, salvar=False)
+
+    @staticmethod
+    def extract_periodos(dataset_dir: str):
+        """
+        Extrai os :class:`Periodo` do dataset, salvando-os no arquivo 'periodos.csv'.
+
+        :param dataset_dir: Caminho absoluto para o diretório do dataset do Codebench.
+        :type dataset_dir: str
+        """
+        CSVParser.salvar_periodos(CodebenchExtractor.extract_periodos(dataset_dir))
+
+    @staticmethod
+    def extract_turmas(dataset_dir: str):
+        """
+        Extrai as :class:`Turma` de todos os Períodos do dataset, salvando-as no arquivo 'turmas.csv'.
+
+        :param dataset_dir: Caminho absoluto para o diretório do dataset do Codebench.
+        :type dataset_dir: str
+        """
+        CSVParser.salvar_turmas(turma for periodo in CodebenchExtractor.extract_periodos(dataset_dir)
+                                for turma in CodebenchExtractor.iter_turmas(periodo))
+
+    @staticmethod
+    def extract_atividades(dataset_dir: str):
+        """
+        Extrai as :class:`Atividade` de todas as Turmas do dataset, salvando-as no arquivo 'atividades.csv'.
+
+        :param dataset_dir: Caminho absoluto para o diretório do dataset do Codebench.
+        :type dataset_dir: str
+        """
+        atividades = []
+        for periodo in CodebenchExtractor.extract_periodos(dataset_dir):
+            for turma in CodebenchExtractor.iter_turmas(periodo):
+                CodebenchExtractor.extract_atividades(turma)
+                atividades.extend(turma.atividades)
+        CSVParser.salvar_atividades(atividades)
+
+    @staticmethod
+    def extract_estudantes(dataset_dir: str):
+        """
+        Extrai os :class:`Estudante` de todas as Turmas do dataset, salvando-os no arquivo 'estudantes.csv'.
+
+        :param dataset_dir: Caminho absoluto para o diretório do dataset do Codebench.
+        :type dataset_dir: str
+        """
+        CSVParser.salvar_estudantes(estudante for periodo in CodebenchExtractor.extract_periodos(dataset_dir)
+                                    for turma in CodebenchExtractor.iter_turmas(periodo)
+                                    for estudante in CodebenchExtractor.iter_estudantes(turma))
+
+    @staticmethod
+    def extract_solucoes(solutions_dir: str):
+        """
+        Extrai as :class:`Solucao` dos instrutores, salvando-as no arquivo 'solucoes.csv'.
+
+        :param solutions_dir: Caminho absoluto para o diretório das soluções dos instrutores.
+        :type solutions_dir: str
+        """
+        CSVParser.salvar_solucoes(CodebenchExtractor.extract_solucoes(solutions_dir))
+
+    @staticmethod
+    def __checkpoint():
+        """Retorna o checkpoint da extração, salvo no diretório dos arquivos de saída '.csv'."""
+        return ExtractionCheckpoint(os.path.join(CSVParser.get_output_dir(), 'checkpoint.json'))
+
+    @staticmethod
+    def __start_checkpoint(dataset_dir: str, modo: str, resume: bool, shard: ExtractionShard):
+        """
+        Carrega o checkpoint da extração interrompida ou inicia um novo, preparando os arquivos de saída '.csv'.
+
+        :param dataset_dir: Caminho do diretório do dataset.
+        :param modo: Tipo da extração ('run' ou 'execucoes').
+        :param resume: Se verdadeiro, tenta continuar a extração interrompida.
+        :param shard: O shard da extração distribuída (ou None).
+        :return: O checkpoint da extração.
+        """
+        checkpoint = ExtractionPipeline.__checkpoint()
+        # uma extração só pode ser continuada pelo mesmo shard
+        modo_checkpoint = modo if shard is None else f'{modo} {shard.descricao()}'
+        somente_execucoes = modo == 'execucoes'
+        if resume and not CSVParser.can_resume():
+            # os arquivos colunares e o banco de dados não podem ser truncados de volta ao checkpoint
+            Logger.warn('A extração com formato colunar ou banco de dados não pode ser continuada, ela será iniciada '
+                        'novamente.')
+            resume = False
+        if not (resume and checkpoint.exists() and checkpoint.load(dataset_dir, modo_checkpoint) and
+                CSVParser.truncate_output_files(checkpoint.tamanhos)):
+            if resume and checkpoint.modo is not None:
+                Logger.warn('Não foi possível continuar a extração, ela será iniciada novamente.')
+            # remove os arquivos de uma extração anterior, pois as entidades são adicionadas aos arquivos
+            CSVParser.reset_output_files(somente_execucoes)
+            checkpoint.start(dataset_dir, modo_checkpoint)
+            checkpoint.save(CSVParser.sync_output_files(somente_execucoes))
+
+        if shard is not None:
+            shard.start(CSVParser.get_output_dir(), dataset_dir, modo, checkpoint)
+        return checkpoint
+
+    @staticmethod
+    def __iter_turmas(periodos, checkpoint: ExtractionCheckpoint, shard: ExtractionShard):
+        """
+        Percorre as Turmas de cada Período e retorna (yield) as Turmas ainda não concluídas no checkpoint.
+
+        As Turmas não são mantidas nos Períodos, assim cada Turma (e seus Estudantes) é descartada após ser salva.
+
+        :param periodos: Lista de Períodos letivos a serem percorridos.
+        :param checkpoint: Checkpoint da extração.
+        :param shard: O shard da extração distribuída, apenas suas Turmas são retornadas (ou None).
+        """
+        for indice, periodo in enumerate(periodos):
+            if shard is not None and not shard.select_periodo(periodo):
+                continue
+            # as atividades de cada turma são extraídas junto com as turmas
+            for posicao, turma in enumerate(CodebenchExtractor.iter_turmas(periodo)):
+                if shard is not None:
+                    if not shard.select_turma(turma):
+                        continue
+                    shard.register(turma, indice, posicao)
+                if os.path.abspath(turma.path) in checkpoint.turmas:
+                    continue
+                yield turma
+            Logger.info(f'Extração do Período concluída: {periodo.descricao}')
+
+    @staticmethod
+    def __extract(periodos, workers: int, manifest: ExtractionManifest, checkpoint: ExtractionCheckpoint,
+                  shard: ExtractionShard, salvar: bool):
+        """
+        Extrai e salva as Execuções dos Estudantes de cada Turma, de forma sequencial ou usando um
+        :class:`ProcessPoolExecutor`.
+
+        Na extração paralela os processos retornam apenas as linhas das Execuções e Erros, que são salvas por este
+        processo (único escritor) na mesma ordem em que os Estudantes foram enviados.
+
+        Com um manifesto, os Estudantes cujos arquivos não mudaram têm as linhas recuperadas do manifesto e apenas
+        os demais são processados.
+
+        :param periodos: Lista de Períodos letivos a serem percorridos.
+        :param workers: Quantidade de processos usados na extração (1 = sem paralelismo).
+        :param manifest: Manifesto da extração incremental (ou None).
+        :param checkpoint: Checkpoint da extração.
+        :param shard: O shard da extração distribuída (ou None).
+        :param salvar: Se verdadeiro, também salva as Turmas, Atividades e Estudantes.
+        """
+        # numa extração continuada as Turmas já concluídas não são percorridas novamente
+        retomada = bool(checkpoint.turmas)
+        if manifest is not None:
+            manifest.begin()
+
+        # pré-varredura dos arquivos de log, para o percentual concluído e a estimativa de término
+        progresso = ExtractionProgress(os.path.join(CSVParser.get_output_dir(), 'progresso.json'))
+        progresso.scan(periodos, shard, checkpoint.turmas, CodebenchExtractor.get_index(),
+                       CodebenchExtractor.get_walker())
+        escritor = _OrderedWriter(salvar, manifest, checkpoint, shard, progresso)
+        executor = None
+        if workers > 1:
+            walker = CodebenchExtractor.get_walker()
+            threads = walker.threads if walker is not None else None
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker,
+                                           initargs=(CodebenchExtractor.get_cache(), StageProfiler.config(),
+                                                     CodebenchExtractor.get_catalog(), threads,
+                                                     CodebenchExtractor.get_archive()))
+        limite = workers * ExtractionPipeline.__tarefas_por_worker if executor is not None else 1
+        archive = CodebenchExtractor.get_archive()
+        pendentes = deque()
+        try:
+            for turma in ExtractionPipeline.__iter_turmas(periodos, checkpoint, shard):
+                contexto = ExtractionPipeline.__context(turma) if manifest is not None else None
+                turma_copia = ExtractionPipeline.__copy_turma(turma) if executor is not None else turma
+                # a Turma entra na fila para que seus dados sejam salvos na ordem, antes dos seus Estudantes
+                pendentes.append(turma)
+                for estudante in CodebenchExtractor.iter_estudantes(turma):
+                    arquivos, resultado, conteudos = None, None, None
+                    if manifest is not None:
+                        arquivos = ExtractionManifest.scan(estudante.path, CodebenchExtractor.get_index())
+                        if archive is not None and not archive.zip:
+                            # o '.tar' só pode ser lido em sequência, os arquivos do Estudante são lidos antes que o
+                            # manifesto calcule o hash dos arquivos com outra data de modificação
+                            conteudos = archive.read_tree(estudante.path)
+                            archive.set_contents(conteudos)
+                        try:
+                            resultado = manifest.get(estudante.path, contexto, arquivos, archive)
+                        finally:
+                            if conteudos is not None:
+                                archive.set_contents(None)
+
+                    if resultado is None and conteudos is None and archive is not None:
+                        # os arquivos do Estudante são lidos por este processo numa única passagem, na ordem do arquivo
+                        # compactado, e enviados junto com a tarefa
+                        conteudos = archive.read_tree(estudante.path)
+
+                    if resultado is not None:
+                        # o resultado já está pronto, mas é salvo na ordem dos Estudantes enviados antes dele
+                        tarefa = Future()
+                        tarefa.set_result(resultado + (None, None, None))
+                    elif executor is not None:
+                        tarefa = executor.submit(_extrair_execucoes_estudante, turma_copia, estudante.codigo,
+                                                 estudante.path, arquivos, conteudos)
+                    else:
+                        tarefa = Future()
+                        tarefa.set_result(_extrair_execucoes_estudante(turma, estudante.codigo, estudante.path,
+                                                                       arquivos, conteudos))
+                    pendentes.append((tarefa, estudante, contexto))
+
+                    while len(pendentes) > limite:
+                        escritor.write(pendentes.popleft())
+            while pendentes:
+                escritor.write(pendentes.popleft())
+            escritor.finish_turma()
+            progresso.finish()
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            CSVParser.close_writers()
+
+        if manifest is not None:
+            # os registros das Turmas de outros shards (ou já concluídas) não foram consultados nesta extração
+            manifest.end(prune=not retomada and shard is None)
+        # a extração foi concluída, não há mais o que continuar
+        checkpoint.clear()
+
+    @staticmethod
+    def rows(execucoes):
+        """
+        Retorna as linhas (tuplas de valores) das Execuções e dos seus Erros.
+
+        As Execuções são percorridas uma única vez, assim podem ser retornadas por um gerador (ver
+        'CodebenchExtractor.iter_execucoes') e descartadas logo após a conversão.
+
+        :param execucoes: As Execuções de um Estudante (ex.: 'estudante.execucoes').
+        :return: Tupla com as listas de linhas das Execuções e dos Erros.
+        """
+        linhas, erros = [], []
+        for execucao in execucoes:
+            linhas.append(tuple(execucao.as_row()))
+            erros.extend(tuple(erro.as_row()) for erro in execucao.erros)
+        return linhas, erros
+
+    @staticmethod
+    def __context(turma: Turma):
+        """Calcula o contexto do manifesto para os Estudantes de uma Turma, a partir das suas Atividades."""
+        return ExtractionManifest.context([atividade.as_row() for atividade in turma.atividades])
+
+    @staticmethod
+    def __copy_turma(turma: Turma):
+        """
+        Cria uma cópia da :class:`Turma` contendo apenas o Período (sem as demais Turmas) e as Atividades.
+
+        Evita que toda a árvore de Entidades já extraídas seja serializada em cada tarefa enviada aos processos.
+
+        :param turma: A Turma a ser copiada.
+        :return: A cópia da Turma.
+        """
+        periodo = Periodo(turma.periodo.descricao, turma.periodo.path)
+        copia = Turma(periodo, turma.codigo, turma.path)
+        copia.descricao = turma.descricao
+        for atividade in turma.atividades:
+            atividade = copy.copy(atividade)
+            atividade.periodo = periodo
+            atividade.turma = copia
+            copia.atividades.append(atividade)
+        return copia
+
+
+class _OrderedWriter:
+    """
+    Escritor único dos resultados da extração, na ordem em que as Turmas e Estudantes foram enviados.
+
+    Ao iniciar uma Turma salva seus dados, ao concluí-la grava os arquivos '.csv' em disco e salva o checkpoint (e o
+    índice do shard). Assim o checkpoint sempre corresponde a Turmas completas.
+    """
+
+    def __init__(self, salvar: bool, manifest: ExtractionManifest, checkpoint: ExtractionCheckpoint,
+                 shard: ExtractionShard, progresso: ExtractionProgress):
+        """
+        Método Construtor.
+
+        :param salvar: Se verdadeiro, também salva as Turmas, Atividades e Estudantes.
+        :param manifest: Manifesto da extração incremental (ou None).
+        :param checkpoint: Checkpoint da extração.
+        :param shard: O shard da extração distribuída (ou None).
+        :param progresso: O andamento da extração, atualizado a cada Estudante salvo.
+        """
+        self.salvar = salvar
+        self.manifest = manifest
+        self.checkpoint = checkpoint
+        self.shard = shard
+        self.progresso = progresso
+        self.__turma = None
+
+    def write(self, pendente):
+        """
+        Salva o próximo item da fila de extração: o início de uma Turma ou o Estudante e o resultado da sua tarefa.
+
+        :param pendente: Uma :class:`Turma` ou a tupla (tarefa, Estudante, contexto do manifesto).
+        """
+        if isinstance(pendente, Turma):
+            self.__start_turma(pendente)
+            return
+
+        tarefa, estudante, contexto = pendente
+        execucoes, erros, arquivos, estatisticas, medicao = tarefa.result()
+        StageProfiler.merge(estatisticas)
+        path = estudante.path
+        if self.salvar:
+            # os Estudantes são extraídos (e salvos) um por vez, junto com as suas Execuções
+            CSVParser.salvar_estudantes([estudante], append=True)
+        CSVParser.salvar_execucoes_rows(execucoes)
+        # os erros são acumulados e salvos em lotes
+        CSVParser.salvar_erros_rows(erros)
+        if self.manifest is not None and arquivos is not None:
+            self.manifest.put(path, contexto, arquivos, execucoes, erros)
+        self.progresso.update(path, len(execucoes), medicao)
+
+    def __start_turma(self, turma: Turma):
+        """Conclui a Turma anterior e salva os dados da nova Turma."""
+        self.finish_turma()
+        self.__turma = turma
+        if self.salvar:
+            # cada Turma é salva junto com seus dados, assim as linhas de uma Turma concluída formam um único trecho
+            CSVParser.salvar_turmas([turma], append=True)
+            CSVParser.salvar_atividades(turma.atividades, append=True)
+
+    def finish_turma(self):
+        """Conclui a Turma atual, gravando os arquivos '.csv' em disco e salvando o checkpoint."""
+        if self.__turma is None:
+            return
+        tamanhos = CSVParser.sync_output_files(somente_execucoes=not self.salvar)
+        if self.shard is not None:
+            self.shard.add_turma(self.__turma, tamanhos)
+        self.checkpoint.save(tamanhos, turma=os.path.abspath(self.__turma.path))
+        self.__turma = None
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import cProfile
+import functools
+import glob
+import json
+import os
+import pstats
+import threading
+import time
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+from util import Logger
+
+
+class StageProfiler:
+    """
+    Instrumentação das etapas da extração: tempo acumulado, quantidade de chamadas e bytes lidos de cada etapa.
+
+    As etapas são os métodos do extrator (e a escrita dos arquivos '.csv') decorados com 'stage'. Desativada (padrão),
+    a instrumentação custa apenas a verificação de uma variável por chamada. O tempo de uma etapa inclui o das etapas
+    chamadas dentro dela (ex.: as métricas dos códigos corretos dentro da leitura dos logs de Execuções) e, na extração
+    paralela, é a soma dos tempos de todos os processos.
+
+    Opcionalmente cada etapa é perfilada com o 'cProfile' ou o 'pyinstrument' (módulo opcional). Apenas a etapa mais
+    externa de cada chamada é perfilada, pois os perfis não podem ser aninhados. Os perfis são salvos por processo
+    ('<etapa>.<pid>.prof' ou '.html') e os do 'cProfile' são unidos em '<etapa>.prof' ao final (ver 'save').
+
+    Exemplo de uso:
+        StageProfiler.enable('cprofile', 'csv/perfil/')
+        ExtractionPipeline.run('cb_dataset_v1.11/', workers=8)
+        StageProfiler.save('csv/perfil.json')
+    """
+
+    PERFIS = ('cprofile', 'pyinstrument')
+
+    __ativo = False
+    __perfil = None
+    __diretorio = None
+    # etapa -> [chamadas, segundos, bytes]
+    __etapas = {}
+    # perfis de cada etapa neste processo, e a quantidade de etapas em execução (apenas a mais externa é perfilada)
+    __perfis = {}
+    __profundidade = 0
+    # as medições podem ser adicionadas por várias threads ao mesmo tempo
+    __lock = threading.Lock()
+
+    @staticmethod
+    def enable(perfil: str = None, diretorio: str = None):
+        """
+        Ativa a instrumentação, zerando as estatísticas.
+
+        :param perfil: 'cprofile' ou 'pyinstrument' para perfilar cada etapa, ou None para medir apenas os tempos.
+        :param diretorio: Diretório onde os perfis são salvos (obrigatório com um perfil).
+        """
+        if perfil is not None:
+            if perfil not in StageProfiler.PERFIS:
+                raise ValueError(f'Perfil inválido: {perfil}')
+            if perfil == 'pyinstrument' and pyinstrument is None:
+                raise ImportError("O perfil 'pyinstrument' depende do módulo 'pyinstrument' (pip install pyinstrument).")
+            if diretorio is None:
+                raise ValueError('O diretório dos perfis deve ser informado.')
+            os.makedirs(diretorio, exist_ok=True)
+        StageProfiler.__ativo = True
+        # um processo de trabalho criado por 'fork' pode ter herdado o lock adquirido por outra thread
+        StageProfiler.__lock = threading.Lock()
+        StageProfiler.__perfil = perfil
+        StageProfiler.__diretorio = diretorio
+        StageProfiler.__etapas = {}
+        StageProfiler.__perfis = {}
+        StageProfiler.__profundidade = 0
+
+    @staticmethod
+    def disable():
+        """Desativa a instrumentação, descartando as estatísticas e perfis não salvos."""
+        StageProfiler.__ativo = False
+        StageProfiler.__perfil = None
+        StageProfiler.__diretorio = None
+        StageProfiler.__etapas = {}
+        StageProfiler.__perfis = {}
+
+    @staticmethod
+    def is_enabled():
+        """Verifica se a instrumentação está ativa."""
+        return StageProfiler.__ativo
+
+    @staticmethod
+    def available(perfil: str):
+        """Verifica se o perfil pode ser usado ('pyinstrument' depende de um módulo opcional)."""
+        return perfil == 'cprofile' or (perfil == 'pyinstrument' and pyinstrument is not None)
+
+    @staticmethod
+    def config():
+        """Retorna a configuração da instrumentação, enviada aos processos de trabalho (ou None, se desativada)."""
+        return (StageProfiler.__perfil, StageProfiler.__diretorio) if StageProfiler.__ativo else None
+
+    @staticmethod
+    def stage(nome: str, tamanho=None):
+        """
+        Decorador que registra as chamadas de uma etapa.
+
+        :param nome: Nome da etapa.
+        :param tamanho: Função que recebe os mesmos argumentos da etapa e retorna a quantidade de bytes lidos, só é
+            chamada com a instrumentação ativa.
+        """
+        def decorator(funcao):
+            @functools.wraps(funcao)
+            def wrapper(*args, **kwargs):
+                if not StageProfiler.__ativo:
+                    return funcao(*args, **kwargs)
+                # as etapas executadas em outras threads (ex.: 'ParallelWalker') são medidas mas não perfiladas
+                principal = threading.current_thread() is threading.main_thread()
+                perfil = StageProfiler.__start_profile(nome) if principal else None
+                inicio = time.perf_counter()
+                try:
+                    return funcao(*args, **kwargs)
+                finally:
+                    segundos = time.perf_counter() - inicio
+                    if principal:
+                        StageProfiler.__stop_profile(perfil)
+                    StageProfiler.add(nome, segundos, tamanho(*args, **kwargs) if tamanho is not None else 0)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def __start_profile(nome: str):
+        """Inicia o perfil da etapa, se ela é a mais externa em execução, e o retorna (ou None)."""
+        StageProfiler.__profundidade += 1
+        if StageProfiler.__perfil is None or StageProfiler.__profundidade > 1:
+            return None
+        perfil = StageProfiler.__perfis.get(nome)
+        if perfil is None:
+            if StageProfiler.__perfil == 'cprofile':
+                perfil = cProfile.Profile()
+            else:
+                perfil = pyinstrument.Profiler()
+            StageProfiler.__perfis[nome] = perfil
+        if StageProfiler.__perfil == 'cprofile':
+            perfil.enable()
+        else:
+            perfil.start()
+        return perfil
+
+    @staticmethod
+    def __stop_profile(perfil):
+        """Interrompe o perfil iniciado por '__start_profile'."""
+        StageProfiler.__profundidade -= 1
+        if perfil is None:
+            return
+        if StageProfiler.__perfil == 'cprofile':
+            perfil.disable()
+        else:
+            perfil.stop()
+
+    @staticmethod
+    def add(nome: str, segundos: float, tamanho: int = 0, chamadas: int = 1):
+        """Adiciona uma medição (ou o total de várias medições) às estatísticas da etapa."""
+        with StageProfiler.__lock:
+            estatistica = StageProfiler.__etapas.get(nome)
+            if estatistica is None:
+                estatistica = StageProfiler.__etapas[nome] = [0, 0.0, 0]
+            estatistica[0] += chamadas
+            estatistica[1] += segundos
+            estatistica[2] += tamanho
+
+    @staticmethod
+    def collect():
+        """
+        Retorna e zera as estatísticas deste processo, salvando os seus perfis. Usado pelos processos de trabalho, cujas
+        estatísticas são enviadas junto com os resultados e unidas às do processo principal com 'merge'.
+
+        :return: Dicionário {etapa: [chamadas, segundos, bytes]}, ou None se a instrumentação está desativada.
+        """
+        if not StageProfiler.__ativo:
+            return None
+        etapas, StageProfiler.__etapas = StageProfiler.__etapas, {}
+        StageProfiler.__save_profiles()
+        return etapas
+
+    @staticmethod
+    def merge(etapas):
+        """Une as estatísticas de um processo de trabalho (ver 'collect') às deste processo."""
+        if not StageProfiler.__ativo or not etapas:
+            return
+        for nome, (chamadas, segundos, tamanho) in etapas.items():
+            StageProfiler.add(nome, segundos, tamanho, chamadas)
+
+    @staticmethod
+    def __save_profiles():
+        """Salva os perfis das etapas deste processo, sobrescrevendo os salvos anteriormente."""
+        for nome, perfil in StageProfiler.__perfis.items():
+            path = os.path.join(StageProfiler.__diretorio, f'{nome}.{os.getpid()}')
+            if StageProfiler.__perfil == 'cprofile':
+                perfil.dump_stats(path + '.prof')
+            elif perfil.last_session is not None:
+                with open(path + '.html', 'w', encoding='utf-8') as f:
+                    f.write(perfil.output_html())
+
+    @staticmethod
+    def __combine_profiles():
+        """Une os perfis do 'cProfile' salvos por cada processo num único arquivo por etapa ('<etapa>.prof')."""
+        for nome in StageProfiler.__etapas:
+            arquivos = glob.glob(os.path.join(glob.escape(StageProfiler.__diretorio), f'{glob.escape(nome)}.*.prof'))
+            if not arquivos:
+                continue
+            pstats.Stats(*arquivos).dump_stats(os.path.join(StageProfiler.__diretorio, f'{nome}.prof'))
+            for arquivo in arquivos:
+                os.remove(arquivo)
+
+    @staticmethod
+    def summary():
+        """
+        Retorna o resumo das etapas: chamadas, tempo acumulado, tempo médio por chamada, bytes lidos e MB/s.
+
+        :return: Dicionário {etapa: estatísticas}, ordenado pelo tempo acumulado (maior primeiro).
+        """
+        resumo = {}
+        for nome, (chamadas, segundos, tamanho) in sorted(StageProfiler.__etapas.items(), key=lambda e: -e[1][1]):
+            resumo[nome] = {
+                'chamadas': chamadas,
+                'segundos': round(segundos, 6),
+                'media_ms': round(segundos * 1000 / chamadas, 4) if chamadas else None,
+                'bytes': tamanho,
+                'mb_s': round(tamanho / 1024 / 1024 / segundos, 3) if segundos > 0 and tamanho else None,
+            }
+        return resumo
+
+    @staticmethod
+    def report(resumo):
+        """Exibe (log) uma tabela com o resumo das etapas (ver 'summary')."""
+        Logger.info(f"{'etapa':<34}{'chamadas':>10}{'segundos':>12}{'média (ms)':>12}{'MB':>10}{'MB/s':>10}")
+        for nome, r in resumo.items():
+            media = '-' if r['media_ms'] is None else f"{r['media_ms']:.3f}"
+            mb_s = '-' if r['mb_s'] is None else f"{r['mb_s']:.2f}"
+            Logger.info(f"{nome:<34}{r['chamadas']:>10}{r['segundos']:>12.3f}{media:>12}"
+                        f"{r['bytes'] / 1024 / 1024:>10.2f}{mb_s:>10}")
+
+    @staticmethod
+    def save(path: str):
+        """
+        Salva o resumo das etapas (ver 'summary') num arquivo JSON e os perfis deste processo, unindo os perfis do
+        'cProfile' de todos os processos.
+
+        :param path: Caminho do arquivo JSON.
+        :return: O resumo das etapas.
+        """
+        resumo = StageProfiler.summary()
+        if StageProfiler.__perfil is not None:
+            StageProfiler.__save_profiles()
+            if StageProfiler.__perfil == 'cprofile':
+                StageProfiler.__combine_profiles()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'data': time.strftime('%Y-%m-%d %H:%M:%S'), 'perfil': StageProfiler.__perfil,
+                       'diretorio_perfis': StageProfiler.__diretorio, 'etapas': resumo}, f, indent=2)
+        return resumo
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import contextlib
+import json
+import os
+import time
+
+from model import *
+from util import Logger
+
+
+class ExtractionProgress:
+    """
+    Andamento e vazão de uma extração das Execuções.
+
+    Antes da extração, uma pré-varredura ('scan') conta os arquivos de log (e os seus bytes) em 'users/*/executions'
+    de cada Turma a ser extraída. Durante a extração, cada Estudante concluído é registrado ('update') com as medições
+    do processo que o extraiu, e a cada intervalo são registrados no log o percentual concluído, os arquivos/s, os
+    MB/s, a estimativa de término (ETA), o arquivo mais lento e a situação de cada processo de trabalho. Os mesmos
+    contadores são salvos num arquivo JSON (substituído a cada intervalo), que pode ser lido por ferramentas de
+    monitoramento.
+
+    Exemplo de uso:
+        progresso = ExtractionProgress('csv/progresso.json')
+        progresso.scan(periodos)
+        ...
+        progresso.update(estudante.path, len(execucoes), medicao)
+        progresso.finish()
+    """
+
+    # intervalo mínimo (em segundos) entre dois registros do andamento
+    __intervalo = 10.0
+    __extensao_execucao = '.log'
+
+    def __init__(self, path: str, intervalo: float = None):
+        """
+        Método Construtor.
+
+        :param path: Caminho do arquivo JSON com os contadores do andamento (ou None, para apenas registrar no log).
+        :param intervalo: Intervalo mínimo (em segundos) entre dois registros do andamento.
+        """
+        self.path = path
+        self.intervalo = ExtractionProgress.__intervalo if intervalo is None else intervalo
+        # estudante (path) -> (arquivos, bytes) encontrados na pré-varredura
+        self.__estudantes = {}
+        self.total_estudantes = 0
+        self.total_arquivos = 0
+        self.total_bytes = 0
+        self.estudantes = 0
+        self.arquivos = 0
+        self.bytes = 0
+        # arquivo mais lento e o seu tempo de extração (em segundos)
+        self.mais_lento = None
+        self.mais_lento_segundos = 0.0
+        # pid -> [estudantes, arquivos, segundos, último estudante, instante do último resultado]
+        self.workers = {}
+        self.__inicio = time.monotonic()
+        self.__ultimo_registro = self.__inicio
+
+    def scan(self, periodos, shard=None, concluidas=(), catalog=None, walker=None):
+        """
+        Pré-varredura dos arquivos de log das Execuções de cada Estudante, apenas com a listagem dos diretórios.
+
+        :param periodos: Lista de :class:`Periodo` a serem extraídos.
+        :param shard: O shard da extração distribuída, apenas suas Turmas são contadas (ou None).
+        :param concluidas: Caminhos absolutos das Turmas já concluídas no checkpoint, que não são contadas.
+        :param catalog: Catálogo (:class:`DatasetCatalog`) ou arquivo compactado (:class:`DatasetArchive`) do dataset,
+            consultado no lugar do sistema de arquivos (ou None).
+        :param walker: Listagem paralela (:class:`ParallelWalker`) dos diretórios de execuções (ou None).
+        """
+        for periodo in periodos:
+            if shard is not None and not shard.select_periodo(periodo):
+                continue
+            with ExtractionProgress.__scandir(periodo.path, catalog) as folders:
+                for folder in folders:
+                    if not folder.is_dir():
+                        continue
+                    if shard is not None and not shard.select_turma(Turma(periodo, int(folder.name), folder.path)):
+                        continue
+                    if os.path.abspath(folder.path) in concluidas:
+                        continue
+                    self.__scan_turma(os.path.join(folder.path, 'users'), catalog, walker)
+
+        self.total_estudantes = len(self.__estudantes)
+        self.total_arquivos = sum(a for a, _ in self.__estudantes.values())
+        self.total_bytes = sum(b for _, b in self.__estudantes.values())
+        self.__inicio = self.__ultimo_registro = time.monotonic()
+        Logger.info('Pré-varredura do dataset: %d estudantes, %d arquivos de execuções (%.1f MB)',
+                    self.total_estudantes, self.total_arquivos, self.total_bytes / 1024 / 1024)
+
+    @staticmethod
+    def __scandir(path: str, catalog):
+        """Lista as entradas de um diretório a partir do catálogo (se informado) ou do sistema de arquivos."""
+        entradas = catalog.scandir(path) if catalog is not None else None
+        return os.scandir(path) if entradas is None else contextlib.nullcontext(entradas)
+
+    @staticmethod
+    def __list(path: str, catalog):
+        """Lista as entradas de um diretório, ou retorna None se ele não existe."""
+        try:
+            with ExtractionProgress.__scandir(path, catalog) as entradas:
+                return path, list(entradas)
+        except FileNotFoundError:
+            return path, None
+
+    def __scan_turma(self, path: str, catalog, walker):
+        """Conta os arquivos de log (e os seus bytes) das Execuções de cada Estudante de uma Turma."""
+        _, folders = ExtractionProgress.__list(path, catalog)
+        estudantes = [folder.path for folder in folders or () if folder.is_dir()]
+        diretorios = [os.path.join(estudante, 'executions') for estudante in estudantes]
+        if walker is not None and catalog is None:
+            # os diretórios de execuções (e o 'stat' dos arquivos) são listados ao mesmo tempo, na mesma ordem
+            listagens = walker.scandir_many(diretorios, stat=True)
+        else:
+            listagens = (ExtractionProgress.__list(diretorio, catalog) for diretorio in diretorios)
+        for estudante, (_, entries) in zip(estudantes, listagens):
+            arquivos, tamanho = 0, 0
+            for entry in entries or ():
+                if entry.is_file() and entry.name.endswith(ExtractionProgress.__extensao_execucao):
+                    arquivos += 1
+                    tamanho += entry.stat().st_size
+            self.__estudantes[estudante] = (arquivos, tamanho)
+
+    def update(self, path: str, execucoes: int, medicao=None):
+        """
+        Registra um Estudante concluído.
+
+        :param path: Caminho absoluto para o diretório do Estudante.
+        :param execucoes: Quantidade de Execuções extraídas, usada se o Estudante não foi contado na pré-varredura.
+        :param medicao: Tupla (pid, segundos, arquivo mais lento, segundos do arquivo mais lento) do processo que
+            extraiu o Estudante, ou None se as Execuções foram recuperadas do manifesto.
+        """
+        arquivos, tamanho = self.__estudantes.pop(path, (execucoes, 0))
+        self.estudantes += 1
+        self.arquivos += arquivos
+        self.bytes += tamanho
+        if medicao is not None:
+            pid, segundos, arquivo, segundos_arquivo = medicao
+            worker = self.workers.get(pid)
+            if worker is None:
+                worker = self.workers[pid] = [0, 0, 0.0, None, 0.0]
+            worker[0] += 1
+            worker[1] += arquivos
+            worker[2] += segundos
+            worker[3] = os.path.basename(path)
+            worker[4] = time.monotonic()
+            if arquivo is not None and segundos_arquivo > self.mais_lento_segundos:
+                self.mais_lento = arquivo
+                self.mais_lento_segundos = segundos_arquivo
+
+        if time.monotonic() - self.__ultimo_registro >= self.intervalo:
+            self.report()
+
+    def finish(self):
+        """Registra e salva o andamento ao final da extração."""
+        self.report(concluido=True)
+
+    def stats(self, concluido: bool = False):
+        """
+        Retorna os contadores do andamento da extração.
+
+        :param concluido: Se verdadeiro, a extração foi concluída.
+        :return: Dicionário com os totais da pré-varredura, os valores já extraídos, as taxas, o ETA (em segundos),
+            o arquivo mais lento e os contadores de cada processo de trabalho.
+        """
+        agora = time.monotonic()
+        segundos = max(agora - self.__inicio, 1e-9)
+        arquivos_s = self.arquivos / segundos
+        restantes = max(self.total_arquivos - self.arquivos, 0)
+        return {
+            'data': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'concluido': concluido,
+            'segundos': round(segundos, 3),
+            'total_estudantes': self.total_estudantes,
+            'total_arquivos': self.total_arquivos,
+            'total_bytes': self.total_bytes,
+            'estudantes': self.estudantes,
+            'arquivos': self.arquivos,
+            'bytes': self.bytes,
+            'percentual': round(self.arquivos * 100 / self.total_arquivos, 2) if self.total_arquivos else None,
+            'arquivos_s': round(arquivos_s, 3),
+            'mb_s': round(self.bytes / 1024 / 1024 / segundos, 3),
+            'eta_segundos': round(restantes / arquivos_s, 1) if arquivos_s > 0 and not concluido else None,
+            'mais_lento': {'arquivo': self.mais_lento, 'segundos': round(self.mais_lento_segundos, 6)},
+            'workers': {str(pid): {'estudantes': w[0], 'arquivos': w[1], 'segundos': round(w[2], 3),
+                                   'ultimo_estudante': w[3], 'ocioso_segundos': round(agora - w[4], 1)}
+                        for pid, w in sorted(self.workers.items())},
+        }
+
+    def report(self, concluido: bool = False):
+        """Registra no log o andamento da extração e salva os contadores no arquivo JSON."""
+        self.__ultimo_registro = time.monotonic()
+        s = self.stats(concluido)
+        percentual = '-' if s['percentual'] is None else f"{s['percentual']:.1f}%"
+        eta = '-' if s['eta_segundos'] is None else time.strftime('%H:%M:%S', time.gmtime(s['eta_segundos']))
+        Logger.info('Andamento da extração: %s (%d de %d arquivos, %d de %d estudantes), %.1f arquivos/s, %.2f MB/s, '
+                    'ETA %s', percentual, s['arquivos'], s['total_arquivos'], s['estudantes'], s['total_estudantes'],
+                    s['arquivos_s'], s['mb_s'], eta)
+        if self.mais_lento is not None:
+            Logger.info('Arquivo mais lento: %s (%.3f s)', self.mais_lento, self.mais_lento_segundos)
+        for pid, w in s['workers'].items():
+            Logger.info('Processo %s: %d estudantes, %d arquivos, %.1f s ocupado, último estudante %s '
+                        '(há %.1f s)', pid, w['estudantes'], w['arquivos'], w['segundos'], w['ultimo_estudante'],
+                        w['ocioso_segundos'])
+        if self.path is not None:
+            self.save(s)
+
+    def save(self, stats):
+        """Salva os contadores (ver 'stats') no arquivo JSON, substituindo-o de uma só vez."""
+        temporario = self.path + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2)
+        os.replace(temporario, self.path)
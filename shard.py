@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import hashlib
+import json
+import os
+
+from model import *
+from util import Logger
+
+
+class ExtractionShard:
+    """
+    Partição (shard) de uma extração distribuída entre várias máquinas (ex.: com o dataset num volume NFS).
+
+    Cada extração processa apenas um subconjunto dos Períodos (pelo nome do diretório) e/ou as Turmas cujo hash do
+    caminho relativo corresponde ao índice do shard, salvando os arquivos '.csv' no seu próprio diretório de saída.
+    Ao final de cada Período e Turma é registrada no índice do shard ('shard.jsonl') a sua posição na varredura do
+    dataset (os Períodos e Turmas são percorridos em ordem de nome, a mesma em todas as máquinas) e o tamanho de cada
+    arquivo '.csv'. Com esses registros, 'merge' copia os trechos de cada shard na
+    mesma ordem de uma extração completa, gerando arquivos idênticos aos de uma única máquina.
+
+    Exemplo de uso:
+        shard = ExtractionShard(indice=0, total=4)
+        ExtractionPipeline.run('cb_dataset_v1.11/', shard=shard)
+        ...
+        ExtractionShard.merge(['shard0/', 'shard1/', 'shard2/', 'shard3/'], 'csv/')
+    """
+
+    # versão do formato do índice do shard
+    __versao = 1
+    __arquivo_indice = 'shard.jsonl'
+    # tamanho dos blocos copiados na união dos shards
+    __tamanho_bloco = 1024 * 1024
+
+    def __init__(self, indice: int = 0, total: int = 1, periodos=None):
+        """
+        Método Construtor.
+
+        :param indice: Índice do shard das Turmas (0 a total-1).
+        :param total: Quantidade de shards em que as Turmas são divididas (1 = todas as Turmas).
+        :param periodos: Nomes dos diretórios dos Períodos processados neste shard (None = todos os Períodos).
+        """
+        if total < 1 or not 0 <= indice < total:
+            raise ValueError(f'Shard inválido: {indice}/{total}')
+        self.indice = indice
+        self.total = total
+        self.periodos = None if periodos is None else set(periodos)
+        self.path = None
+        self.__posicoes = {}
+
+    @staticmethod
+    def parse(valor: str):
+        """
+        Converte a descrição de um shard das Turmas no formato 'indice/total' (ex.: '0/4').
+
+        :param valor: A descrição do shard.
+        :return: Tupla com o índice e o total de shards.
+        """
+        try:
+            indice, total = (int(v) for v in valor.split('/'))
+        except ValueError:
+            raise ValueError(f'Shard inválido, use o formato indice/total: {valor!r}')
+        if total < 1 or not 0 <= indice < total:
+            raise ValueError(f'Shard inválido: {valor!r}')
+        return indice, total
+
+    def descricao(self):
+        """Retorna a descrição do shard, registrada no checkpoint e no índice do shard."""
+        descricao = f'{self.indice}/{self.total}'
+        if self.periodos is not None:
+            descricao += ' periodos=' + ','.join(sorted(self.periodos))
+        return descricao
+
+    def select_periodo(self, periodo: Periodo):
+        """Verifica se o :class:`Periodo` pertence a este shard."""
+        return self.periodos is None or os.path.basename(periodo.path) in self.periodos
+
+    def select_turma(self, turma: Turma):
+        """
+        Verifica se a :class:`Turma` pertence a este shard.
+
+        O hash é calculado sobre o caminho relativo ao dataset (Período/Turma), assim todas as máquinas chegam à mesma
+        divisão independente de onde o dataset está montado.
+        """
+        if self.total == 1:
+            return True
+        relativo = f'{os.path.basename(turma.periodo.path)}/{os.path.basename(turma.path)}'
+        h = hashlib.blake2b(relativo.encode('utf-8', 'surrogateescape'), digest_size=8)
+        return int.from_bytes(h.digest(), 'big') % self.total == self.indice
+
+    def register(self, turma: Turma, periodo: int, posicao: int):
+        """
+        Registra a posição de uma Turma na varredura do dataset.
+
+        :param turma: A Turma selecionada neste shard.
+        :param periodo: Posição do Período na lista de Períodos do dataset.
+        :param posicao: Posição da Turma na lista de Turmas do Período.
+        """
+        self.__posicoes[os.path.abspath(turma.path)] = (periodo, posicao)
+
+    def start(self, output_dir: str, dataset_dir: str, modo: str, checkpoint):
+        """
+        Inicia o índice do shard no diretório de saída.
+
+        Numa extração continuada (checkpoint com Turmas concluídas) os registros até o checkpoint são mantidos e os
+        registros posteriores a ele, cujas linhas foram descartadas dos arquivos '.csv', são removidos.
+
+        :param output_dir: Diretório dos arquivos de saída '.csv' deste shard.
+        :param dataset_dir: Caminho do diretório do dataset.
+        :param modo: Tipo da extração ('run' ou 'execucoes').
+        :param checkpoint: Checkpoint da extração (:class:`ExtractionCheckpoint`).
+        """
+        self.path = os.path.join(output_dir, ExtractionShard.__arquivo_indice)
+        self.__posicoes = {}
+
+        registros = []
+        if checkpoint.turmas:
+            cabecalho, entradas = ExtractionShard.__load(self.path)
+            if cabecalho is not None and cabecalho['shard'] == self.descricao() and cabecalho['modo'] == modo:
+                registros = [e for e in entradas if ExtractionShard.__concluido(e, checkpoint)]
+
+        cabecalho = {
+            'versao': ExtractionShard.__versao,
+            'dataset_dir': os.path.abspath(dataset_dir),
+            'modo': modo,
+            'shard': self.descricao(),
+            'indice': self.indice,
+            'total': self.total,
+        }
+        temporario = self.path + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            for registro in [cabecalho] + registros:
+                f.write(json.dumps(registro) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.path)
+
+    @staticmethod
+    def __concluido(entrada, checkpoint):
+        """Verifica se um registro do índice foi salvo antes do checkpoint da extração continuada."""
+        if any(tamanho > checkpoint.tamanhos.get(arquivo, 0) for arquivo, tamanho in entrada['tamanhos'].items()):
+            return False
+        return entrada['turma'] is None or entrada['turma'] in checkpoint.turmas
+
+    def add_periodo(self, periodo: int, tamanhos):
+        """
+        Registra as linhas de um Período salvas no arquivo 'periodos.csv'.
+
+        :param periodo: Posição do Período na lista de Períodos do dataset.
+        :param tamanhos: Tamanho de cada arquivo '.csv' após salvar o Período (ver 'CSVParser.sync_output_files').
+        """
+        self.__append({'chave': [periodo, -1], 'turma': None, 'tamanhos': tamanhos})
+
+    def add_turma(self, turma: Turma, tamanhos):
+        """
+        Registra as linhas de uma Turma concluída, deve ser chamado antes de salvar o checkpoint.
+
+        :param turma: A Turma concluída.
+        :param tamanhos: Tamanho de cada arquivo '.csv' após salvar a Turma (ver 'CSVParser.sync_output_files').
+        """
+        path = os.path.abspath(turma.path)
+        self.__append({'chave': list(self.__posicoes.pop(path)), 'turma': path, 'tamanhos': tamanhos})
+
+    def __append(self, registro):
+        """Adiciona um registro ao final do índice do shard, gravando-o em disco."""
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def __load(path: str):
+        """
+        Lê o índice de um shard, ignorando uma última linha incompleta (escrita interrompida).
+
+        :return: Tupla com o cabeçalho (ou None, se o índice não existe ou é inválido) e a lista de registros.
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                linhas = f.read().splitlines()
+        except OSError:
+            return None, []
+
+        registros = []
+        for linha in linhas:
+            try:
+                registros.append(json.loads(linha))
+            except ValueError:
+                break
+        if not registros or registros[0].get('versao') != ExtractionShard.__versao:
+            return None, []
+        return registros[0], registros[1:]
+
+    @staticmethod
+    def merge(shard_dirs, output_dir: str):
+        """
+        Une os arquivos '.csv' de vários shards nos arquivos de uma extração completa.
+
+        Os trechos de cada Período e Turma são copiados (sem serem interpretados) na ordem da varredura do dataset e
+        o cabeçalho de cada arquivo é escrito uma única vez. Linhas de Períodos presentes em vários shards (shards
+        de Turmas) são copiadas apenas uma vez.
+
+        :param shard_dirs: Diretórios de saída dos shards, todos de extrações concluídas.
+        :param output_dir: Diretório dos arquivos '.csv' unidos.
+        """
+        segmentos = {}
+        modos = set()
+        indices = {}
+        for ordem, shard_dir in enumerate(shard_dirs):
+            if os.path.isfile(os.path.join(shard_dir, 'checkpoint.json')):
+                raise ValueError(f'A extração do shard não foi concluída: {shard_dir}')
+            cabecalho, entradas = ExtractionShard.__load(os.path.join(shard_dir, ExtractionShard.__arquivo_indice))
+            if cabecalho is None:
+                raise ValueError(f'Índice do shard não encontrado ou inválido: {shard_dir}')
+            modos.add(cabecalho['modo'])
+            indices.setdefault(cabecalho['total'], set()).add(cabecalho['indice'])
+
+            anteriores = {}
+            for entrada in entradas:
+                for arquivo, fim in entrada['tamanhos'].items():
+                    inicio = anteriores.get(arquivo, 0)
+                    anteriores[arquivo] = fim
+                    segmentos.setdefault(arquivo, [])
+                    if fim > inicio:
+                        segmentos[arquivo].append((tuple(entrada['chave']), ordem, inicio, fim))
+
+        if len(modos) > 1:
+            raise ValueError(f"Os shards são de extrações de tipos diferentes: {', '.join(sorted(modos))}")
+        for total, encontrados in indices.items():
+            faltantes = sorted(set(range(total)) - encontrados)
+            if total > 1 and faltantes:
+                Logger.warn(f"Shards de Turmas ausentes na união (total {total}): {', '.join(map(str, faltantes))}")
+
+        os.makedirs(output_dir, exist_ok=True)
+        for arquivo, lista in segmentos.items():
+            path = os.path.join(output_dir, arquivo)
+            if not lista:
+                if os.path.isfile(path):
+                    os.remove(path)
+                continue
+            # a ordem do shard desempata registros com a mesma chave (Períodos repetidos nos shards de Turmas)
+            lista.sort()
+            temporario = path + '.tmp'
+            with open(temporario, 'wb') as saida:
+                cabecalho_escrito = False
+                ultima = None
+                for chave, ordem, inicio, fim in lista:
+                    if chave == ultima:
+                        if chave[1] >= 0:
+                            Logger.warn(f'Turma presente em mais de um shard, mantida a primeira: {chave}')
+                        continue
+                    ultima = chave
+                    with open(os.path.join(shard_dirs[ordem], arquivo), 'rb') as entrada:
+                        cabecalho = entrada.readline()
+                        if not cabecalho_escrito:
+                            saida.write(cabecalho)
+                            cabecalho_escrito = True
+                        inicio = max(inicio, len(cabecalho))
+                        entrada.seek(inicio)
+                        restante = fim - inicio
+                        while restante > 0:
+                            bloco = entrada.read(min(restante, ExtractionShard.__tamanho_bloco))
+                            if not bloco:
+                                raise ValueError(f'Arquivo do shard menor que o registrado no índice: {entrada.name}')
+                            saida.write(bloco)
+                            restante -= len(bloco)
+            os.replace(temporario, path)
+            Logger.info(f'Arquivo unido a partir de {len(shard_dirs)} shards: {path}')
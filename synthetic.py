@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import os
+import random
+from datetime import datetime, timedelta
+
+from util import Logger
+
+
+class SyntheticDataset:
+    """
+    Gerador de um dataset sintético com a mesma estrutura de diretórios e arquivos do dataset Codebench.
+
+    Permite medir o desempenho do extrator (ver :class:`ExtractionBenchmark`) sem o dataset real, cujo acesso é
+    restrito. São gerados, para cada Período e Turma:
+        - assessments/<atividade>.data: informações da Atividade e da Turma.
+        - users/<estudante>/user.data: questionário do Estudante.
+        - users/<estudante>/executions/<atividade>_<exercicio>.log: Testes e Submissões ('== T'/'== S') com os
+          blocos '-- CODE', '-- EXEC TIME', '-- GRADE' e '-- ERROR'.
+        - users/<estudante>/codemirror/<atividade>_<exercicio>.log: eventos do editor separados por '#'.
+        - users/<estudante>/codes/<atividade>_<exercicio>.py: último Código-Fonte do Estudante.
+
+    Alguns arquivos do CodeMirror e de Código-Fonte são omitidos e alguns eventos têm data inválida, assim como no
+    dataset real. Com a mesma semente (seed) o dataset gerado é sempre o mesmo.
+
+    Exemplo de uso:
+        SyntheticDataset(periodos=2, turmas=4, estudantes=50).generate('cb_sintetico/')
+    """
+
+    # modelos dos Códigos-Fonte dos Estudantes, '{v}' é substituído por um nome de variável
+    __codigos = (
+        "{v} = int(input())\nprint({v} * 2)\n",
+        "a = int(input())\n{v} = int(input())\nif a > {v}:\n    print(a)\nelif a == {v}:\n    print('igual')\n"
+        "else:\n    print({v})\n",
+        "{v} = 0\nfor i in range(10):\n    {v} += i\n    if i % 2 == 0 and i != 4:\n        continue\nprint({v})\n"
+        "# comentário çã\n",
+        "def f(x):\n    '''doc'''\n    return x ** 2 // 3\n\n{v} = [1, 2, 3]\nprint(len({v}), f({v}[0]), {{1: 2}})\n",
+        "import math\nwhile True:\n    {v} = float(input())\n    if {v} < 0 or {v} >= 10: break\n"
+        "    print(math.sqrt({v}) / 2)\n",
+        "{v} = input().split()\nnumeros = [int(x) for x in {v}]\nmaior = max(numeros)\nmenor = min(numeros)\n"
+        "print(maior - menor, sum(numeros) / len(numeros))\n",
+        "class Ponto:\n    def __init__(self, x, y):\n        self.x = x\n        self.y = y\n\n"
+        "{v} = Ponto(1, 2)\nprint({v}.x + {v}.y, not {v}.x, {v}.x | 1, {v}.y << 2)\n",
+    )
+    __variaveis = ('x', 'n', 'valor', 'total', 'soma', 'idade', 'nota', 'lista', 'entrada')
+    __erros = ('NameError', 'TypeError', 'ValueError', 'IndexError', 'ZeroDivisionError', 'SyntaxError')
+    __eventos = ('focus', 'change', 'change', 'change', 'change', 'blur', 'invalido')
+    __intervalos_eventos = (1, 2, 5, 15, 30, 200, 400, 4000)
+
+    def __init__(self, periodos: int = 2, turmas: int = 2, estudantes: int = 10, atividades: int = 4,
+                 exercicios: int = 5, eventos: int = 60, seed: int = 0):
+        """
+        Método Construtor.
+
+        :param periodos: Quantidade de Períodos letivos.
+        :param turmas: Quantidade de Turmas de cada Período.
+        :param estudantes: Quantidade de Estudantes de cada Turma.
+        :param atividades: Quantidade de Atividades de cada Turma.
+        :param exercicios: Quantidade de Exercícios de cada Atividade.
+        :param eventos: Quantidade máxima de eventos em cada log do CodeMirror.
+        :param seed: Semente do gerador de números aleatórios.
+        """
+        if min(periodos, turmas, estudantes, atividades, exercicios, eventos) < 1:
+            raise ValueError('As quantidades do dataset sintético devem ser maiores que zero.')
+        self.periodos = periodos
+        self.turmas = turmas
+        self.estudantes = estudantes
+        self.atividades = atividades
+        self.exercicios = exercicios
+        self.eventos = eventos
+        self.seed = seed
+        self.__random = None
+        self.__arquivos = 0
+        self.__bytes = 0
+
+    def generate(self, path: str):
+        """
+        Gera o dataset sintético no diretório informado, criado caso não exista.
+
+        :param path: Caminho do diretório do dataset sintético.
+        :return: Dicionário com a quantidade de arquivos e de bytes gerados.
+        """
+        self.__random = random.Random(self.seed)
+        self.__arquivos = 0
+        self.__bytes = 0
+        for p in range(self.periodos):
+            periodo_dir = os.path.join(path, f'{2016 + p // 2}-{p % 2 + 1}')
+            for t in range(self.turmas):
+                self.__generate_turma(os.path.join(periodo_dir, str(200 + p * 10 + t)), p, t)
+            Logger.info(f'Período sintético gerado: {periodo_dir}')
+        return {'arquivos': self.__arquivos, 'bytes': self.__bytes}
+
+    def __write(self, path: str, texto: str, encoding: str = 'utf-8'):
+        """Escreve um arquivo do dataset, contabilizando a quantidade de arquivos e bytes gerados."""
+        dados = texto.encode(encoding)
+        with open(path, 'wb') as f:
+            f.write(dados)
+        self.__arquivos += 1
+        self.__bytes += len(dados)
+
+    def __generate_turma(self, turma_dir: str, p: int, t: int):
+        """Gera as Atividades e os Estudantes de uma Turma."""
+        codigo_turma = os.path.basename(turma_dir)
+        os.makedirs(os.path.join(turma_dir, 'assessments'), exist_ok=True)
+        atividades = []
+        inicio_periodo = datetime(2016 + p // 2, 3 if p % 2 == 0 else 8, 1, 8, 0)
+        for a in range(self.atividades):
+            codigo = 1000 + p * 100 + t * 10 + a
+            inicio = inicio_periodo + timedelta(days=7 * a)
+            exame = a % 3 == 2
+            termino = inicio + timedelta(hours=3 if exame else 72)
+            exercicios = [3000 + a * 100 + e for e in range(self.exercicios)]
+            atividades.append((codigo, inicio, exercicios))
+
+            linhas = [f'---- class name: Turma {codigo_turma} - Introdução à Programação de Computadores',
+                      f'---- assessment title: Lista {a + 1}',
+                      f'---- start: {inicio:%Y-%m-%d %H:%M}',
+                      f'---- end: {termino:%Y-%m-%d %H:%M}',
+                      '---- language: python',
+                      f"---- type: {'exam' if exame else 'homework'}",
+                      f'---- weight: {1.0 + a % 3 * 0.5}',
+                      f'---- total exercises: {len(exercicios)}']
+            # o primeiro bloco tem exercícios alternativos, separados por 'or'
+            if len(exercicios) > 1:
+                linhas.append(f'---- exercise ids: {exercicios[0]} or {exercicios[1]}')
+                linhas.extend(f'---- exercise ids: {e}' for e in exercicios[2:])
+            else:
+                linhas.append(f'---- exercise ids: {exercicios[0]}')
+            self.__write(os.path.join(turma_dir, 'assessments', f'{codigo}.data'), '\n'.join(linhas) + '\n')
+
+        for s in range(self.estudantes):
+            estudante_dir = os.path.join(turma_dir, 'users', str(50000 + p * 10000 + t * 1000 + s))
+            self.__generate_estudante(estudante_dir, atividades)
+
+    def __generate_estudante(self, estudante_dir: str, atividades):
+        """Gera o questionário, as Execuções, os logs do CodeMirror e os Códigos-Fonte de um Estudante."""
+        rnd = self.__random
+        for diretorio in ('executions', 'codemirror', 'codes'):
+            os.makedirs(os.path.join(estudante_dir, diretorio), exist_ok=True)
+        self.__write(os.path.join(estudante_dir, 'user.data'),
+                     f'--course id: {rnd.randint(1, 9)}\n--course name: Engenharia da Computação\n'
+                     f'--institution id: 1\n--high school name: Escola Estadual {rnd.randint(1, 300)}\n'
+                     f"--school type: {rnd.choice(('public school', 'private school'))}\n"
+                     f"--shift: {rnd.choice(('morning shift', 'afternoon shift', 'night shift'))}\n"
+                     f'--graduation year: {rnd.randint(2010, 2017)}\n--has a pc at home: yes\n'
+                     f"--sex: {rnd.choice(('female', 'male'))}\n--year of birth: {rnd.randint(1990, 2001)}\n"
+                     f"--civil status: single\n--have kids: no\n--company name: \n")
+
+        for atividade, inicio, exercicios in atividades:
+            for exercicio in exercicios:
+                nome = f'{atividade}_{exercicio}'
+                codigo = rnd.choice(SyntheticDataset.__codigos).format(v=rnd.choice(SyntheticDataset.__variaveis))
+                self.__write(os.path.join(estudante_dir, 'executions', nome + '.log'),
+                             self.__execution_log(codigo, inicio), 'latin-1')
+                if rnd.random() < 0.85:
+                    self.__write(os.path.join(estudante_dir, 'codes', nome + '.py'), codigo)
+                if rnd.random() < 0.9:
+                    self.__write(os.path.join(estudante_dir, 'codemirror', nome + '.log'),
+                                 self.__codemirror_log(inicio))
+
+    def __execution_log(self, codigo: str, inicio: datetime):
+        """Gera o log das Execuções (Testes e Submissões) de um Exercício."""
+        rnd = self.__random
+        blocos = []
+        instante = inicio + timedelta(minutes=rnd.randint(1, 120))
+        for _ in range(rnd.randint(0, 4)):
+            blocos.append(f'== TEST ({instante:%Y-%m-%d %H:%M})\n-- CODE:\n{codigo}-- ERROR:\n\n'
+                          f'Traceback (most recent call last):\n{rnd.choice(SyntheticDataset.__erros)}: teste\n*-*\n')
+            instante += timedelta(minutes=rnd.randint(1, 10))
+        for k in range(rnd.randint(1, 4)):
+            nota = rnd.choice(('0.0%', '50.0%', '100.0%'))
+            bloco = (f'== SUBMITION ({instante:%Y-%m-%d %H:%M})\n-- CODE:\n{codigo}-- EXEC TIME:\n'
+                     f'0.0{rnd.randint(1, 9)}\n-- GRADE:\n{nota}\n')
+            if nota == '0.0%':
+                erros = rnd.sample(SyntheticDataset.__erros, rnd.randint(1, 2))
+                bloco += '-- ERROR:\n\n' + ''.join(f'{erro}: submissão\n' for erro in erros)
+            blocos.append(bloco + '*-*\n')
+            instante += timedelta(minutes=rnd.randint(1, 10))
+        return ''.join(blocos)
+
+    def __codemirror_log(self, inicio: datetime):
+        """Gera o log de eventos do CodeMirror de um Exercício, alguns começando antes do início da Atividade."""
+        rnd = self.__random
+        linhas = []
+        instante = inicio - timedelta(minutes=rnd.randint(0, 200))
+        for _ in range(rnd.randint(5, max(5, self.eventos))):
+            evento = rnd.choice(SyntheticDataset.__eventos)
+            instante += timedelta(seconds=rnd.choice(SyntheticDataset.__intervalos_eventos),
+                                  milliseconds=rnd.randint(0, 999))
+            if evento == 'invalido':
+                linhas.append('linha inválida#change#{}')
+                continue
+            linhas.append(f'{instante:%Y-%m-%d %H:%M:%S}.{instante.microsecond // 1000:03d}#{evento}#'
+                          f'{{"from": {{"line": {rnd.randint(0, 20)}, "ch": 0}}, "text": ["{evento}"]}}')
+        return '\n'.join(linhas) + '\n'
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+"""
+Verifica que cada modo de extração gera os mesmos arquivos, byte a byte, que a extração serial de um dataset
+sintético (ver :class:`SyntheticDataset`).
+
+Cada extração é executada num processo separado (linha de comando), com o diretório de trabalho do teste, pois o
+manifesto, o cache e os logs são salvos no diretório de trabalho atual.
+"""
+
+import csv
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from synthetic import SyntheticDataset  # noqa: E402
+from util import Logger  # noqa: E402
+
+# executa a linha de comando, interrompendo a extração com um erro no Estudante de número 'falha'
+FALHA = '''
+import sys
+sys.path.insert(0, {repo!r})
+import pipeline
+from cli import CommandLine
+original, contador = pipeline._extrair_execucoes_estudante, [0]
+def falhar(*args):
+    contador[0] += 1
+    if contador[0] == {falha}:
+        raise RuntimeError('falha simulada')
+    return original(*args)
+pipeline._extrair_execucoes_estudante = falhar
+sys.exit(CommandLine.run({argv!r}, 'teste'))
+'''
+
+
+def extrair(cwd, *argv, falha: int = None):
+    """Executa o comando 'extract' (ou outro comando informado) no diretório 'cwd', retornando o código de saída."""
+    argv = [str(a) for a in argv]
+    if falha is None:
+        comando = [sys.executable, os.path.join(REPO, '__init__.py'), *argv]
+    else:
+        comando = [sys.executable, '-c', FALHA.format(repo=REPO, falha=falha, argv=argv)]
+    return subprocess.run(comando, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode
+
+
+def arquivos_csv(path):
+    """Retorna o conteúdo (bytes) de cada arquivo '.csv' do diretório de saída."""
+    resultado = {}
+    for nome in sorted(os.listdir(path)):
+        if nome.endswith('.csv'):
+            with open(os.path.join(path, nome), 'rb') as f:
+                resultado[nome] = f.read()
+    return resultado
+
+
+def banco(path):
+    """Retorna as instruções SQL (dump) do banco de dados SQLite gerado."""
+    conexao = sqlite3.connect(path)
+    try:
+        return list(conexao.iterdump())
+    finally:
+        conexao.close()
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    """Dataset sintético, pequeno o suficiente para que cada extração leve poucos segundos."""
+    Logger.configure()
+    path = tmp_path_factory.mktemp('dataset') / 'cb_sintetico'
+    SyntheticDataset(periodos=3, turmas=2, estudantes=4, atividades=2, exercicios=3, eventos=20).generate(str(path))
+    return path
+
+
+@pytest.fixture(scope='module')
+def serial(dataset, tmp_path_factory):
+    """Diretório de saída da extração serial (um processo, sem cache) de todas as tabelas, com o banco SQLite."""
+    cwd = tmp_path_factory.mktemp('serial')
+    assert extrair(cwd, 'extract', '--dataset', dataset, '--out', cwd / 'csv', '--no-cache',
+                   '--sqlite', cwd / 'codebench.db') == 0
+    return cwd
+
+
+def test_incremental(dataset, serial, tmp_path):
+    copia = tmp_path / 'dataset'
+    shutil.copytree(dataset, copia)
+    out = tmp_path / 'csv'
+    assert extrair(tmp_path, 'extract', '--dataset', copia, '--out', out, '--workers', 2, '--incremental') == 0
+
+    # apenas a data de modificação alterada: o resultado do manifesto é reaproveitado
+    for raiz, _, nomes in os.walk(copia):
+        for nome in nomes:
+            os.utime(os.path.join(raiz, nome), (1, 1))
+    assert extrair(tmp_path, 'extract', '--dataset', copia, '--out', out, '--workers', 2, '--incremental') == 0
+    assert arquivos_csv(out) == arquivos_csv(serial / 'csv')
+
+    # um log alterado: o Estudante é extraído novamente e o resultado é igual ao da extração serial
+    estudantes = sorted((copia / '2016-1' / '200' / 'users').iterdir())
+    logs = sorted((estudantes[0] / 'executions').iterdir())
+    shutil.copyfile(estudantes[1] / 'executions' / logs[0].name, logs[0])
+    assert extrair(tmp_path, 'extract', '--dataset', copia, '--out', out, '--workers', 2, '--incremental') == 0
+    referencia = tmp_path / 'referencia'
+    assert extrair(tmp_path, 'extract', '--dataset', copia, '--out', referencia, '--no-cache') == 0
+    assert arquivos_csv(out) == arquivos_csv(referencia)
+    assert arquivos_csv(out) != arquivos_csv(serial / 'csv')
+
+
+@pytest.mark.parametrize('workers, resume_workers', [(1, 1), (2, 3)])
+def test_resume(dataset, serial, tmp_path, workers, resume_workers):
+    out = tmp_path / 'csv'
+    argv = ['extract', '--dataset', dataset, '--out', out, '--no-cache']
+    assert extrair(tmp_path, *argv, '--workers', workers, falha=11) != 0
+    assert (out / 'checkpoint.json').exists()
+
+    # as linhas escritas depois do último checkpoint são descartadas
+    assert extrair(tmp_path, *argv, '--workers', resume_workers, '--resume') == 0
+    assert not (out / 'checkpoint.json').exists()
+    assert arquivos_csv(out) == arquivos_csv(serial / 'csv')
+
+
+def test_shards(dataset, serial, tmp_path):
+    shards = []
+    for i in range(3):
+        shards.append(tmp_path / f'shard{i}')
+        assert extrair(tmp_path, 'extract', '--dataset', dataset, '--out', shards[-1], '--shard', f'{i}/3',
+                       '--workers', 2, '--no-cache') == 0
+    # a ordem dos shards informados não altera o resultado
+    assert extrair(tmp_path, 'merge-shards', '--out', tmp_path / 'csv', *reversed(shards)) == 0
+    assert arquivos_csv(tmp_path / 'csv') == arquivos_csv(serial / 'csv')
+
+
+def test_shards_periodos(dataset, serial, tmp_path):
+    assert extrair(tmp_path, 'extract', '--dataset', dataset, '--out', tmp_path / 'a', '--periodos', '2016-1,2017-1',
+                   '--no-cache') == 0
+    assert extrair(tmp_path, 'extract', '--dataset', dataset, '--out', tmp_path / 'b', '--periodos', '2016-2',
+                   '--no-cache') == 0
+    assert extrair(tmp_path, 'merge-shards', '--out', tmp_path / 'csv', tmp_path / 'b', tmp_path / 'a') == 0
+    assert arquivos_csv(tmp_path / 'csv') == arquivos_csv(serial / 'csv')
+
+
+def test_sqlite_reinicio(dataset, serial, tmp_path):
+    argv = ['extract', '--dataset', dataset, '--out', tmp_path / 'csv', '--no-cache', '--workers', 2,
+            '--sqlite', tmp_path / 'codebench.db']
+    # a extração interrompida e a extração repetida sobre o mesmo banco não duplicam as linhas já gravadas
+    assert extrair(tmp_path, *argv, falha=11) != 0
+    assert extrair(tmp_path, *argv, '--resume') == 0
+    assert extrair(tmp_path, *argv) == 0
+    assert arquivos_csv(tmp_path / 'csv') == arquivos_csv(serial / 'csv')
+    assert banco(tmp_path / 'codebench.db') == banco(serial / 'codebench.db')
+
+
+def test_sqlite_duplicados(dataset, tmp_path):
+    # um log com sufixo no nome tem a mesma chave (atividade, exercício) do log original
+    copia = tmp_path / 'dataset'
+    shutil.copytree(dataset, copia)
+    executions = sorted((copia / '2016-1' / '200' / 'users').iterdir())[0] / 'executions'
+    log = sorted(executions.iterdir())[0]
+    shutil.copyfile(log, executions / log.name.replace('.log', '_1.log'))
+
+    dumps = []
+    for workers in (1, 2):
+        cwd = tmp_path / f'workers{workers}'
+        cwd.mkdir()
+        assert extrair(cwd, 'extract', '--dataset', copia, '--out', cwd / 'csv', '--no-cache', '--workers', workers,
+                       '--sqlite', cwd / 'codebench.db') == 0
+        dumps.append(banco(cwd / 'codebench.db'))
+    assert dumps[0] == dumps[1]
+
+    # o banco mantém as mesmas linhas dos arquivos '.csv', inclusive as duas Execuções com a mesma chave
+    conexao = sqlite3.connect(tmp_path / 'workers1' / 'codebench.db')
+    try:
+        for tabela in ('execucoes', 'erros'):
+            with open(tmp_path / 'workers1' / 'csv' / f'{tabela}.csv', 'r', encoding='utf-8', newline='') as f:
+                linhas = list(csv.reader(f))[1:]
+            assert conexao.execute(f'SELECT COUNT(*) FROM {tabela}').fetchone()[0] == len(linhas)
+        chave = ('SELECT COUNT(*) FROM execucoes WHERE periodo = ? AND turma = ? AND estudante = ? AND atividade = ? '
+                 'AND exercicio = ?')
+        periodo, turma, estudante = '2016-1', 200, int(executions.parent.name)
+        atividade, exercicio = log.stem.split('_')
+        assert conexao.execute(chave, (periodo, turma, estudante, atividade, int(exercicio))).fetchone()[0] == 2
+    finally:
+        conexao.close()
+
+
+@pytest.mark.parametrize('formato', ['zip', 'gztar'])
+def test_archive(dataset, serial, tmp_path, formato):
+    archive = shutil.make_archive(str(tmp_path / 'cb_sintetico'), formato, dataset.parent, dataset.name)
+    referencia = tmp_path / 'referencia'
+    assert extrair(tmp_path, 'extract', '--dataset', archive, '--out', referencia, '--no-cache') == 0
+    # a ordem do arquivo compactado define a ordem da extração, as linhas são as mesmas do diretório
+    for nome, conteudo in arquivos_csv(serial / 'csv').items():
+        assert sorted(arquivos_csv(referencia)[nome].splitlines()) == sorted(conteudo.splitlines())
+
+    out = tmp_path / 'csv'
+    for _ in range(2):
+        assert extrair(tmp_path, 'extract', '--dataset', archive, '--out', out, '--workers', 2, '--incremental') == 0
+        assert arquivos_csv(out) == arquivos_csv(referencia)
+
+
+def test_codigo_invalido(dataset, tmp_path):
+    # uma Submissão com erro: as métricas e os tokens são extraídos do Código-Fonte em 'codes/', que não é 'utf-8'
+    copia = tmp_path / 'dataset'
+    shutil.copytree(dataset, copia)
+    estudante = sorted((copia / '2016-1' / '200' / 'users').iterdir())[0]
+    log = sorted((estudante / 'executions').iterdir())[0]
+    log.write_bytes(b'== SUBMITION (2016-03-01 10:00)\n-- CODE:\nprint(\n-- EXEC TIME:\n0.01\n-- GRADE:\n0.0%\n'
+                    b'-- ERROR:\n\nSyntaxError: submiss\xe3o\n*-*\n')
+    codigo = estudante / 'codes' / log.name.replace('.log', '.py')
+    codigo.write_bytes('# função inválida em utf-8\nprint(1)\n'.encode('latin-1'))
+    solucoes = tmp_path / 'solucoes'
+    solucoes.mkdir()
+    (solucoes / '3000.code').write_bytes(b'print(1)\n')
+    (solucoes / '3001.code').write_bytes('# função\nprint(2)\n'.encode('latin-1'))
+
+    # o arquivo inválido é registrado no log de erros e o resultado é o mesmo de um arquivo ausente
+    argv = ['extract', '--dataset', copia, '--tables', 'execucoes,erros,solucoes', '--solutions', solucoes,
+            '--no-cache']
+    assert extrair(tmp_path, *argv, '--out', tmp_path / 'csv') == 0
+    codigo.unlink()
+    (solucoes / '3001.code').unlink()
+    assert extrair(tmp_path, *argv, '--out', tmp_path / 'referencia') == 0
+    assert arquivos_csv(tmp_path / 'csv') == arquivos_csv(tmp_path / 'referencia')
+    with open(tmp_path / 'csv' / 'solucoes.csv', 'rb') as f:
+        assert len(f.read().splitlines()) == 2
+
+
+def test_incremental_catalogo(dataset, tmp_path):
+    copia = tmp_path / 'dataset'
+    shutil.copytree(dataset, copia)
+    catalogo = tmp_path / 'catalogo.db'
+    assert extrair(tmp_path, 'catalog', '--dataset', copia, '--out', catalogo) == 0
+    argv = ['extract', '--dataset', copia, '--out', tmp_path / 'csv', '--incremental', '--catalog', catalogo]
+    assert extrair(tmp_path, *argv) == 0
+
+    # um log alterado depois da geração do catálogo também é extraído novamente
+    estudantes = sorted((copia / '2016-1' / '200' / 'users').iterdir())
+    logs = sorted((estudantes[0] / 'executions').iterdir())
+    shutil.copyfile(estudantes[1] / 'executions' / logs[0].name, logs[0])
+    assert extrair(tmp_path, *argv) == 0
+    assert extrair(tmp_path, 'extract', '--dataset', copia, '--out', tmp_path / 'referencia', '--no-cache') == 0
+    assert arquivos_csv(tmp_path / 'csv') == arquivos_csv(tmp_path / 'referencia')
@@ -3,10 +3,14 @@
 ### Universidade Federal do Amazonas - UFAM
 ### Instituto de Computação - IComp
 
+import atexit
 import logging
+import multiprocessing
 import os
+import queue
 from collections import Counter
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 
 from model import *
 
@@ -18,6 +22,18 @@ class Util:
     def wait_user_input():
         input('{:^15s}'.format('Tecle [ENTER]...'))
 
+    # função que solicita ao usuário a quantidade de processos usados na extração paralela
+    @staticmethod
+    def read_workers():
+        workers = input(f'Quantidade de processos (1 a {os.cpu_count()}) [1]: ').strip()
+        return int(workers) if workers else 1
+
+    # função que pergunta se uma extração interrompida deve ser continuada a partir do último checkpoint
+    @staticmethod
+    def read_resume():
+        resume = input('Existe uma extração interrompida, deseja continuá-la? (s/n) [s]: ').strip().lower()
+        return resume != 'n'
+
     # função que limpa a tela do console
     @staticmethod
     def clear_console():
@@ -51,12 +67,28 @@ class Util:
 
 
 class Logger:
+    """
+    Gerenciamento dos arquivos de log do extrator (info, warn e error) e da saída no console.
+
+    No modo assíncrono (ver 'configure') os registros são apenas enfileirados (:class:`QueueHandler`) pela thread que
+    os gera, enquanto a formatação e a escrita nos arquivos e no console ocorrem numa thread separada
+    (:class:`QueueListener`). Os registros de cada arquivo lido são do nível DEBUG, salvos apenas no modo detalhado
+    (verbose), e as mensagens recebem os argumentos separadamente ('%s'), assim só são formatadas se forem salvas.
+    """
 
     __path = os.path.join(os.getcwd(), 'logs')
     __cblogger = None
+    # thread do modo assíncrono (ou None), que escreve os registros enfileirados nos handlers
+    __listener = None
 
     @staticmethod
-    def configure():
+    def configure(assincrono: bool = False, verbose: bool = False):
+        """
+        Configura o módulo de log, criando os arquivos de log da execução.
+
+        :param assincrono: Se verdadeiro, os registros são escritos por uma thread separada (QueueListener).
+        :param verbose: Se verdadeiro, também salva os registros de cada arquivo lido (nível DEBUG) no log de info.
+        """
         logging.basicConfig(level=logging.INFO)
 
         if not os.path.exists(Logger.__path):
@@ -67,35 +99,63 @@ class Logger:
 
         if not Logger.__cblogger:
             Logger.__cblogger = logging.getLogger('cblogger')
+            Logger.__cblogger.setLevel(logging.DEBUG if verbose else logging.INFO)
 
             ifh = logging.FileHandler(os.path.join(Logger.__path, f'{data_hoje}_info.log'))
-            ifh.setLevel(level=logging.INFO)
+            ifh.setLevel(level=logging.DEBUG)
             ifh.setFormatter(formatter)
-            Logger.__cblogger.addHandler(ifh)
 
             wfh = logging.FileHandler(os.path.join(Logger.__path, f'{data_hoje}_warn.log'))
             wfh.setLevel(level=logging.WARNING)
             wfh.setFormatter(formatter)
-            Logger.__cblogger.addHandler(wfh)
 
             efh = logging.FileHandler(os.path.join(Logger.__path, f'{data_hoje}_error.log'))
             efh.setLevel(level=logging.ERROR)
             efh.setFormatter(formatter)
-            Logger.__cblogger.addHandler(efh)
 
             console_handler = logging.StreamHandler()
             console_handler.setLevel(level=logging.INFO)
             console_handler.setFormatter(formatter)
-            Logger.__cblogger.addHandler(console_handler)
+
+            handlers = (ifh, wfh, efh, console_handler)
+            if assincrono:
+                # o console já é atendido pela thread, os registros não são repetidos pelo handler do 'basicConfig'
+                Logger.__cblogger.propagate = False
+                fila = queue.SimpleQueue()
+                Logger.__cblogger.addHandler(QueueHandler(fila))
+                Logger.__listener = QueueListener(fila, *handlers, respect_handler_level=True)
+                Logger.__listener.start()
+                atexit.register(Logger.shutdown)
+            else:
+                for handler in handlers:
+                    Logger.__cblogger.addHandler(handler)
+        elif Logger.__listener is not None and multiprocessing.parent_process() is not None:
+            # processo de trabalho criado por 'fork': a thread do modo assíncrono não existe neste processo, os
+            # registros são escritos diretamente nos handlers herdados
+            Logger.__cblogger.handlers.clear()
+            for handler in Logger.__listener.handlers:
+                Logger.__cblogger.addHandler(handler)
+            Logger.__listener = None
+
+    @staticmethod
+    def shutdown():
+        """Encerra o modo assíncrono, aguardando a escrita de todos os registros enfileirados."""
+        if Logger.__listener is not None:
+            Logger.__listener.stop()
+            Logger.__listener = None
+
+    @staticmethod
+    def debug(msg: str, *args):
+        Logger.__cblogger.debug(msg, *args)
 
     @staticmethod
-    def info(msg: str):
-        Logger.__cblogger.info(msg)
+    def info(msg: str, *args):
+        Logger.__cblogger.info(msg, *args)
 
     @staticmethod
-    def warn(msg: str):
-        Logger.__cblogger.warning(msg)
+    def warn(msg: str, *args):
+        Logger.__cblogger.warning(msg, *args)
 
     @staticmethod
-    def error(msg: str):
-        Logger.__cblogger.error(msg, exc_info=True)
+    def error(msg: str, *args):
+        Logger.__cblogger.error(msg, *args, exc_info=True)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+### Codebench Dataset Extractor by Marcos Lima (marcos.lima@icomp.ufam.edu.br)
+### Universidade Federal do Amazonas - UFAM
+### Instituto de Computação - IComp
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ParallelWalker:
+    """
+    Listagem paralela de diretórios (e leitura de arquivos pequenos) usando um :class:`ThreadPoolExecutor`.
+
+    Num sistema de arquivos de rede (ex.: NFS) cada 'os.scandir' ou 'open' é limitado pela latência de uma ida e volta
+    ao servidor, e não pela banda. As threads sobrepõem várias dessas chamadas, enquanto os resultados são retornados
+    sempre na ordem dos itens informados, assim as Entidades são extraídas na mesma ordem da listagem sequencial.
+
+    Exemplo de uso:
+        walker = ParallelWalker(threads=16)
+        for path, entradas in walker.scandir_many(diretorios):
+            ...
+        walker.close()
+    """
+
+    # quantidade de itens em andamento por thread, limita a memória dos resultados ainda não consumidos
+    __itens_por_thread = 4
+
+    def __init__(self, threads: int = 8):
+        """
+        Método Construtor.
+
+        :param threads: Quantidade de threads, isto é, de chamadas ao sistema de arquivos em andamento ao mesmo tempo.
+        """
+        if threads < 1:
+            raise ValueError('A quantidade de threads deve ser maior que zero.')
+        self.threads = threads
+        self.__executor = None
+
+    def map(self, funcao, itens):
+        """
+        Aplica a função a cada item nas threads, retornando (yield) os resultados na ordem dos itens.
+
+        No máximo 'threads * 4' itens ficam em andamento, assim os itens podem ser um gerador longo. Exceções da
+        função são lançadas ao retornar o resultado do item correspondente.
+
+        :param funcao: Função aplicada a cada item.
+        :param itens: Itens (iterável).
+        """
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='walker')
+        janela = self.threads * ParallelWalker.__itens_por_thread
+        pendentes = deque()
+        try:
+            for item in itens:
+                pendentes.append(self.__executor.submit(funcao, item))
+                if len(pendentes) >= janela:
+                    yield pendentes.popleft().result()
+            while pendentes:
+                yield pendentes.popleft().result()
+        finally:
+            # o consumidor pode interromper a iteração, os itens ainda não iniciados são descartados
+            for tarefa in pendentes:
+                tarefa.cancel()
+
+    @staticmethod
+    def __listar(path: str, stat: bool):
+        """Lista um diretório, retornando as suas entradas (:class:`os.DirEntry`) ou None se ele não existe."""
+        try:
+            with os.scandir(path) as entradas:
+                entradas = list(entradas)
+        except (FileNotFoundError, NotADirectoryError):
+            return path, None
+        if stat:
+            # o 'os.DirEntry' guarda o resultado do 'stat', assim ele não é consultado novamente por quem o recebe
+            for entrada in entradas:
+                if not entrada.is_dir():
+                    entrada.stat()
+        return path, entradas
+
+    def scandir_many(self, paths, stat: bool = False):
+        """
+        Lista vários diretórios ao mesmo tempo.
+
+        :param paths: Caminhos dos diretórios (iterável).
+        :param stat: Se verdadeiro, também consulta o 'stat' (tamanho, mtime) dos arquivos de cada diretório.
+        :return: Gerador das tuplas (path, entradas) na ordem dos caminhos, com as entradas de cada diretório na ordem
+            do 'os.scandir', ou None se o diretório não existe.
+        """
+        return self.map(lambda path: ParallelWalker.__listar(path, stat), paths)
+
+    def close(self):
+        """Encerra as threads."""
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True, cancel_futures=True)
+            self.__executor = None